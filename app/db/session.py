@@ -1,20 +1,123 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from app.db import sqlite as sqlite_profile
+from app.utils.metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./dev.db"
 
-# Provide SQLite-specific connect args for local development
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        pool_pre_ping=True,
-    )
-else:
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# "sync" serves routes from def handlers on the threadpool; "async" serves them
+# from async def handlers on an AsyncEngine. The sync engine is created in both
+# modes for background jobs and scripts.
+DB_MODE = (os.getenv("DB_MODE") or "sync").lower()
+ASYNC_DB = DB_MODE == "async"
+
+# Optional read replica for GET routes and exports; see app.utils.read_routing
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+
+# File-backed SQLite: WAL, one writer connection, a pool of read-only connections
+SQLITE_PROFILE_ACTIVE = sqlite_profile.SQLITE_PROFILE and sqlite_profile.is_file_database(DATABASE_URL)
+
+
+def _engine_options(url: str, pool_class, read_only: bool = False) -> dict:
+    options = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        # Provide SQLite-specific connect args for local development
+        options["connect_args"] = {"check_same_thread": False}
+    # In-memory SQLite keeps its single-connection pool; everything else gets a
+    # QueuePool that reports checkout wait to /metrics
+    if make_url(url).database not in (None, "", ":memory:"):
+        options["poolclass"] = pool_class
+    if sqlite_profile.SQLITE_PROFILE and sqlite_profile.is_file_database(url):
+        if read_only:
+            options.update(pool_size=sqlite_profile.SQLITE_READ_POOL_SIZE, max_overflow=0)
+        else:
+            # SQLite has one writer at a time anyway; queueing in the pool is cheaper than lock polling
+            options.update(pool_size=1, max_overflow=0, pool_timeout=sqlite_profile.SQLITE_WRITE_WAIT_SECONDS)
+    return options
+
+
+def _read_only_engine(url: str, name: str):
+    read_engine = create_engine(url, **_engine_options(url, TimedQueuePool, read_only=True))
+    if sqlite_profile.SQLITE_PROFILE and sqlite_profile.is_file_database(url):
+        sqlite_profile.configure(read_engine, read_only=True)
+    instrument_engine(read_engine, name)
+    return read_engine
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, TimedQueuePool))
+instrument_engine(engine, "sync")
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
\ No newline at end of file
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Reads that must see every committed write but don't need the writer use
+# ReadSessionLocal. Without the SQLite profile it is the same engine.
+read_engine = engine
+ReadSessionLocal = SessionLocal
+if SQLITE_PROFILE_ACTIVE:
+    sqlite_profile.configure(engine, read_only=False)
+    read_engine = _read_only_engine(DATABASE_URL, "sync-read")
+    ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+# Reads that tolerate replication lag use ReplicaSessionLocal
+replica_engine = read_engine
+ReplicaSessionLocal = ReadSessionLocal
+if DATABASE_REPLICA_URL:
+    replica_engine = _read_only_engine(DATABASE_REPLICA_URL, "sync-replica")
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver for its async counterpart (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+async_replica_engine = None
+AsyncReplicaSessionLocal = None
+
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    def _async_read_only_engine(url: str, name: str):
+        read_engine = create_async_engine(
+            async_database_url(url), **_engine_options(url, TimedAsyncQueuePool, read_only=True)
+        )
+        if sqlite_profile.SQLITE_PROFILE and sqlite_profile.is_file_database(url):
+            sqlite_profile.configure(read_engine.sync_engine, read_only=True)
+        instrument_engine(read_engine.sync_engine, name)
+        return read_engine
+
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL), **_engine_options(DATABASE_URL, TimedAsyncQueuePool)
+    )
+    instrument_engine(async_engine.sync_engine, "async")
+    # expire_on_commit=False: attributes can't be lazily reloaded outside a greenlet
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+    if SQLITE_PROFILE_ACTIVE:
+        sqlite_profile.configure(async_engine.sync_engine, read_only=False)
+        async_read_engine = _async_read_only_engine(DATABASE_URL, "async-read")
+        AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+    async_replica_engine = async_read_engine
+    AsyncReplicaSessionLocal = AsyncReadSessionLocal
+    if DATABASE_REPLICA_URL:
+        async_replica_engine = _async_read_only_engine(DATABASE_REPLICA_URL, "async-replica")
+        AsyncReplicaSessionLocal = async_sessionmaker(
+            bind=async_replica_engine, autoflush=False, expire_on_commit=False
+        )
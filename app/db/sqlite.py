@@ -0,0 +1,93 @@
+import asyncio
+import os
+import random
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.util import await_only
+
+# Production profile for file-backed SQLite: WAL journaling, one writer
+# connection and a separate pool of read-only connections. SQLITE_PROFILE=0
+# restores a single pool with SQLite's default (rollback journal) settings.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "1") != "0"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are KiB: 64 MiB of page cache per connection
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+# How long a write waits for the single writer connection before failing
+SQLITE_WRITE_WAIT_SECONDS = float(os.getenv("SQLITE_WRITE_WAIT_SECONDS", "30"))
+# Extra BEGIN IMMEDIATE attempts after busy_timeout ran out (another process holds the lock)
+SQLITE_BEGIN_RETRIES = int(os.getenv("SQLITE_BEGIN_RETRIES", "5"))
+
+
+def is_file_database(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL is persistent in the file; readers then never block on the writer
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.fetchall()
+        # NORMAL is durable across application crashes in WAL mode; only an OS
+        # crash can lose the last transactions, never corrupt the database
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS:d}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE:d}")
+        cursor.fetchall()
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE:d}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _is_busy(exc: OperationalError) -> bool:
+    message = str(exc.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def _sleep(conn, seconds: float) -> None:
+    # begin runs inside the AsyncEngine's greenlet on aiosqlite: wait on the event loop
+    if conn.dialect.is_async:
+        await_only(asyncio.sleep(seconds))
+    else:
+        time.sleep(seconds)
+
+
+def _begin_listener(statement: str):
+    def begin(conn) -> None:
+        for attempt in range(SQLITE_BEGIN_RETRIES + 1):
+            try:
+                conn.exec_driver_sql(statement)
+                return
+            except OperationalError as exc:
+                if attempt == SQLITE_BEGIN_RETRIES or not _is_busy(exc):
+                    raise
+            # Jittered exponential backoff, so competing processes don't retry in lockstep
+            _sleep(conn, random.uniform(0.5, 1.0) * min(0.05 * 2**attempt, 1.0))
+
+    return begin
+
+
+def configure(engine: Engine, read_only: bool) -> None:
+    """
+    Apply the profile to `engine` (an AsyncEngine's sync_engine works too).
+
+    The driver's own transaction handling is switched off so that SQLAlchemy
+    emits BEGIN itself: BEGIN IMMEDIATE on the writer takes the write lock up
+    front, so a transaction never fails half-way trying to upgrade a read lock.
+    Readers use a deferred BEGIN, which pins one consistent snapshot per session.
+    """
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+        _apply_pragmas(dbapi_connection, read_only)
+
+    event.listen(engine, "begin", _begin_listener("BEGIN" if read_only else "BEGIN IMMEDIATE"))
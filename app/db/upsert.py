@@ -0,0 +1,19 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, entity) -> Optional[object]:
+    """
+    Return the dialect-specific INSERT construct that supports
+    ON CONFLICT ... DO UPDATE for the session's backend, or None when the
+    backend has no native upsert and callers must fall back to plain statements.
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(entity)
@@ -1,19 +1,39 @@
 from fastapi import FastAPI
-import os
-from app.db.session import engine
-from app.db.base import Base
-from app.routes import product, order, discount
+from fastapi.responses import PlainTextResponse
+from app.db.session import ASYNC_DB, DATABASE_REPLICA_URL
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.utils import ProxyHeaderMiddleware
+from app.utils.upload_limit import UploadSizeLimitMiddleware
+from app.utils.static import UploadStaticFiles
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from app.utils.query_budget import QueryBudgetMiddleware
+from app.utils.read_routing import ReadYourWritesMiddleware
+from app.startup import lifespan
+
+# DB_MODE picks sync (threadpool) or async (event loop) handlers for the same API
+if ASYNC_DB:
+    from app.routes import product_async as product, order_async as order, discount_async as discount
+    from app.routes import analytics_async as analytics
+else:
+    from app.routes import product, order, discount, analytics
+from app.routes.product import MAX_IMAGE_UPLOAD_BYTES
 
 app = FastAPI(
     title="Fruits & Vegetables Store API",
     version="1.0.1",
-    description="Backend service for products, orders, and discounts"
+    description="Backend service for products, orders, and discounts",
+    # Schema, upload directories, warm-up and background workers: see app.startup
+    lifespan=lifespan,
 )
 
-app.add_middleware(ProxyHeaderMiddleware, trust=True)
+# Forwarding headers are honored only from TRUSTED_PROXIES
+app.add_middleware(ProxyHeaderMiddleware)
+
+app.add_middleware(CompressionMiddleware)
+
+# Multipart bodies carry one image plus a few small form fields
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_IMAGE_UPLOAD_BYTES + 64 * 1024)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,18 +43,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dev convenience: create tables if not exist. For production, use Alembic.
-Base.metadata.create_all(bind=engine)
+# After a write, the client's reads go to the primary for READ_YOUR_WRITES_SECONDS
+if DATABASE_REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Fails (QUERY_BUDGET_MODE=enforce) or warns about routes over their @query_budget
+app.add_middleware(QueryBudgetMiddleware)
+
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(product.router)
 app.include_router(order.router)
 app.include_router(discount.router)
+app.include_router(analytics.router)
 
-# To mount static files to server uploaded images
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# To mount static files to server uploaded images; the lifespan creates the directory
+app.mount("/uploads", UploadStaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 # Health check
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -2,5 +2,30 @@ from .product import Product
 from .order import Order, OrderStatus
 from .ordered_item import OrderedItem
 from .discount import Discount
+from .notification_outbox import NotificationOutbox, OutboxStatus
+from .idempotency_key import IdempotencyKey, IdempotencyState
+from .sales_rollup import DailySales, DailyStatusSales, DailyProductSales
+from .cache_version import CacheVersion
+from .order_archive import ArchivedOrder, ArchivedOrderedItem
+from .order_event import OrderEvent
+from .search_change import SearchChange
 
-__all__ = ["Product", "Order", "OrderStatus", "OrderedItem", "Discount"]
\ No newline at end of file
+__all__ = [
+    "Product",
+    "Order",
+    "OrderStatus",
+    "OrderedItem",
+    "Discount",
+    "NotificationOutbox",
+    "OutboxStatus",
+    "IdempotencyKey",
+    "IdempotencyState",
+    "DailySales",
+    "DailyStatusSales",
+    "DailyProductSales",
+    "CacheVersion",
+    "ArchivedOrder",
+    "ArchivedOrderedItem",
+    "OrderEvent",
+    "SearchChange",
+]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CacheVersion(Base):
+    """
+    Version stamp of one family of cached reads ("catalog", "discount", ...).
+    Writers increment it in the transaction of the write; every worker polls
+    the (few) rows and drops its local copies when a stamp moved.
+    """
+
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import datetime
+import enum
+from typing import Optional
+
+from sqlalchemy import DateTime, Enum, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class IdempotencyState(str, enum.Enum):
+    InProgress = "InProgress"
+    Completed = "Completed"
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key of a POST and, once it finished, the response to replay.
+    A row is claimed (InProgress) before the work starts and completed in the
+    same transaction as the work itself.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # sha256 of the request payload; the same key with another payload is rejected
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    state: Mapped[IdempotencyState] = mapped_column(
+        Enum(IdempotencyState), nullable=False, default=IdempotencyState.InProgress
+    )
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    # When the current claim was taken; a claim older than the lease is abandoned
+    locked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
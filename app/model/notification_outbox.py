@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime
+import enum
+import uuid
+from typing import Optional
+
+from sqlalchemy import DateTime, Enum, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    Pending = "Pending"
+    Sending = "Sending"
+    Failed = "Failed"
+
+
+class NotificationOutbox(Base):
+    """
+    Notifications waiting to be delivered. Rows are written in the same
+    transaction as the change they announce and deleted once delivered.
+    """
+
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    channel: Mapped[str] = mapped_column(String, nullable=False, default="telegram")
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus), nullable=False, default=OutboxStatus.Pending
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    # Set while a dispatcher holds the row; a stale claim is picked up again after the lease
+    claimed_by: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
@@ -5,7 +5,7 @@ import enum
 import uuid
 from typing import List
 
-from sqlalchemy import DateTime, Enum, Float, String
+from sqlalchemy import DateTime, Enum, Float, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -21,6 +21,12 @@ class OrderStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first; the status
+        # variant serves the same walk when the list is filtered by status.
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+
+from sqlalchemy import DateTime, Enum, Float, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, foreign, mapped_column, relationship
+
+from app.db.base import Base
+from app.model.order import OrderStatus
+
+if TYPE_CHECKING:
+    from .product import Product
+
+
+class ArchivedOrder(Base):
+    """
+    A Delivered order moved out of `orders` by the archival job
+    (app.services.order_archive), with the same columns. Archived orders are
+    read-only. On Postgres the table may be range-partitioned by created_at
+    (see the migration); its primary key is then (id, created_at).
+    """
+
+    __tablename__ = "orders_archive"
+    __table_args__ = (Index("ix_orders_archive_created_at_id", "created_at", "id"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    address: Mapped[str] = mapped_column(String, nullable=False)
+    phone_number: Mapped[str] = mapped_column(String, nullable=False)
+
+    total_price: Mapped[float] = mapped_column(Float, nullable=False)
+    status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # No foreign key from the items: a partitioned table can't be referenced by id alone.
+    # The archival job moves an order and its items in one transaction.
+    items: Mapped[List["ArchivedOrderedItem"]] = relationship(
+        primaryjoin=lambda: ArchivedOrder.id == foreign(ArchivedOrderedItem.order_id),
+        viewonly=True,
+    )
+
+
+class ArchivedOrderedItem(Base):
+    __tablename__ = "ordered_items_archive"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    order_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    product_id: Mapped[str] = mapped_column(
+        String, ForeignKey("products.id", ondelete="RESTRICT"), nullable=False
+    )
+
+    quantity_in_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    unit_price_per_kg: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    product: Mapped["Product"] = relationship()
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OrderEvent(Base):
+    """
+    One change of the live order feed, written in the transaction of the
+    change. The id comes from the table's own sequence (AUTOINCREMENT on
+    SQLite), so recording an event takes no shared lock; every worker reads
+    the rows after its last id and streams them with that id as the SSE
+    event id.
+    """
+
+    __tablename__ = "order_events"
+    # Never reuse the id of a pruned event: clients resume by id
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    # INTEGER on SQLite, where only an INTEGER PRIMARY KEY is the rowid
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    event: Mapped[str] = mapped_column(String(32), nullable=False)
+    # The SSE data line: the event's JSON
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import uuid
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from sqlalchemy import Float, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -21,13 +21,15 @@ class OrderedItem(Base):
     )
 
     order_id: Mapped[str] = mapped_column(
-        String, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False
+        String, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
     )
     product_id: Mapped[str] = mapped_column(
         String, ForeignKey("products.id", ondelete="RESTRICT"), nullable=False
     )
 
     quantity_in_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    # Price at the time the order was placed; NULL for orders placed before it was recorded
+    unit_price_per_kg: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
     # Many-to-one: OrderedItem -> Order
     order: Mapped["Order"] = relationship(back_populates="items")
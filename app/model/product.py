@@ -21,6 +21,9 @@ class Product(Base):
     image: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     price_per_kg: Mapped[float] = mapped_column(Float, nullable=False)
     in_stock: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Stock on hand; NULL means the product is not stock-tracked. Orders reserve
+    # from it atomically (see order_service.reserve_stock), never below zero.
+    available_kg: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow
     )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import Date, Enum, Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.model.order import OrderStatus
+
+# Aggregates kept in step with the orders table by app.services.analytics_service.
+# Days are the UTC calendar day of Order.created_at; rows are only ever
+# incremented or decremented in the transaction that changes the order.
+
+
+class DailySales(Base):
+    __tablename__ = "sales_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    kg_sold: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class DailyStatusSales(Base):
+    __tablename__ = "sales_daily_status"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[OrderStatus] = mapped_column(Enum(OrderStatus), primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class DailyProductSales(Base):
+    __tablename__ = "sales_daily_product"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # No foreign key: history outlives the product row
+    product_id: Mapped[str] = mapped_column(String, primary_key=True)
+    kg_sold: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Order lines, not distinct orders: an order can list a product twice
+    order_lines: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
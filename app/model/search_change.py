@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SearchChange(Base):
+    """
+    A product whose name or in_stock a write changed, logged under the
+    "search" cache version that write bumped. Other workers re-read just these
+    products into their search index instead of rebuilding it.
+    """
+
+    __tablename__ = "search_changes"
+
+    version: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    product_id: Mapped[str] = mapped_column(String, primary_key=True)
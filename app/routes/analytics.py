@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.utils.deps import get_replica_db
+from app.schemas.analytics import DailySalesOut, ProductSalesOut, StatusSalesOut
+from app.schemas.common import ApiResponse
+from app.utils.response import success_json
+from app.utils.query_budget import query_budget
+from app.services.analytics_service import daily_sales, product_sales, status_sales
+
+router = APIRouter(tags=["Analytics"])
+
+# Every endpoint reads only the sales rollups, so cost grows with the range, not with the orders table
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366
+
+def analytics_range(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+) -> Tuple[date, date]:
+    """Inclusive [from, to] range of UTC days; defaults to the last 30 days."""
+    end = date_to or datetime.utcnow().date()
+    start = date_from or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+    if (end - start).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Range is limited to {ANALYTICS_MAX_DAYS} days"
+        )
+    return start, end
+
+@router.get("/api/analytics/daily", response_model=ApiResponse[List[DailySalesOut]])
+@query_budget(1)
+def get_daily_sales(day_range: Tuple[date, date] = Depends(analytics_range), db: Session = Depends(get_replica_db)):
+    return success_json("Daily sales fetched successfully", daily_sales(db, *day_range), List[DailySalesOut])
+
+@router.get("/api/analytics/status", response_model=ApiResponse[List[StatusSalesOut]])
+@query_budget(1)
+def get_status_sales(day_range: Tuple[date, date] = Depends(analytics_range), db: Session = Depends(get_replica_db)):
+    return success_json("Order status totals fetched successfully", status_sales(db, *day_range), List[StatusSalesOut])
+
+@router.get("/api/analytics/products", response_model=ApiResponse[List[ProductSalesOut]])
+@query_budget(1)
+def get_product_sales(
+    limit: int = Query(20, ge=1, le=200),
+    day_range: Tuple[date, date] = Depends(analytics_range),
+    db: Session = Depends(get_replica_db),
+):
+    return success_json(
+        "Product sales fetched successfully", product_sales(db, *day_range, limit), List[ProductSalesOut]
+    )
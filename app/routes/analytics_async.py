@@ -0,0 +1,36 @@
+from datetime import date
+from typing import List, Tuple
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.deps import get_async_replica_db
+from app.schemas.analytics import DailySalesOut, ProductSalesOut, StatusSalesOut
+from app.schemas.common import ApiResponse
+from app.utils.response import success_json
+from app.utils.query_budget import query_budget
+from app.services.analytics_service import daily_sales, product_sales, status_sales
+from app.routes.analytics import analytics_range
+
+# async def counterparts of app.routes.analytics, mounted instead of it when DB_MODE=async
+router = APIRouter(tags=["Analytics"])
+
+@router.get("/api/analytics/daily", response_model=ApiResponse[List[DailySalesOut]])
+@query_budget(1)
+async def get_daily_sales(day_range: Tuple[date, date] = Depends(analytics_range), db: AsyncSession = Depends(get_async_replica_db)):
+    data = await db.run_sync(daily_sales, *day_range)
+    return success_json("Daily sales fetched successfully", data, List[DailySalesOut])
+
+@router.get("/api/analytics/status", response_model=ApiResponse[List[StatusSalesOut]])
+@query_budget(1)
+async def get_status_sales(day_range: Tuple[date, date] = Depends(analytics_range), db: AsyncSession = Depends(get_async_replica_db)):
+    data = await db.run_sync(status_sales, *day_range)
+    return success_json("Order status totals fetched successfully", data, List[StatusSalesOut])
+
+@router.get("/api/analytics/products", response_model=ApiResponse[List[ProductSalesOut]])
+@query_budget(1)
+async def get_product_sales(
+    limit: int = Query(20, ge=1, le=200),
+    day_range: Tuple[date, date] = Depends(analytics_range),
+    db: AsyncSession = Depends(get_async_replica_db),
+):
+    data = await db.run_sync(product_sales, *day_range, limit)
+    return success_json("Product sales fetched successfully", data, List[ProductSalesOut])
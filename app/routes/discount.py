@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
-from app.utils.deps import get_db
+from app.utils.deps import get_db, get_read_db
 from app.model.discount import Discount
 from app.schemas.discount import DiscountCreate, DiscountOut
 from app.schemas.common import ApiResponse
-from app.utils.response import success_response
+from app.utils.response import dump_success, success_json
+from app.utils.snapshot import SnapshotCache, snapshot_response
+from app.utils.query_budget import query_budget
+from app.services.cache_versions import DISCOUNT, bump, watcher
 
 router = APIRouter(tags=["Discount"])
 
+# Serialized GET /api/discount body; invalidated by set_discount, here or on another worker
+discount_cache = SnapshotCache("discount", max_variants=1, trusted=watcher.trusted)
+watcher.watch(DISCOUNT, discount_cache.invalidate)
+
+def _build_discount_body(db: Session) -> bytes:
+    row = db.query(Discount).first()
+    if not row:
+        return dump_success("No discount set", None, DiscountOut | None)
+    return dump_success("Discount fetched successfully", DiscountOut.model_construct(text=row.text), DiscountOut | None)
+
 @router.post("/api/discount", response_model=ApiResponse[DiscountOut])
+@query_budget(4)
 def set_discount(payload: DiscountCreate, db: Session = Depends(get_db)):
     # Keep only one discount row; update if exists, else create
     row = db.query(Discount).first()
@@ -18,13 +32,15 @@ def set_discount(payload: DiscountCreate, db: Session = Depends(get_db)):
     else:
         row = Discount(text=payload.text)
         db.add(row)
+    bump(db, DISCOUNT)
     db.commit()
+    discount_cache.invalidate()
     db.refresh(row)
-    return success_response("Discount updated successfully", DiscountOut.model_validate(row))
+    return success_json("Discount updated successfully", DiscountOut.model_construct(text=row.text), DiscountOut)
 
 @router.get("/api/discount", response_model=ApiResponse[DiscountOut | None])
-def get_discount(db: Session = Depends(get_db)):
-    row = db.query(Discount).first()
-    if not row:
-        return success_response("No discount set", None)
-    return success_response("Discount fetched successfully", DiscountOut.model_validate(row))
+@query_budget(1)
+def get_discount(request: Request, db: Session = Depends(get_read_db)):
+    # Snapshot: rebuilt from the primary, never the replica, so it can't pin stale data
+    snapshot = discount_cache.get("discount", lambda: _build_discount_body(db))
+    return snapshot_response(request, snapshot)
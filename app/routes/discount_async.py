@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.deps import get_async_db, get_async_read_db
+from app.model.discount import Discount
+from app.schemas.discount import DiscountCreate, DiscountOut
+from app.schemas.common import ApiResponse
+from app.utils.response import success_json
+from app.utils.snapshot import snapshot_response
+from app.utils.query_budget import query_budget
+from app.routes.discount import _build_discount_body, discount_cache
+from app.services.cache_versions import DISCOUNT, bump
+
+# async def counterparts of app.routes.discount, mounted instead of it when DB_MODE=async
+router = APIRouter(tags=["Discount"])
+
+@router.post("/api/discount", response_model=ApiResponse[DiscountOut])
+@query_budget(4)
+async def set_discount(payload: DiscountCreate, db: AsyncSession = Depends(get_async_db)):
+    # Keep only one discount row; update if exists, else create
+    row = (await db.scalars(select(Discount).limit(1))).first()
+    if row:
+        row.text = payload.text
+        db.add(row)
+    else:
+        row = Discount(text=payload.text)
+        db.add(row)
+    await db.run_sync(bump, DISCOUNT)
+    await db.commit()
+    discount_cache.invalidate()
+    await db.refresh(row)
+    return success_json("Discount updated successfully", DiscountOut.model_construct(text=row.text), DiscountOut)
+
+@router.get("/api/discount", response_model=ApiResponse[DiscountOut | None])
+@query_budget(1)
+async def get_discount(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    snapshot = await discount_cache.aget("discount", lambda: db.run_sync(_build_discount_body))
+    return snapshot_response(request, snapshot)
@@ -1,83 +1,190 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.utils.deps import get_db
+from app.utils.deps import get_db, get_replica_db
 from app.model.order import Order, OrderStatus
-from app.schemas.order import OrderCreate, OrderOut, OrderStatusUpdate, OrderDetailOut, OrderDetailItem
+from app.model.order_archive import ArchivedOrder
+from app.schemas.order import OrderCreate, OrderOut, OrderPageOut, OrderStatusUpdate, OrderDetailOut, OrderDetailItem
 from app.schemas.common import ApiResponse
-from app.utils.response import success_response
-from app.services.order_service import create_order
+from app.utils.response import ApiJSONResponse, dump_success, success_json, success_response
+from app.utils.query_budget import query_budget
+from app.services import idempotency
+from app.services.order_service import (
+    build_order_page,
+    change_order_status,
+    create_order,
+    order_detail_statement,
+    order_filters,
+    order_out,
+    order_page_statement,
+    remove_order,
+)
+from app.services.export_service import FORMATTERS, iter_export
+from app.services.order_archive import archived_order_detail_statement
+from app.services.order_events import order_events
 
 router = APIRouter(tags=["Orders"])
 
+def _placed_body(order: Order) -> bytes:
+    return dump_success("Order placed successfully", order_out(order), OrderOut)
+
+def order_fingerprint(payload: OrderCreate) -> str:
+    return idempotency.fingerprint(payload.model_dump_json(by_alias=True).encode())
+
+def replay_response(stored: idempotency.StoredResponse) -> ApiJSONResponse:
+    return ApiJSONResponse(stored.body, status_code=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+class IdempotentOrderResponse:
+    """create_order before_commit hook: stores the response in the order's transaction."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.body = b""
+
+    def __call__(self, db: Session, order: Order) -> None:
+        self.body = _placed_body(order)
+        idempotency.complete(db, self.key, status.HTTP_201_CREATED, self.body)
+
 @router.post("/api/orders", response_model=ApiResponse[OrderOut], status_code=status.HTTP_201_CREATED)
-def place_order(payload: OrderCreate, db: Session = Depends(get_db)):
-    order = create_order(db, name=payload.name, address=payload.address, phone_number=payload.phone_number, items=payload.ordered_items)
-    
-    # Send Telegram Notification
+@query_budget(13)
+def place_order(
+    payload: OrderCreate,
+    db: Session = Depends(get_db),
+    # Retries with the same key get the first response back instead of a second order
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+):
+    fields = dict(name=payload.name, address=payload.address, phone_number=payload.phone_number, items=payload.ordered_items)
+    if idempotency_key is None:
+        order = create_order(db, **fields)
+        return success_json("Order placed successfully", order_out(order), OrderOut, status.HTTP_201_CREATED)
+
+    stored = idempotency.acquire(db, idempotency_key, order_fingerprint(payload))
+    if stored is not None:
+        return replay_response(stored)
+    recorder = IdempotentOrderResponse(idempotency_key)
     try:
-        from app.utils.telegram_notifier import send_telegram_message
-        message = f"""
-📦 <b>New Order Received!</b>
-Order ID: {order.id}
-Customer: {order.name}
-Phone: {order.phone_number}
-Address: {order.address}
-Total: ₹{order.total_price}
-Status: {order.status}
-"""
-        send_telegram_message(message)
-    except Exception as e:
-        print(f"Failed to send Telegram notification: {e}")
-    
-    data = OrderOut.model_validate(order)
-    return success_response("Order placed successfully", data)
-
-@router.get("/api/orders", response_model=ApiResponse[List[OrderOut]])
-def list_orders(db: Session = Depends(get_db)):
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    return success_response("Orders fetched successfully", [OrderOut.model_validate(o) for o in orders])
+        create_order(db, **fields, before_commit=recorder)
+    except BaseException:
+        idempotency.release(db, idempotency_key)
+        raise
+    return ApiJSONResponse(recorder.body, status_code=status.HTTP_201_CREATED)
+
+@router.get("/api/orders", response_model=ApiResponse[OrderPageOut])
+@query_budget(1)
+def list_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, alias="createdTo"),
+    db: Session = Depends(get_replica_db),
+):
+    stmt = order_page_statement(order_filters(status_filter, created_from, created_to), cursor, limit)
+    page = build_order_page(db.scalars(stmt).all(), limit)
+    return success_json("Orders fetched successfully", page, OrderPageOut)
+
+def archived_export_filters(
+    include_archived: bool,
+    status_filter: Optional[OrderStatus],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+) -> Optional[list]:
+    # The archive holds Delivered orders only; any other status filter skips it
+    if not include_archived or status_filter not in (None, OrderStatus.Delivered):
+        return None
+    return order_filters(status_filter, created_from, created_to, model=ArchivedOrder)
+
+@router.get("/api/orders/export", response_class=StreamingResponse)
+def export_orders(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, alias="createdTo"),
+    include_archived: bool = Query(True, alias="includeArchived"),
+):
+    # Orders together with their ordered items, streamed from a server-side
+    # cursor so memory stays flat regardless of the date range.
+    formatter = FORMATTERS[format]()
+    filters = order_filters(status_filter, created_from, created_to)
+    archived = archived_export_filters(include_archived, status_filter, created_from, created_to)
+    return StreamingResponse(
+        iter_export(formatter, filters, archived),
+        media_type=formatter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders-export.{formatter.extension}"'},
+    )
+
+def order_event_stream(last_event_id: Optional[str]) -> StreamingResponse:
+    if not order_events.accepts_subscriber():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many order event subscribers")
+    return StreamingResponse(
+        order_events.stream(last_event_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back in its buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/api/orders/events", response_class=StreamingResponse)
+async def order_events_feed(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID", max_length=64)):
+    # Server-Sent Events: order.created, order.status_changed, order.deleted.
+    # Async even in sync mode, so an idle subscriber holds no threadpool thread.
+    return order_event_stream(last_event_id)
 
 @router.get("/api/orders/{order_id}", response_model=ApiResponse[OrderDetailOut])
-def get_order(order_id: str, db: Session = Depends(get_db)):
-    order = db.query(Order).filter(Order.id == order_id).first()
+@query_budget(3)
+def get_order(order_id: str, db: Session = Depends(get_replica_db)):
+    order = db.scalars(order_detail_statement(order_id)).first()
+    if not order:
+        # Old Delivered orders live in the archive tables; same shape, read-only
+        order = db.scalars(archived_order_detail_statement(order_id)).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    return success_json("Order fetched successfully", order_detail(order), OrderDetailOut)
 
+def order_detail(order: Union[Order, ArchivedOrder]) -> OrderDetailOut:
+    """
+    Build the detail from an order loaded with order_detail_statement or
+    archived_order_detail_statement (items and products in memory).
+    """
     items = [
-        OrderDetailItem(productId=i.product_id, quantityInKg=i.quantity_in_kg)
+        OrderDetailItem.model_construct(
+            product_id=i.product_id,
+            quantity_in_kg=i.quantity_in_kg,
+            product_name=i.product.name,
+            image=i.product.image,
+            # Orders placed before prices were recorded fall back to today's price
+            unit_price_per_kg=i.unit_price_per_kg if i.unit_price_per_kg is not None else i.product.price_per_kg,
+        )
         for i in order.items
     ]
-    detail = OrderDetailOut(
+    return OrderDetailOut.model_construct(
         id=order.id,
         name=order.name,
         address=order.address,
-        phoneNumber=order.phone_number,
-        totalPrice=order.total_price,
+        phone_number=order.phone_number,
+        total_price=order.total_price,
         status=order.status,
-        createdAt=order.created_at,
-        orderedItems=items,  # uses alias; pydantic will map
+        created_at=order.created_at,
+        items=items,
     )
-    return success_response("Order fetched successfully", detail)
 
 @router.put("/api/orders/{order_id}", response_model=ApiResponse[OrderOut])
+@query_budget(4)
 def update_order_status(order_id: str, payload: OrderStatusUpdate, db: Session = Depends(get_db)):
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    order.status = payload.status
-    db.add(order)
-    db.commit()
-    db.refresh(order)
-    return success_response("Order updated successfully", OrderOut.model_validate(order))
+    out = change_order_status(db, order, payload.status)
+    return success_json("Order updated successfully", out, OrderOut)
 
 @router.delete("/api/orders/{order_id}", response_model=ApiResponse[dict])
+@query_budget(10)
 def delete_order(order_id: str, db: Session = Depends(get_db)):
     order = db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    db.delete(order)
-    db.commit()
+
+    remove_order(db, order)
     return success_response("Order deleted successfully", {"id": order_id})
 
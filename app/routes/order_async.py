@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.deps import get_async_db, get_async_replica_db
+from app.model.order import Order, OrderStatus
+from app.schemas.order import OrderCreate, OrderOut, OrderPageOut, OrderStatusUpdate, OrderDetailOut
+from app.schemas.common import ApiResponse
+from app.utils.response import ApiJSONResponse, success_json, success_response
+from app.utils.query_budget import query_budget
+from app.services import idempotency
+from app.services.order_service import (
+    build_order_page,
+    change_order_status,
+    create_order_async,
+    order_detail_statement,
+    order_filters,
+    order_out,
+    order_page_statement,
+    remove_order,
+)
+from app.services.export_service import FORMATTERS, aiter_export
+from app.services.order_archive import archived_order_detail_statement
+from app.routes.order import (
+    IdempotentOrderResponse,
+    archived_export_filters,
+    order_detail,
+    order_event_stream,
+    order_fingerprint,
+    replay_response,
+)
+
+# async def counterparts of app.routes.order, mounted instead of it when DB_MODE=async
+router = APIRouter(tags=["Orders"])
+
+@router.post("/api/orders", response_model=ApiResponse[OrderOut], status_code=status.HTTP_201_CREATED)
+@query_budget(13)
+async def place_order(
+    payload: OrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+):
+    fields = dict(name=payload.name, address=payload.address, phone_number=payload.phone_number, items=payload.ordered_items)
+    if idempotency_key is None:
+        order = await create_order_async(db, **fields)
+        return success_json("Order placed successfully", order_out(order), OrderOut, status.HTTP_201_CREATED)
+
+    stored = await idempotency.acquire_async(db, idempotency_key, order_fingerprint(payload))
+    if stored is not None:
+        return replay_response(stored)
+    recorder = IdempotentOrderResponse(idempotency_key)
+    try:
+        await create_order_async(db, **fields, before_commit=recorder)
+    except BaseException:
+        await db.run_sync(idempotency.release, idempotency_key)
+        raise
+    return ApiJSONResponse(recorder.body, status_code=status.HTTP_201_CREATED)
+
+@router.get("/api/orders", response_model=ApiResponse[OrderPageOut])
+@query_budget(1)
+async def list_orders(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, alias="createdTo"),
+    db: AsyncSession = Depends(get_async_replica_db),
+):
+    stmt = order_page_statement(order_filters(status_filter, created_from, created_to), cursor, limit)
+    page = build_order_page((await db.scalars(stmt)).all(), limit)
+    return success_json("Orders fetched successfully", page, OrderPageOut)
+
+@router.get("/api/orders/export", response_class=StreamingResponse)
+async def export_orders(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, alias="createdTo"),
+    include_archived: bool = Query(True, alias="includeArchived"),
+):
+    formatter = FORMATTERS[format]()
+    filters = order_filters(status_filter, created_from, created_to)
+    archived = archived_export_filters(include_archived, status_filter, created_from, created_to)
+    return StreamingResponse(
+        aiter_export(formatter, filters, archived),
+        media_type=formatter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders-export.{formatter.extension}"'},
+    )
+
+@router.get("/api/orders/events", response_class=StreamingResponse)
+async def order_events_feed(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID", max_length=64)):
+    return order_event_stream(last_event_id)
+
+@router.get("/api/orders/{order_id}", response_model=ApiResponse[OrderDetailOut])
+@query_budget(3)
+async def get_order(order_id: str, db: AsyncSession = Depends(get_async_replica_db)):
+    order = (await db.scalars(order_detail_statement(order_id))).first()
+    if not order:
+        order = (await db.scalars(archived_order_detail_statement(order_id))).first()
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    return success_json("Order fetched successfully", order_detail(order), OrderDetailOut)
+
+@router.put("/api/orders/{order_id}", response_model=ApiResponse[OrderOut])
+@query_budget(4)
+async def update_order_status(order_id: str, payload: OrderStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    out = await db.run_sync(change_order_status, order, payload.status)
+    return success_json("Order updated successfully", out, OrderOut)
+
+@router.delete("/api/orders/{order_id}", response_model=ApiResponse[dict])
+@query_budget(10)
+async def delete_order(order_id: str, db: AsyncSession = Depends(get_async_db)):
+    order = await db.get(Order, order_id)
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+
+    # Runs the sync unit of work so the items cascade can load lazily
+    await db.run_sync(remove_order, order)
+    return success_response("Order deleted successfully", {"id": order_id})
@@ -1,21 +1,45 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-import uuid
+import hashlib
+import os
+import tempfile
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.utils.deps import get_db
+from app.utils.deps import get_db, get_read_db
 from app.model.product import Product
-from app.schemas.product import ProductUpdate, ProductOut
+from app.schemas.product import (
+    CatalogProductOut,
+    ProductUpdate,
+    ProductOut,
+    ProductImageVariants,
+    ProductImportSummary,
+)
 from app.schemas.common import ApiResponse
-from app.utils.response import success_response
+from app.utils.response import dump_success, success_json, success_response
+from app.utils.snapshot import snapshot_response
+from app.services.product_import import import_products, read_csv_rows
+from app.services import image_variants
+from app.services.cache_versions import CATALOG, bump
+from app.services.catalog import catalog_cache, catalog_changed
+from app.services.search import (
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    load_product_index,
+    product_index,
+    record_search_changes,
+    sync_product_index,
+)
+from app.utils.uploads import INCOMING_SUBDIR, PRODUCTS_SUBDIR, UPLOAD_ROOT, public_upload_path
+from app.utils.query_budget import query_budget
 
 router = APIRouter(tags=["Products"])
 
-UPLOAD_ROOT = Path("uploads")
-PRODUCTS_SUBDIR = UPLOAD_ROOT / "products"
-PRODUCTS_SUBDIR.mkdir(parents=True, exist_ok=True)
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 ALLOWED_IMAGE_TYPES = {
     "image/jpeg": ".jpg",
@@ -31,18 +55,56 @@ def _save_image(file: UploadFile, subdir: Path = PRODUCTS_SUBDIR) -> str:
             detail="Unsupported image type. Allowed: JPEG, PNG, WEBP",
         )
 
+    too_large = HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Image exceeds {MAX_IMAGE_UPLOAD_BYTES} bytes",
+    )
+    if file.size is not None and file.size > MAX_IMAGE_UPLOAD_BYTES:
+        raise too_large
+
+    # Copy in fixed-size chunks while hashing; the content hash becomes the file
+    # name, so re-uploading the same photo reuses the file already on disk.
     suffix = ALLOWED_IMAGE_TYPES[file.content_type]
-    unique_name = f"{uuid.uuid4().hex}{suffix}"
-    out_path = subdir / unique_name
+    digest = hashlib.sha256()
+    written = 0
+    fd, tmp_name = tempfile.mkstemp(dir=INCOMING_SUBDIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_IMAGE_UPLOAD_BYTES:
+                    raise too_large
+                digest.update(chunk)
+                out.write(chunk)
+        unique_name = f"{digest.hexdigest()}{suffix}"
+        out_path = subdir / unique_name
+        if out_path.exists():
+            os.unlink(tmp_name)
+        else:
+            os.replace(tmp_name, out_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    # Variants are resized in the process pool; the catalog picks them up when done
+    image_variants.schedule(out_path, on_done=catalog_changed)
+    return public_upload_path(out_path)
+
+
+def _image_shared_statement(image: str):
+    # Content-addressed files can back several products; only delete unreferenced ones
+    return select(Product.id).where(Product.image == image).limit(1)
 
-    with out_path.open("wb") as f:
-        f.write(file.file.read())
 
-    # Public path served by StaticFiles in main.py
-    return f"/uploads/{subdir.relative_to(UPLOAD_ROOT)}/{unique_name}"
+def _public_base(request: Request) -> str:
+    return f"{request.url.scheme}://{request.headers.get('host')}"
 
 
 def _resolve_public_image_url(request: Request, image_value: Optional[str]) -> Optional[str]:
+    return _absolute_image_url(_public_base(request), image_value)
+
+
+def _absolute_image_url(base: str, image_value: Optional[str]) -> Optional[str]:
     """
     Convert a stored image field into an absolute public URL.
 
@@ -57,14 +119,14 @@ def _resolve_public_image_url(request: Request, image_value: Optional[str]) -> O
     if image_value.startswith("http://") or image_value.startswith("https://"):
         return image_value
     if image_value.startswith("/uploads/"):
-        base = f"{request.url.scheme}://{request.headers.get('host')}"
         return f"{base}{image_value}"
     return image_value
 
 
-def _delete_local_image_if_owned(image_path: Optional[str]) -> dict:
+def _delete_local_image_if_owned(image_path: Optional[str], shared: bool = False) -> dict:
     """
-    Delete an image file from disk if it resides under our uploads/products directory.
+    Delete an image file from disk if it resides under our uploads/products directory
+    and no other product still references it.
     Returns a status dict indicating outcome instead of raising to the client.
 
     Accepted inputs: public paths like "/uploads/products/<file>". External URLs are ignored.
@@ -72,6 +134,8 @@ def _delete_local_image_if_owned(image_path: Optional[str]) -> dict:
     """
     if not image_path:
         return {"deleted": False, "reason": "no_image_set"}
+    if shared:
+        return {"deleted": False, "reason": "shared_with_other_products"}
     try:
         if not image_path.startswith("/uploads/"):
             return {"deleted": False, "reason": "external_or_unmanaged_path"}
@@ -91,6 +155,7 @@ def _delete_local_image_if_owned(image_path: Optional[str]) -> dict:
 
         if fs_path.exists() and fs_path.is_file():
             fs_path.unlink(missing_ok=True)
+            image_variants.delete_variants(fs_path)
             return {"deleted": True}
         else:
             return {"deleted": False, "reason": "file_not_found"}
@@ -98,16 +163,147 @@ def _delete_local_image_if_owned(image_path: Optional[str]) -> dict:
         return {"deleted": False, "reason": "filesystem_error"}
 
 
-@router.get("/api/products", response_model=ApiResponse[List[ProductOut]])
-def list_products(request: Request, db: Session = Depends(get_db)):
-    products = db.query(Product).all()
-    out: List[ProductOut] = []
-    for p in products:
-        item = ProductOut.model_validate(p)
+def _choose_image_source(
+    image_file: Optional[UploadFile], image: Optional[str]
+) -> Tuple[Optional[UploadFile], Optional[str]]:
+    # Auto-handle mutual exclusivity
+    if image_file and image:
+        # Prefer the uploaded file
+        image = None
+    elif image and not image_file:
+        image_file = None
+
+    if not image_file and not image:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either an image file upload or an image URL/path",
+        )
+    return image_file, image
+
+
+def _apply_product_update(product: Product, payload: ProductUpdate) -> None:
+    if (
+        payload.name is None
+        and payload.image is None
+        and payload.price_per_kg is None
+        and payload.in_stock is None
+        and payload.available_kg is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one of name, price_per_kg, image, in_stock, available_kg must be provided",
+        )
+
+    if payload.name is not None:
+        product.name = payload.name
+    if payload.image is not None:
+        product.image = payload.image
+    if payload.price_per_kg is not None:
+        product.price_per_kg = payload.price_per_kg
+    if payload.in_stock is not None:
+        product.in_stock = payload.in_stock
+    if payload.available_kg is not None:
+        # Absolute restock; reservations made meanwhile are overwritten by design
+        product.available_kg = payload.available_kg
+
+
+def _present_product(request: Request, product: Product) -> ProductOut:
+    return _product_out(_public_base(request), product)
+
+
+def _catalog_fields(base: str, product) -> dict:
+    images = None
+    variants = image_variants.variant_paths(product.image)
+    if variants:
+        images = ProductImageVariants.model_construct(**{k: _absolute_image_url(base, v) for k, v in variants.items()})
+    return dict(
+        id=product.id,
+        name=product.name,
         # Resolve image to absolute URL for clients
-        item.image = _resolve_public_image_url(request, item.image)
-        out.append(item)
-    return success_response("Products fetched successfully", out)
+        image=_absolute_image_url(base, product.image),
+        images=images,
+        price_per_kg=product.price_per_kg,
+        in_stock=product.in_stock,
+        created_at=product.created_at,
+        updated_at=product.updated_at,
+    )
+
+
+def _product_out(base: str, product) -> ProductOut:
+    """
+    Build the response model from a Product or a row of PRODUCT_COLUMNS.
+    Values come straight from the database, so validation is skipped.
+    """
+    return ProductOut.model_construct(**_catalog_fields(base, product), available_kg=product.available_kg)
+
+
+# Plain rows are enough for the catalog; skips identity-map and ORM instance setup.
+# Stock levels are left out: they change with every order.
+CATALOG_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.image,
+    Product.price_per_kg,
+    Product.in_stock,
+    Product.created_at,
+    Product.updated_at,
+)
+PRODUCT_COLUMNS = (*CATALOG_COLUMNS, Product.available_kg)
+
+
+def _build_catalog_body(db: Session, base: str) -> bytes:
+    rows = db.execute(select(*CATALOG_COLUMNS))
+    out = [CatalogProductOut.model_construct(**_catalog_fields(base, row)) for row in rows]
+    return dump_success("Products fetched successfully", out, List[CatalogProductOut])
+
+
+def stock_statement():
+    return select(Product.id, Product.available_kg).where(Product.available_kg.is_not(None))
+
+
+@router.get("/api/products", response_model=ApiResponse[List[CatalogProductOut]])
+@query_budget(1)
+def list_products(request: Request, db: Session = Depends(get_read_db)):
+    # Served from the catalog snapshot; the DB is only read after a product write.
+    # Rebuilt from the primary (never the replica), or a lagging replica would pin stale data.
+    base = _public_base(request)
+    snapshot = catalog_cache.get(base, lambda: _build_catalog_body(db, base))
+    return snapshot_response(request, snapshot)
+
+
+@router.get("/api/products/stock", response_model=ApiResponse[Dict[str, float]])
+@query_budget(1)
+def list_stock(db: Session = Depends(get_read_db)):
+    # available_kg of every stock-tracked product, read fresh on each request:
+    # orders change it all the time, so it is kept out of the catalog snapshot
+    stock = dict(db.execute(stock_statement()).all())
+    return success_json("Stock fetched successfully", stock, Dict[str, float])
+
+
+def _search_results(db: Session, base: str, product_ids: List[str]) -> List[ProductOut]:
+    if not product_ids:
+        return []
+    rows = {row.id: row for row in db.execute(select(*PRODUCT_COLUMNS).where(Product.id.in_(product_ids)))}
+    # Keep the index's ranking; a product deleted since it was indexed is skipped
+    return [_product_out(base, rows[product_id]) for product_id in product_ids if product_id in rows]
+
+
+@router.get("/api/products/search", response_model=ApiResponse[List[ProductOut]])
+@query_budget(2)
+def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    in_stock: Optional[bool] = Query(None, alias="inStock"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    db: Session = Depends(get_read_db),
+):
+    # The in-memory index picks and ranks the ids; their rows are read by primary key.
+    # The index is built at startup; the extra statement only runs if that failed.
+    if not product_index.ready:
+        load_product_index(db)
+    product_ids = product_index.search(q, limit, in_stock)
+    out = _search_results(db, _public_base(request), product_ids)
+    return success_json("Products fetched successfully", out, List[ProductOut])
 
 
 @router.post("/api/products", response_model=ApiResponse[ProductOut], status_code=status.HTTP_201_CREATED)
@@ -116,22 +312,12 @@ def create_product(
     name: str = Form(...),
     price_per_kg: float = Form(..., alias="price_per_kg"),
     in_stock: bool = Form(True, alias="inStock"),
+    available_kg: Optional[float] = Form(None, ge=0, alias="available_kg"),
     image_file: Optional[UploadFile] = File(None),
     image: Optional[str] = Form(None),  # URL or relative path
     db: Session = Depends(get_db),
 ):
-    # Auto-handle mutual exclusivity
-    if image_file and image:
-        # Prefer the uploaded file
-        image = None
-    elif image and not image_file:
-        image_file = None
-
-    if not image_file and not image:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Provide either an image file upload or an image URL/path",
-        )
+    image_file, image = _choose_image_source(image_file, image)
 
     stored_image: Optional[str] = image
     if image_file:
@@ -142,16 +328,53 @@ def create_product(
         image=stored_image,
         price_per_kg=price_per_kg,
         in_stock=in_stock,
+        available_kg=available_kg,
     )
     db.add(product)
+    db.flush()  # get product.id
+    version = record_search_changes(db, [product.id], CATALOG)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
-    created = ProductOut.model_validate(product)
-    created.image = _resolve_public_image_url(request, created.image)
-    return success_response("Product created successfully", created)
+    product_index.upsert(product.id, product.name, product.in_stock, version)
+    return success_json(
+        "Product created successfully", _present_product(request, product), ProductOut, status.HTTP_201_CREATED
+    )
+
+
+async def _read_import_payload(request: Request) -> list:
+    """Rows from either a JSON array body or a multipart CSV upload in field "file"."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload the CSV in a 'file' field")
+        return read_csv_rows(await upload.read())
+    if content_type.startswith("text/csv"):
+        return read_csv_rows(await request.body())
+    try:
+        rows = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array of products")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array of products")
+    return rows
+
+
+@router.post("/api/products/bulk", response_model=ApiResponse[ProductImportSummary])
+async def bulk_import_products(request: Request, db: Session = Depends(get_db)):
+    # Handler is async only to read the body; the import runs on the threadpool
+    raw_rows = await _read_import_payload(request)
+    summary = await run_in_threadpool(import_products, db, raw_rows)
+    catalog_cache.invalidate()
+    # Applies the import's logged products to this worker's index
+    await run_in_threadpool(sync_product_index)
+    return success_json("Products imported successfully", summary, ProductImportSummary)
 
 
 @router.put("/api/products/{product_id}", response_model=ApiResponse[ProductOut])
+@query_budget(5)
 def update_product(
     product_id: str,
     request: Request,
@@ -162,32 +385,15 @@ def update_product(
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    if (
-        payload.name is None
-        and payload.image is None
-        and payload.price_per_kg is None
-        and payload.in_stock is None
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="At least one of name, price_per_kg, image, in_stock must be provided",
-        )
-
-    if payload.name is not None:
-        product.name = payload.name
-    if payload.image is not None:
-        product.image = payload.image
-    if payload.price_per_kg is not None:
-        product.price_per_kg = payload.price_per_kg
-    if payload.in_stock is not None:
-        product.in_stock = payload.in_stock
+    _apply_product_update(product, payload)
 
     db.add(product)
+    version = record_search_changes(db, [product.id], CATALOG)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
-    updated = ProductOut.model_validate(product)
-    updated.image = _resolve_public_image_url(request, updated.image)
-    return success_response("Product updated successfully", updated)
+    product_index.upsert(product.id, product.name, product.in_stock, version)
+    return success_json("Product updated successfully", _present_product(request, product), ProductOut)
 
 
 @router.put("/api/products/{product_id}/image", response_model=ApiResponse[ProductOut])
@@ -203,20 +409,28 @@ def update_product_image(
 
     product.image = _save_image(image_file)
     db.add(product)
+    bump(db, CATALOG)
     db.commit()
+    catalog_cache.invalidate()
     db.refresh(product)
-    updated = ProductOut.model_validate(product)
-    updated.image = _resolve_public_image_url(request, updated.image)
-    return success_response("Product image updated successfully", updated)
+    return success_json("Product image updated successfully", _present_product(request, product), ProductOut)
 
 
 @router.delete("/api/products/{product_id}", response_model=ApiResponse[dict])
+@query_budget(5)
 def delete_product(product_id: str, db: Session = Depends(get_db)):
     product = db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    # Best-effort remove associated local image file if managed by us
-    image_status = _delete_local_image_if_owned(product.image)
+    image = product.image
     db.delete(product)
+    version = record_search_changes(db, [product_id], CATALOG)
     db.commit()
+    catalog_cache.invalidate()
+    product_index.remove(product_id, version)
+    # Best-effort remove associated local image file if managed by us. Only
+    # after the commit: a failed delete keeps its file, and the check sees
+    # every product committed since, including ones that reuse the file.
+    shared = image is not None and db.scalar(_image_shared_statement(image)) is not None
+    image_status = _delete_local_image_if_owned(image, shared)
     return success_response("Product deleted successfully", {"id": product_id, "image_delete_status": image_status})
\ No newline at end of file
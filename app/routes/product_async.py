@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.deps import get_async_db, get_async_read_db
+from app.model.product import Product
+from app.schemas.product import CatalogProductOut, ProductUpdate, ProductOut, ProductImportSummary
+from app.services.product_import import import_products
+from app.schemas.common import ApiResponse
+from app.utils.response import success_json, success_response
+from app.utils.snapshot import snapshot_response
+from app.utils.query_budget import query_budget
+from app.routes.product import (
+    _apply_product_update,
+    _build_catalog_body,
+    _choose_image_source,
+    _delete_local_image_if_owned,
+    _image_shared_statement,
+    _present_product,
+    _public_base,
+    _read_import_payload,
+    _save_image,
+    _search_results,
+    stock_statement,
+)
+from app.services.cache_versions import CATALOG, bump
+from app.services.catalog import catalog_cache
+from app.services.search import (
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    load_product_index,
+    product_index,
+    record_search_changes,
+    sync_product_index,
+)
+
+# async def counterparts of app.routes.product, mounted instead of it when DB_MODE=async.
+# File writes still go through the threadpool; DB work stays on the event loop.
+router = APIRouter(tags=["Products"])
+
+
+@router.get("/api/products", response_model=ApiResponse[List[CatalogProductOut]])
+@query_budget(1)
+async def list_products(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    base = _public_base(request)
+    snapshot = await catalog_cache.aget(base, lambda: db.run_sync(_build_catalog_body, base))
+    return snapshot_response(request, snapshot)
+
+
+@router.get("/api/products/stock", response_model=ApiResponse[Dict[str, float]])
+@query_budget(1)
+async def list_stock(db: AsyncSession = Depends(get_async_read_db)):
+    stock = dict((await db.execute(stock_statement())).all())
+    return success_json("Stock fetched successfully", stock, Dict[str, float])
+
+
+@router.get("/api/products/search", response_model=ApiResponse[List[ProductOut]])
+@query_budget(2)
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    in_stock: Optional[bool] = Query(None, alias="inStock"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if not product_index.ready:
+        await db.run_sync(load_product_index)
+    product_ids = product_index.search(q, limit, in_stock)
+    out = await db.run_sync(_search_results, _public_base(request), product_ids)
+    return success_json("Products fetched successfully", out, List[ProductOut])
+
+
+@router.post("/api/products", response_model=ApiResponse[ProductOut], status_code=status.HTTP_201_CREATED)
+async def create_product(
+    request: Request,
+    name: str = Form(...),
+    price_per_kg: float = Form(..., alias="price_per_kg"),
+    in_stock: bool = Form(True, alias="inStock"),
+    available_kg: Optional[float] = Form(None, ge=0, alias="available_kg"),
+    image_file: Optional[UploadFile] = File(None),
+    image: Optional[str] = Form(None),  # URL or relative path
+    db: AsyncSession = Depends(get_async_db),
+):
+    image_file, image = _choose_image_source(image_file, image)
+
+    stored_image: Optional[str] = image
+    if image_file:
+        stored_image = await run_in_threadpool(_save_image, image_file)
+
+    product = Product(
+        name=name,
+        image=stored_image,
+        price_per_kg=price_per_kg,
+        in_stock=in_stock,
+        available_kg=available_kg,
+    )
+    db.add(product)
+    await db.flush()  # get product.id
+    version = await db.run_sync(record_search_changes, [product.id], CATALOG)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.refresh(product)
+    product_index.upsert(product.id, product.name, product.in_stock, version)
+    return success_json(
+        "Product created successfully", _present_product(request, product), ProductOut, status.HTTP_201_CREATED
+    )
+
+
+@router.post("/api/products/bulk", response_model=ApiResponse[ProductImportSummary])
+async def bulk_import_products(request: Request, db: AsyncSession = Depends(get_async_db)):
+    raw_rows = await _read_import_payload(request)
+    summary = await db.run_sync(import_products, raw_rows)
+    catalog_cache.invalidate()
+    # Applies the import's logged products to this worker's index
+    await run_in_threadpool(sync_product_index)
+    return success_json("Products imported successfully", summary, ProductImportSummary)
+
+
+@router.put("/api/products/{product_id}", response_model=ApiResponse[ProductOut])
+@query_budget(5)
+async def update_product(
+    product_id: str,
+    request: Request,
+    payload: ProductUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    _apply_product_update(product, payload)
+
+    db.add(product)
+    version = await db.run_sync(record_search_changes, [product.id], CATALOG)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.refresh(product)
+    product_index.upsert(product.id, product.name, product.in_stock, version)
+    return success_json("Product updated successfully", _present_product(request, product), ProductOut)
+
+
+@router.put("/api/products/{product_id}/image", response_model=ApiResponse[ProductOut])
+async def update_product_image(
+    product_id: str,
+    request: Request,
+    image_file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    product.image = await run_in_threadpool(_save_image, image_file)
+    db.add(product)
+    await db.run_sync(bump, CATALOG)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.refresh(product)
+    return success_json("Product image updated successfully", _present_product(request, product), ProductOut)
+
+
+@router.delete("/api/products/{product_id}", response_model=ApiResponse[dict])
+@query_budget(5)
+async def delete_product(product_id: str, db: AsyncSession = Depends(get_async_db)):
+    product = await db.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    image = product.image
+    await db.delete(product)
+    version = await db.run_sync(record_search_changes, [product_id], CATALOG)
+    await db.commit()
+    catalog_cache.invalidate()
+    product_index.remove(product_id, version)
+    # After the commit, as in app.routes.product.delete_product
+    shared = image is not None and await db.scalar(_image_shared_statement(image)) is not None
+    image_status = await run_in_threadpool(_delete_local_image_if_owned, image, shared)
+    return success_response("Product deleted successfully", {"id": product_id, "image_delete_status": image_status})
@@ -0,0 +1,28 @@
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from app.model.order import OrderStatus
+
+class DailySalesOut(BaseModel):
+    day: date
+    order_count: int = Field(..., alias="orderCount")
+    revenue: float
+    kg_sold: float = Field(..., alias="kgSold")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class StatusSalesOut(BaseModel):
+    status: OrderStatus
+    order_count: int = Field(..., alias="orderCount")
+    revenue: float
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class ProductSalesOut(BaseModel):
+    product_id: str = Field(..., alias="productId")
+    # None once the product has been deleted
+    name: Optional[str] = None
+    kg_sold: float = Field(..., alias="kgSold")
+    order_lines: int = Field(..., alias="orderLines")
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -1,12 +1,11 @@
 from typing import Generic, Optional, TypeVar
 from pydantic import BaseModel, ConfigDict
-from pydantic.generics import GenericModel
 
 T = TypeVar("T")
 
-class ApiResponse(GenericModel, Generic[T]):
+class ApiResponse(BaseModel, Generic[T]):
     success: bool
     message: str
     data: Optional[T] = None
 
-    model_config = ConfigDict(populate_by_name=True)
\ No newline at end of file
+    model_config = ConfigDict(populate_by_name=True)
@@ -36,9 +36,19 @@ class OrderOut(BaseModel):
 
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
+class OrderPageOut(BaseModel):
+    items: List[OrderOut]
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
+
+    model_config = ConfigDict(populate_by_name=True)
+
 class OrderDetailItem(BaseModel):
     product_id: str = Field(..., alias="productId")
     quantity_in_kg: float = Field(..., alias="quantityInKg")
+    product_name: Optional[str] = Field(None, alias="productName")
+    image: Optional[str] = None
+    unit_price_per_kg: Optional[float] = Field(None, alias="unitPricePerKg")
 
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class ProductBase(BaseModel):
     name: str = Field(..., min_length=2)
@@ -8,6 +8,7 @@ class ProductBase(BaseModel):
     image: Optional[str] = None
     price_per_kg: float = Field(..., gt=0, alias="price_per_kg")
     in_stock: bool = Field(default=True, alias="in_stock")
+    available_kg: Optional[float] = Field(None, ge=0, alias="available_kg")
 
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
@@ -21,23 +22,76 @@ class ProductUpdate(BaseModel):
     image: Optional[str] = None
     price_per_kg: Optional[float] = Field(None, gt=0, alias="price_per_kg")
     in_stock: Optional[bool] = Field(None, alias="in_stock")
+    available_kg: Optional[float] = Field(None, ge=0, alias="available_kg")
 
     model_config = ConfigDict(populate_by_name=True)
 
     @classmethod
     def validate_non_empty(cls, values):
-        if not any(values.get(k) is not None for k in ["name", "image", "price_per_kg", "in_stock"]):
-            raise ValueError("At least one of name, price_per_kg, image, in_stock must be provided")
+        if not any(values.get(k) is not None for k in ["name", "image", "price_per_kg", "in_stock", "available_kg"]):
+            raise ValueError("At least one of name, price_per_kg, image, in_stock, available_kg must be provided")
         return values
 
 
-class ProductOut(BaseModel):
+class ProductImageVariants(BaseModel):
+    # Resized copies of an uploaded image; *_webp fields are the WebP encodings
+    thumbnail: Optional[str] = None
+    medium: Optional[str] = None
+    full: Optional[str] = None
+    thumbnail_webp: Optional[str] = None
+    medium_webp: Optional[str] = None
+    full_webp: Optional[str] = None
+
+
+class CatalogProductOut(BaseModel):
+    # GET /api/products: no stock level, so orders don't invalidate the cached
+    # catalog; clients read stock from GET /api/products/stock
     id: str
     name: str
     image: Optional[str] = None
+    # Only set for uploaded images once their variants have been generated
+    images: Optional[ProductImageVariants] = None
     price_per_kg: float = Field(..., alias="price_per_kg")
     in_stock: bool = Field(..., alias="in_stock")
     created_at: datetime = Field(..., alias="created_at")
     updated_at: datetime = Field(..., alias="updated_at")
 
-    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
+
+
+class ProductOut(CatalogProductOut):
+    # None when the product is not stock-tracked
+    available_kg: Optional[float] = Field(None, alias="available_kg")
+
+
+class ProductImportRow(BaseModel):
+    # Rows are matched by id when given, otherwise by exact name
+    id: Optional[str] = None
+    name: Optional[str] = Field(None, min_length=2)
+    image: Optional[str] = None
+    price_per_kg: Optional[float] = Field(None, gt=0, alias="price_per_kg")
+    in_stock: Optional[bool] = Field(None, alias="in_stock")
+    available_kg: Optional[float] = Field(None, ge=0, alias="available_kg")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def id_or_name_required(self):
+        if not self.id and not self.name:
+            raise ValueError("Each row needs an id or a name")
+        return self
+
+
+class ProductImportResult(BaseModel):
+    row: int
+    id: Optional[str] = None
+    name: Optional[str] = None
+    action: Literal["created", "updated", "error"]
+    error: Optional[str] = None
+
+
+class ProductImportSummary(BaseModel):
+    created: int = 0
+    updated: int = 0
+    errors: int = 0
+    results: List[ProductImportResult] = []
@@ -0,0 +1,35 @@
+"""
+Move old Delivered orders and their items into the archive tables.
+
+    python -m app.scripts.archive_orders [--older-than-days 90] [--batch-size 500] [--max-batches N]
+
+Meant to run periodically (e.g. a nightly cron job). Each batch commits on its
+own, so the command can be interrupted and re-run safely. Archived orders are
+still returned by GET /api/orders/{id} and the export.
+"""
+import argparse
+import time
+
+from app.db.session import SessionLocal
+from app.services.order_archive import ORDER_ARCHIVE_AFTER_DAYS, ORDER_ARCHIVE_BATCH_SIZE, archive_orders
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--older-than-days", type=int, default=ORDER_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ORDER_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        moved = archive_orders(db, args.older_than_days, args.batch_size, args.max_batches)
+    finally:
+        db.close()
+    print(f"Archived {moved} orders in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
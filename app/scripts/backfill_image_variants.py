@@ -0,0 +1,57 @@
+"""
+Generate responsive variants for product images uploaded before variants existed.
+
+    python -m app.scripts.backfill_image_variants [--workers N]
+
+Already generated files are skipped, so the command can be re-run safely.
+"""
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.model.product import Product
+from app.services.image_variants import IMAGE_VARIANT_WORKERS, generate_variants, pillow_available
+from app.utils.uploads import PRODUCTS_SUBDIR, ensure_upload_dirs, local_upload_path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=IMAGE_VARIANT_WORKERS)
+    args = parser.parse_args()
+
+    if not pillow_available():
+        print("Pillow is not installed")
+        return 1
+    ensure_upload_dirs()
+
+    db = SessionLocal()
+    try:
+        images = db.scalars(select(Product.image).where(Product.image.like("/uploads/%")).distinct()).all()
+    finally:
+        db.close()
+
+    sources = []
+    for image in images:
+        path = local_upload_path(image)
+        if path is not None and path.parent == PRODUCTS_SUBDIR and path.is_file():
+            sources.append(str(path.resolve()))
+
+    generated = failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(generate_variants, source): source for source in sources}
+        for future in as_completed(futures):
+            try:
+                generated += len(future.result())
+            except Exception as exc:
+                failed += 1
+                print(f"Failed: {futures[future]}: {exc}")
+
+    print(f"Images: {len(sources)}, variant files written: {generated}, failures: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+"""
+Recompute the sales rollup tables from the orders and their items, archived ones included.
+
+    python -m app.scripts.rebuild_sales_rollups
+
+Needed once after upgrading, since orders placed earlier were never counted,
+and whenever the rollups are suspected to have drifted. Runs in one transaction.
+The rollup tables come from the migrations: run `alembic upgrade head` first.
+"""
+import argparse
+
+from sqlalchemy import inspect
+
+from app.db.session import SessionLocal, engine
+from app.services.analytics_service import rebuild_rollups
+from app.model.sales_rollup import DailyProductSales, DailySales, DailyStatusSales
+
+
+def main() -> int:
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    existing = set(inspect(engine).get_table_names())
+    missing = [m.__tablename__ for m in (DailySales, DailyStatusSales, DailyProductSales) if m.__tablename__ not in existing]
+    if missing:
+        print(f"Missing tables: {', '.join(missing)}; run `alembic upgrade head` first")
+        return 1
+    db = SessionLocal()
+    try:
+        counts = rebuild_rollups(db)
+    finally:
+        db.close()
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select, text, union_all, update
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.model.order import Order, OrderStatus
+from app.model.order_archive import ArchivedOrder, ArchivedOrderedItem
+from app.model.ordered_item import OrderedItem
+from app.model.product import Product
+from app.model.sales_rollup import DailyProductSales, DailySales, DailyStatusSales
+from app.schemas.analytics import DailySalesOut, ProductSalesOut, StatusSalesOut
+
+# Rollups are written with relative upserts (col = col + delta), so concurrent
+# orders for the same day never read-modify-write the same row in Python.
+
+
+def _increment(db: Session, model, keys: Tuple[str, ...], rows: List[dict]) -> None:
+    """Add each row's non-key values onto the rollup row with the same keys, creating it if needed."""
+    if not rows:
+        return
+    deltas = [c for c in rows[0] if c not in keys]
+    table = model.__table__
+    stmt = dialect_insert(db, model)
+    if stmt is not None:
+        stmt = stmt.values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys), set_={c: table.c[c] + stmt.excluded[c] for c in deltas}
+        )
+        db.execute(stmt)
+        return
+    # No native upsert: try the relative UPDATE first, INSERT when nothing matched
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(*(table.c[k] == row[k] for k in keys))
+            .values({c: table.c[c] + row[c] for c in deltas})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+
+def _order_lines(items: Iterable[OrderedItem]) -> Dict[str, Tuple[float, int]]:
+    # One entry per product: a multi-row upsert may not touch the same row twice
+    lines: Dict[str, list] = defaultdict(lambda: [0.0, 0])
+    for item in items:
+        lines[item.product_id][0] += item.quantity_in_kg
+        lines[item.product_id][1] += 1
+    return {product_id: (kg, count) for product_id, (kg, count) in lines.items()}
+
+
+def _record(db: Session, order: Order, items: Iterable[OrderedItem], sign: int) -> None:
+    day = order.created_at.date()
+    lines = _order_lines(items)
+    _increment(
+        db,
+        DailySales,
+        ("day",),
+        [
+            {
+                "day": day,
+                "order_count": sign,
+                "revenue": sign * order.total_price,
+                "kg_sold": sign * sum(kg for kg, _ in lines.values()),
+            }
+        ],
+    )
+    _increment(
+        db,
+        DailyStatusSales,
+        ("day", "status"),
+        [{"day": day, "status": order.status, "order_count": sign, "revenue": sign * order.total_price}],
+    )
+    _increment(
+        db,
+        DailyProductSales,
+        ("day", "product_id"),
+        [
+            {"day": day, "product_id": product_id, "kg_sold": sign * kg, "order_lines": sign * count}
+            for product_id, (kg, count) in sorted(lines.items())
+        ],
+    )
+
+
+def record_order_created(db: Session, order: Order, items: Iterable[OrderedItem]) -> None:
+    """Call after the order is flushed (created_at set) and before commit."""
+    _record(db, order, items, 1)
+
+
+def record_order_removed(db: Session, order: Order) -> None:
+    """Call in the transaction that deletes the order; `order` still holds its status and items."""
+    _record(db, order, order.items, -1)
+
+
+def record_status_change(db: Session, order: Order, old_status: OrderStatus) -> None:
+    if old_status == order.status:
+        return
+    day = order.created_at.date()
+    _increment(
+        db,
+        DailyStatusSales,
+        ("day", "status"),
+        [
+            {"day": day, "status": old_status, "order_count": -1, "revenue": -order.total_price},
+            {"day": day, "status": order.status, "order_count": 1, "revenue": order.total_price},
+        ],
+    )
+
+
+def _day_of(db: Session, column):
+    # SQLite stores DATETIME as text and CAST(... AS DATE) would keep only the year
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _all_orders():
+    # Archived orders are still sales: the rollups count them like live ones
+    columns = lambda m: select(m.id, m.total_price, m.status, m.created_at)
+    return union_all(columns(Order), columns(ArchivedOrder)).subquery("all_orders")
+
+
+def _all_items():
+    columns = lambda m: select(m.id, m.order_id, m.product_id, m.quantity_in_kg)
+    return union_all(columns(OrderedItem), columns(ArchivedOrderedItem)).subquery("all_items")
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """
+    Recompute every rollup from the orders and their items, live and
+    archived, in one transaction. On Postgres the source tables are locked
+    against writes meanwhile, so no order change (or archival batch) can
+    land between the recount and the commit.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE orders, ordered_items, orders_archive, ordered_items_archive IN SHARE MODE"))
+    for model in (DailySales, DailyStatusSales, DailyProductSales):
+        db.execute(delete(model))
+
+    orders, items = _all_orders(), _all_items()
+    day = _day_of(db, orders.c.created_at)
+    order_kg = (
+        select(items.c.order_id, func.sum(items.c.quantity_in_kg).label("kg"))
+        .group_by(items.c.order_id)
+        .subquery()
+    )
+    db.execute(
+        insert(DailySales).from_select(
+            ["day", "order_count", "revenue", "kg_sold"],
+            select(day, func.count(orders.c.id), func.sum(orders.c.total_price), func.coalesce(func.sum(order_kg.c.kg), 0.0))
+            .outerjoin(order_kg, order_kg.c.order_id == orders.c.id)
+            .group_by(day),
+        )
+    )
+    db.execute(
+        insert(DailyStatusSales).from_select(
+            ["day", "status", "order_count", "revenue"],
+            select(day, orders.c.status, func.count(orders.c.id), func.sum(orders.c.total_price))
+            .group_by(day, orders.c.status),
+        )
+    )
+    db.execute(
+        insert(DailyProductSales).from_select(
+            ["day", "product_id", "kg_sold", "order_lines"],
+            select(day, items.c.product_id, func.sum(items.c.quantity_in_kg), func.count(items.c.id))
+            .join(orders, orders.c.id == items.c.order_id)
+            .group_by(day, items.c.product_id),
+        )
+    )
+    counts = {
+        model.__tablename__: db.scalar(select(func.count()).select_from(model))
+        for model in (DailySales, DailyStatusSales, DailyProductSales)
+    }
+    db.commit()
+    return counts
+
+
+def daily_sales(db: Session, start: date, end: date) -> List[DailySalesOut]:
+    """One entry per day in [start, end] that has orders, oldest first."""
+    rows = db.scalars(
+        select(DailySales)
+        .where(DailySales.day.between(start, end), DailySales.order_count > 0)
+        .order_by(DailySales.day)
+    )
+    return [
+        DailySalesOut.model_construct(
+            day=r.day, order_count=r.order_count, revenue=round(r.revenue, 2), kg_sold=round(r.kg_sold, 3)
+        )
+        for r in rows
+    ]
+
+
+def status_sales(db: Session, start: date, end: date) -> List[StatusSalesOut]:
+    rows = db.execute(
+        select(DailyStatusSales.status, func.sum(DailyStatusSales.order_count), func.sum(DailyStatusSales.revenue))
+        .where(DailyStatusSales.day.between(start, end))
+        .group_by(DailyStatusSales.status)
+    )
+    return [
+        StatusSalesOut.model_construct(status=status, order_count=count, revenue=round(revenue, 2))
+        for status, count, revenue in rows
+        if count
+    ]
+
+
+def product_sales(db: Session, start: date, end: date, limit: int) -> List[ProductSalesOut]:
+    """Products by kg sold in [start, end], best sellers first."""
+    kg = func.sum(DailyProductSales.kg_sold).label("kg")
+    totals = (
+        select(DailyProductSales.product_id, kg, func.sum(DailyProductSales.order_lines).label("lines"))
+        .where(DailyProductSales.day.between(start, end))
+        .group_by(DailyProductSales.product_id)
+        .having(func.sum(DailyProductSales.order_lines) > 0)
+        .order_by(kg.desc(), DailyProductSales.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = db.execute(
+        select(totals.c.product_id, Product.name, totals.c.kg, totals.c.lines)
+        .outerjoin(Product, Product.id == totals.c.product_id)
+        .order_by(totals.c.kg.desc(), totals.c.product_id)
+    )
+    return [
+        ProductSalesOut.model_construct(product_id=product_id, name=name, kg_sold=round(kg, 3), order_lines=lines)
+        for product_id, name, kg, lines in rows
+    ]
@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.session import ReadSessionLocal
+from app.db.upsert import dialect_insert
+from app.model.cache_version import CacheVersion
+from app.utils.metrics import Counter, Gauge, registry
+
+# How often each worker reads the stamps: a write on another worker reaches
+# this worker's caches within about this long. 0 turns the watcher off (one worker).
+CACHE_VERSION_POLL_SECONDS = float(os.getenv("CACHE_VERSION_POLL_SECONDS", "1"))
+# Hard bound: when the stamps could not be read for this long, the snapshot
+# caches are bypassed (every read goes to the database) until a poll succeeds
+CACHE_MAX_STALENESS_SECONDS = float(os.getenv("CACHE_MAX_STALENESS_SECONDS", "30"))
+
+# Families of cached reads; a write bumps every family it can change
+DISCOUNT = "discount"  # GET /api/discount
+CATALOG = "catalog"  # GET /api/products
+SEARCH = "search"  # product names and in_stock, i.e. the search index
+ORDER_EVENTS = "order_events"  # the live order feed; a wake-up hint, bumped after events commit
+NAMES = (DISCOUNT, CATALOG, SEARCH, ORDER_EVENTS)
+
+# Session.info key: stamps this session's open transaction has bumped
+_BUMPED = "cache_versions_bumped"
+
+logger = logging.getLogger(__name__)
+
+version_checks = registry.register(
+    Counter("cache_version_checks_total", "Polls of the cache version stamps by result.", ("result",))
+)
+version_changes = registry.register(
+    Counter("cache_version_changes_total", "Stamps found moved by another worker's write.", ("name",))
+)
+
+
+def seed(db: Session, names: Iterable[str] = NAMES) -> None:
+    """Create missing stamp rows (version 1). Does not commit."""
+    rows = [{"name": name, "version": 1} for name in names]
+    stmt = dialect_insert(db, CacheVersion)
+    if stmt is not None:
+        db.execute(stmt.values(rows).on_conflict_do_nothing(index_elements=[CacheVersion.name]))
+        return
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(CacheVersion).values(**row))
+        except IntegrityError:
+            pass
+
+
+def bump(db: Session, *names: str) -> Dict[str, int]:
+    """
+    Advance the stamps of `names` in the caller's transaction, so they move
+    exactly when the write commits. Call it as the last statement before
+    commit: the stamp rows stay locked only for the commit itself. Returns
+    the new versions; the row lock makes them follow commit order.
+    """
+    stmt = update(CacheVersion).where(CacheVersion.name.in_(names)).values(version=CacheVersion.version + 1)
+    if db.get_bind().dialect.update_returning:
+        bumped = dict(db.execute(stmt.returning(CacheVersion.name, CacheVersion.version)).all())
+    else:
+        db.execute(stmt)
+        current = select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(names))
+        bumped = dict(db.execute(current).all())
+    missing = [name for name in names if name not in bumped]
+    if missing:
+        # Only a database that was neither migrated nor created with DB_CREATE_ALL lacks the rows
+        seed(db, missing)
+        bumped.update(dict.fromkeys(missing, 1))
+    db.info.setdefault(_BUMPED, {}).update(bumped)
+    return bumped
+
+
+@event.listens_for(Session, "after_commit")
+def _adopt_bumped(session: Session) -> None:
+    bumped = session.info.pop(_BUMPED, None)
+    if bumped:
+        watcher.adopt(bumped)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bumped(session: Session) -> None:
+    session.info.pop(_BUMPED, None)
+
+
+class CacheVersionWatcher:
+    """
+    Keeps this worker's caches coherent with writes made by other workers.
+
+    A background thread reads the stamps every poll_seconds (one query over a
+    handful of rows on the primary) and runs the handlers of each name whose
+    stamp went up, so caches are reloaded only after a real change, at most
+    about poll_seconds after it. This worker's own writes already invalidate
+    locally; at commit they adopt the stamp they produced, so the next poll
+    doesn't reload a second time.
+
+    While stopped (scripts, single-process setups) trusted() is always True:
+    local invalidation is then complete.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = ReadSessionLocal,
+        poll_seconds: float = CACHE_VERSION_POLL_SECONDS,
+        max_staleness_seconds: float = CACHE_MAX_STALENESS_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._known: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._failing = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def watch(self, name: str, handler: Callable[[], None]) -> None:
+        self._handlers.setdefault(name, []).append(handler)
+
+    def trusted(self) -> bool:
+        """Whether cached copies may be served: always, unless polling has failed for too long."""
+        if not self.running:
+            return True
+        checked_at = self._checked_at
+        return checked_at is not None and time.monotonic() - checked_at <= self.max_staleness_seconds
+
+    def staleness(self) -> Dict[tuple, float]:
+        checked_at = self._checked_at
+        if not self.running or checked_at is None:
+            return {}
+        return {(): time.monotonic() - checked_at}
+
+    def version(self, name: str) -> Optional[int]:
+        """The stamp of `name` as last read or adopted; None before the first read."""
+        with self._lock:
+            return self._known.get(name)
+
+    def adopt(self, bumped: Dict[str, int]) -> None:
+        with self._lock:
+            for name, version in bumped.items():
+                # Only if nobody else wrote in between; otherwise the next poll reloads
+                if self._known.get(name) == version - 1:
+                    self._known[name] = version
+
+    def refresh(self, notify: bool = True) -> List[str]:
+        """
+        Read the stamps once and run the handlers of the names that moved;
+        notify=False only records them (at startup, before the caches are filled).
+        """
+        with self.session_factory() as db:
+            stamps = dict(db.execute(select(CacheVersion.name, CacheVersion.version)).all())
+        with self._lock:
+            changed = [name for name, version in stamps.items() if version > self._known.get(name, -1)]
+            for name in changed:
+                self._known[name] = stamps[name]
+            self._checked_at = time.monotonic()
+        version_checks.inc(("ok",))
+        if notify:
+            for name in changed:
+                version_changes.inc((name,))
+                try:
+                    for handler in self._handlers.get(name, ()):
+                        handler()
+                except Exception:
+                    # Forget the stamp so the next poll runs the handlers again
+                    with self._lock:
+                        self._known.pop(name, None)
+                    raise
+        return changed
+
+    def start(self) -> None:
+        if self.poll_seconds <= 0 or self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-version-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except SQLAlchemyError as exc:
+                version_checks.inc(("error",))
+                # Once per outage, not once per poll
+                if not self._failing:
+                    logger.warning("Cache version poll failed; serving cached reads for at most %ss: %s",
+                                   self.max_staleness_seconds, exc)
+                self._failing = True
+                continue
+            except Exception:
+                logger.exception("Cache version handler failed")
+            self._failing = False
+
+
+watcher = CacheVersionWatcher()
+
+registry.register(
+    Gauge(
+        "cache_version_staleness_seconds",
+        "Seconds since this worker last read the cache version stamps.",
+        callback=watcher.staleness,
+    )
+)
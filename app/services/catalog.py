@@ -0,0 +1,32 @@
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.session import SessionLocal
+from app.services.cache_versions import CATALOG, bump, watcher
+from app.utils.snapshot import SnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Serialized GET /api/products bodies, one variant per public base URL.
+# Every write to what the catalog shows must bump the "catalog" cache version
+# before commit and call catalog_cache.invalidate() after it; other workers
+# invalidate when they see the new version. Stock levels are not in the
+# snapshot (see GET /api/products/stock), so orders leave it alone.
+catalog_cache = SnapshotCache("catalog", trusted=watcher.trusted)
+watcher.watch(CATALOG, catalog_cache.invalidate)
+
+
+def catalog_changed() -> None:
+    """
+    For changes to what the catalog shows that are not a database write
+    (e.g. image variants finished): bump the version in a transaction of its
+    own, so every worker reloads, not only this one.
+    """
+    try:
+        with SessionLocal() as db:
+            bump(db, CATALOG)
+            db.commit()
+    except SQLAlchemyError as exc:
+        logger.warning("Catalog version not bumped; other workers reload on the next catalog write: %s", exc)
+    catalog_cache.invalidate()
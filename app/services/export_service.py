@@ -0,0 +1,189 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Row, select, union_all
+
+from app.db.session import AsyncReplicaSessionLocal, ReplicaSessionLocal
+from app.model.order import Order
+from app.model.order_archive import ArchivedOrder, ArchivedOrderedItem
+from app.model.ordered_item import OrderedItem
+
+EXPORT_BATCH_SIZE = 1000
+
+CSV_COLUMNS = [
+    "orderId",
+    "name",
+    "address",
+    "phoneNumber",
+    "totalPrice",
+    "status",
+    "createdAt",
+    "productId",
+    "quantityInKg",
+]
+
+
+def _rows_statement(order, item, filters: Sequence):
+    return (
+        select(
+            order.id,
+            order.name,
+            order.address,
+            order.phone_number,
+            order.total_price,
+            order.status,
+            order.created_at,
+            item.product_id,
+            item.quantity_in_kg,
+        )
+        .outerjoin(item, item.order_id == order.id)
+        .where(*filters)
+    )
+
+
+def export_statement(filters: Sequence, archived_filters: Optional[Sequence] = None):
+    """
+    One pass over orders LEFT JOIN ordered_items, ordered so that all item rows
+    of an order are adjacent. Orders without items still produce one row.
+    With archived_filters, archived orders matching them are merged in, in
+    the same order.
+    """
+    if archived_filters is None:
+        return _rows_statement(Order, OrderedItem, filters).order_by(Order.created_at, Order.id)
+    combined = union_all(
+        _rows_statement(Order, OrderedItem, filters),
+        _rows_statement(ArchivedOrder, ArchivedOrderedItem, archived_filters),
+    ).subquery()
+    return select(combined).order_by(combined.c.created_at, combined.c.id)
+
+
+class NdjsonFormatter:
+    """
+    One JSON object per order with its items nested. Rows for an order may be
+    split across two batches, so the current order is carried between feed() calls.
+    """
+
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self) -> None:
+        self._current: Optional[dict] = None
+
+    def header(self) -> str:
+        return ""
+
+    def feed(self, rows: Iterable[Row]) -> str:
+        out: List[str] = []
+        for row in rows:
+            if self._current is None or self._current["id"] != row.id:
+                if self._current is not None:
+                    out.append(json.dumps(self._current))
+                self._current = {
+                    "id": row.id,
+                    "name": row.name,
+                    "address": row.address,
+                    "phoneNumber": row.phone_number,
+                    "totalPrice": row.total_price,
+                    "status": row.status.value,
+                    "createdAt": row.created_at.isoformat(),
+                    "orderedItems": [],
+                }
+            if row.product_id is not None:
+                self._current["orderedItems"].append(
+                    {"productId": row.product_id, "quantityInKg": row.quantity_in_kg}
+                )
+        return "".join(line + "\n" for line in out)
+
+    def finish(self) -> str:
+        if self._current is None:
+            return ""
+        line, self._current = json.dumps(self._current), None
+        return line + "\n"
+
+
+class CsvFormatter:
+    """
+    Flat CSV with one line per ordered item; order columns repeat on each line.
+    """
+
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> str:
+        chunk = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return chunk
+
+    def header(self) -> str:
+        self._writer.writerow(CSV_COLUMNS)
+        return self._drain()
+
+    def feed(self, rows: Iterable[Row]) -> str:
+        self._writer.writerows(
+            (
+                row.id,
+                row.name,
+                row.address,
+                row.phone_number,
+                row.total_price,
+                row.status.value,
+                row.created_at.isoformat(),
+                row.product_id or "",
+                "" if row.quantity_in_kg is None else row.quantity_in_kg,
+            )
+            for row in rows
+        )
+        return self._drain()
+
+    def finish(self) -> str:
+        return ""
+
+
+FORMATTERS = {"ndjson": NdjsonFormatter, "csv": CsvFormatter}
+
+
+def iter_export(
+    formatter, filters: Sequence, archived_filters: Optional[Sequence] = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """
+    Stream the export in chunks of roughly batch_size rows.
+
+    Uses its own session because the generator outlives the request handler,
+    on the replica (or the read pool) so a long export never holds up writes.
+    stream_results keeps a server-side cursor open on Postgres, and yield_per
+    bounds how many rows are buffered client-side at once.
+    """
+    db = ReplicaSessionLocal()
+    try:
+        yield formatter.header()
+        stmt = export_statement(filters, archived_filters).execution_options(stream_results=True, yield_per=batch_size)
+        result = db.execute(stmt)
+        for partition in result.partitions():
+            chunk = formatter.feed(partition)
+            if chunk:
+                yield chunk
+        yield formatter.finish()
+    finally:
+        db.close()
+
+
+async def aiter_export(
+    formatter, filters: Sequence, archived_filters: Optional[Sequence] = None, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[str]:
+    """Async counterpart of iter_export, streaming through AsyncSession.stream()."""
+    async with AsyncReplicaSessionLocal() as db:
+        yield formatter.header()
+        stmt = export_statement(filters, archived_filters).execution_options(yield_per=batch_size)
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            chunk = formatter.feed(partition)
+            if chunk:
+                yield chunk
+        yield formatter.finish()
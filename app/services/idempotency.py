@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.model.idempotency_key import IdempotencyKey, IdempotencyState
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+# How long a duplicate waits for the in-flight request before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# A claim not completed within this time belongs to a crashed worker and can be taken over
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+# Expired keys are deleted in one statement at most this often
+IDEMPOTENCY_SWEEP_SECONDS = float(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", "300"))
+
+_sweep_lock = threading.Lock()
+_next_sweep = 0.0
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: bytes
+
+
+def fingerprint(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _maybe_sweep(db: Session, now: datetime) -> None:
+    """Bulk-delete expired keys, at most once per IDEMPOTENCY_SWEEP_SECONDS per process."""
+    global _next_sweep
+    with _sweep_lock:
+        if time.monotonic() < _next_sweep:
+            return
+        _next_sweep = time.monotonic() + IDEMPOTENCY_SWEEP_SECONDS
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+
+
+def _insert_claim(db: Session, values: dict) -> bool:
+    stmt = dialect_insert(db, IdempotencyKey)
+    if stmt is not None:
+        stmt = stmt.values(**values).on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+        return db.execute(stmt).rowcount == 1
+    try:
+        with db.begin_nested():
+            db.execute(insert(IdempotencyKey).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _take_over(db: Session, key: str, values: dict, *conditions) -> bool:
+    # Conditional UPDATE: of several requests racing for a stale row, one wins
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key, *conditions)
+        .values(state=IdempotencyState.InProgress, status_code=None, response_body=None, **values)
+    )
+    return result.rowcount == 1
+
+
+def try_claim(db: Session, key: str, request_fingerprint: str) -> Union[StoredResponse, bool]:
+    """
+    One attempt at claiming `key`. Commits. Returns True when the caller now
+    owns the key and must do the work, the StoredResponse when the work is
+    already done, and False while another request holds the key. Raises 422 if
+    the key was used for a different payload.
+    """
+    now = datetime.utcnow()
+    values = {
+        "key": key,
+        "fingerprint": request_fingerprint,
+        "locked_at": now,
+        "expires_at": now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+    }
+    _maybe_sweep(db, now)
+    outcome: Union[StoredResponse, bool] = _insert_claim(db, values)
+    mismatch = False
+    if not outcome:
+        row = db.get(IdempotencyKey, key, populate_existing=True)
+        if row is None:
+            # Released or swept in between; the caller just tries again
+            pass
+        elif row.expires_at <= now:
+            outcome = _take_over(db, key, values, IdempotencyKey.expires_at == row.expires_at)
+        elif row.fingerprint != request_fingerprint:
+            mismatch = True
+        elif row.state == IdempotencyState.Completed:
+            outcome = StoredResponse(row.status_code, row.response_body)
+        elif row.locked_at <= now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS):
+            outcome = _take_over(
+                db,
+                key,
+                {"locked_at": now},
+                IdempotencyKey.state == IdempotencyState.InProgress,
+                IdempotencyKey.locked_at == row.locked_at,
+            )
+    db.commit()
+    if mismatch:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    return outcome
+
+
+def complete(db: Session, key: str, status_code: int, body: bytes) -> None:
+    """Record the response. Does not commit: call it inside the transaction of the work."""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(state=IdempotencyState.Completed, status_code=status_code, response_body=body)
+    )
+
+
+def release(db: Session, key: str) -> None:
+    """Drop the claim after the work failed, so a retry runs it again."""
+    db.rollback()
+    db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.state == IdempotencyState.InProgress)
+    )
+    db.commit()
+
+
+def _poll_delays() -> Iterator[float]:
+    # Jittered exponential backoff between claim attempts until the wait budget is spent
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.02
+    while True:
+        yield delay * random.uniform(0.5, 1.0)
+        if time.monotonic() >= deadline:
+            break
+        delay = min(delay * 2, 0.25)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed; retry later",
+    )
+
+
+def acquire(db: Session, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+    """
+    Claim `key`, waiting while a concurrent duplicate is in flight. Returns None
+    when the caller owns the key, or the response to replay.
+    """
+    for delay in _poll_delays():
+        claimed = try_claim(db, key, request_fingerprint)
+        if claimed is True:
+            return None
+        if claimed is not False:
+            return claimed
+        time.sleep(delay)
+
+
+async def acquire_async(db: AsyncSession, key: str, request_fingerprint: str) -> Optional[StoredResponse]:
+    """acquire() for an AsyncSession; waits on the event loop instead of blocking a thread."""
+    for delay in _poll_delays():
+        claimed = await db.run_sync(try_claim, key, request_fingerprint)
+        if claimed is True:
+            return None
+        if claimed is not False:
+            return claimed
+        await asyncio.sleep(delay)
@@ -0,0 +1,143 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.utils.uploads import PRODUCTS_SUBDIR, VARIANTS_SUBDIR, local_upload_path, public_upload_path
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels; images are only ever scaled down
+VARIANT_SIZES = {"thumbnail": 160, "medium": 640, "full": 1600}
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+_SOURCE_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def variant_files(source: Path) -> Dict[str, Path]:
+    """
+    Every file generated for `source`, keyed like the ProductImageVariants fields.
+    The source format is kept (JPEG/PNG) next to a WebP copy; WebP sources only get WebP.
+    """
+    files: Dict[str, Path] = {}
+    suffix = source.suffix.lower()
+    for variant in VARIANT_SIZES:
+        if suffix != ".webp":
+            files[variant] = VARIANTS_SUBDIR / f"{source.stem}-{variant}{suffix}"
+        files[f"{variant}_webp"] = VARIANTS_SUBDIR / f"{source.stem}-{variant}.webp"
+    return files
+
+
+def generate_variants(source: str) -> List[str]:
+    """
+    Resize one image into every variant. Runs inside the process pool, so it
+    only takes and returns plain strings. Existing variants are kept, which
+    makes re-running it (e.g. from the backfill command) cheap.
+    """
+    from PIL import Image, ImageOps
+
+    source_path = Path(source)
+    targets = variant_files(source_path)
+    written: List[str] = []
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    for key, target in targets.items():
+        if target.exists():
+            continue
+        variant = key.removesuffix("_webp")
+        resized = image.copy()
+        resized.thumbnail((VARIANT_SIZES[variant], VARIANT_SIZES[variant]))
+        fmt = "WEBP" if target.suffix == ".webp" else _SOURCE_FORMATS[target.suffix]
+        options: dict = {"optimize": True}
+        if fmt == "JPEG":
+            resized = resized.convert("RGB")
+            options.update(quality=JPEG_QUALITY, progressive=True)
+        elif fmt == "WEBP":
+            options = {"quality": WEBP_QUALITY, "method": 4}
+        # Write then rename so a half-written variant is never served
+        tmp = target.with_name(f".{target.name}.part")
+        resized.save(tmp, fmt, **options)
+        os.replace(tmp, target)
+        written.append(str(target))
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs server threads is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_VARIANT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def schedule(source: Path, on_done: Optional[Callable[[], None]] = None) -> Optional[Future]:
+    """
+    Queue variant generation for a saved upload without waiting for it.
+    on_done runs in a pool management thread once new files were written.
+    """
+    if source.suffix.lower() not in _SOURCE_FORMATS:
+        return None
+    if not pillow_available():
+        logger.warning("Pillow is not installed; skipping image variants for %s", source)
+        return None
+
+    future = _get_pool().submit(generate_variants, str(source.resolve()))
+
+    def _finished(done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            logger.warning("Generating image variants for %s failed: %s", source, exc)
+        elif done.result() and on_done is not None:
+            on_done()
+
+    future.add_done_callback(_finished)
+    return future
+
+
+def variant_paths(image: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Public paths of the variants of a managed product image, or None when the
+    image is external or its variants are not generated yet.
+    """
+    source = local_upload_path(image)
+    if source is None or source.parent != PRODUCTS_SUBDIR or source.suffix.lower() not in _SOURCE_FORMATS:
+        return None
+    files = variant_files(source)
+    # full_webp is written last, so its presence means the whole set is there
+    if not files["full_webp"].exists():
+        return None
+    return {key: public_upload_path(path) for key, path in files.items()}
+
+
+def delete_variants(source: Path) -> None:
+    for path in variant_files(source).values():
+        path.unlink(missing_ok=True)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
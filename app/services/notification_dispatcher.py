@@ -0,0 +1,192 @@
+import logging
+import os
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.model.notification_outbox import NotificationOutbox, OutboxStatus
+from app.utils.telegram_notifier import TELEGRAM_MAX_MESSAGE_LENGTH, send_telegram_message
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+# After a wake-up, wait this long so a burst of orders goes out as one message
+OUTBOX_COALESCE_SECONDS = float(os.getenv("OUTBOX_COALESCE_SECONDS", "0.5"))
+
+MESSAGE_SEPARATOR = "\n" + "—" * 10 + "\n"
+
+
+def enqueue_notification(db: Session, message: str, channel: str = "telegram") -> None:
+    """
+    Add a notification to the outbox. The caller commits it together with the
+    change it announces, so a rolled back order never gets announced.
+    """
+    db.add(NotificationOutbox(channel=channel, message=message))
+
+
+def coalesce(messages: List[str], limit: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> List[List[int]]:
+    """
+    Group message indexes so each group, joined by MESSAGE_SEPARATOR, fits in one
+    Telegram message. A single oversized message gets a group of its own.
+    """
+    groups: List[List[int]] = []
+    size = 0
+    for i, message in enumerate(messages):
+        added = len(MESSAGE_SEPARATOR) + len(message)
+        if groups and size + added <= limit:
+            groups[-1].append(i)
+            size += added
+        else:
+            groups.append([i])
+            size = len(message)
+    return groups
+
+
+class NotificationDispatcher:
+    """
+    Background thread that drains the notification outbox.
+
+    Rows are claimed with a conditional UPDATE so several workers can run a
+    dispatcher against the same table without double delivery. A claim that is
+    not released within lease_seconds (crashed worker) becomes claimable again.
+    Failed deliveries are retried with jittered exponential backoff and marked
+    Failed after max_attempts.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sender: Callable[[str], object] = send_telegram_message,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        coalesce_seconds: float = OUTBOX_COALESCE_SECONDS,
+        base_backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 300.0,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.coalesce_seconds = coalesce_seconds
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        """Signal that new rows were committed; cheap enough to call per request."""
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            woken = self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            if woken and self.coalesce_seconds > 0:
+                self._stopping.wait(self.coalesce_seconds)
+            try:
+                # Keep draining while full batches come back
+                while self.run_once() >= self.batch_size and not self._stopping.is_set():
+                    pass
+            except Exception:
+                logger.exception("Notification dispatcher iteration failed")
+
+    def run_once(self) -> int:
+        """Claim and deliver one batch. Returns the number of rows claimed."""
+        db = self.session_factory()
+        try:
+            rows = self._claim(db)
+            if not rows:
+                return 0
+            messages = [row.message for row in rows]
+            now = datetime.utcnow()
+            for group in coalesce(messages):
+                group_rows = [rows[i] for i in group]
+                try:
+                    self.sender(MESSAGE_SEPARATOR.join(messages[i] for i in group))
+                except Exception as exc:
+                    logger.warning("Notification delivery failed for %d message(s): %s", len(group_rows), exc)
+                    for row in group_rows:
+                        self._reschedule(row, str(exc), now)
+                else:
+                    db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_([r.id for r in group_rows])))
+            db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    def _claim(self, db: Session) -> List[NotificationOutbox]:
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(NotificationOutbox.status == OutboxStatus.Pending, NotificationOutbox.next_attempt_at <= now),
+            and_(
+                NotificationOutbox.status == OutboxStatus.Sending,
+                NotificationOutbox.claimed_at < now - timedelta(seconds=self.lease_seconds),
+            ),
+        )
+        ids = db.scalars(
+            select(NotificationOutbox.id)
+            .where(claimable)
+            .order_by(NotificationOutbox.created_at)
+            .limit(self.batch_size)
+        ).all()
+        if not ids:
+            db.rollback()
+            return []
+
+        # Re-checking claimable in the UPDATE makes the claim atomic against other dispatchers
+        token = uuid.uuid4().hex
+        db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids), claimable)
+            .values(status=OutboxStatus.Sending, claimed_by=token, claimed_at=now)
+        )
+        db.commit()
+        return list(
+            db.scalars(
+                select(NotificationOutbox)
+                .where(NotificationOutbox.claimed_by == token)
+                .order_by(NotificationOutbox.created_at)
+            )
+        )
+
+    def _reschedule(self, row: NotificationOutbox, error: str, now: datetime) -> None:
+        row.attempts += 1
+        row.last_error = error[:1000]
+        row.claimed_by = None
+        row.claimed_at = None
+        if row.attempts >= self.max_attempts:
+            row.status = OutboxStatus.Failed
+            return
+        delay = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** (row.attempts - 1))
+        row.status = OutboxStatus.Pending
+        row.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+dispatcher = NotificationDispatcher()
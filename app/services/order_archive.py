@@ -0,0 +1,117 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, delete, insert, literal, select, text
+from sqlalchemy.orm import Session, selectinload
+
+from app.model.order import Order, OrderStatus
+from app.model.order_archive import ArchivedOrder, ArchivedOrderedItem
+from app.model.ordered_item import OrderedItem
+
+# Delivered orders older than this move to the archive tables
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+# Orders moved per transaction; keeps locks and WAL per batch small
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "500"))
+
+ORDER_COLUMNS = ("id", "name", "address", "phone_number", "total_price", "status", "created_at", "updated_at")
+ITEM_COLUMNS = ("id", "order_id", "product_id", "quantity_in_kg", "unit_price_per_kg")
+
+
+def archived_order_detail_statement(order_id: str) -> Select:
+    """Like order_detail_statement, for an archived order: two queries however many items it has."""
+    return (
+        select(ArchivedOrder)
+        .where(ArchivedOrder.id == order_id)
+        .options(selectinload(ArchivedOrder.items).joinedload(ArchivedOrderedItem.product, innerjoin=True))
+    )
+
+
+def archivable_statement(cutoff: datetime, limit: int) -> Select:
+    # Oldest first along ix_orders_status_created_at_id. SKIP LOCKED lets two
+    # runs work side by side (Postgres); elsewhere it is ignored.
+    return (
+        select(Order.id, Order.created_at)
+        .where(Order.status == OrderStatus.Delivered, Order.created_at < cutoff)
+        .order_by(Order.created_at, Order.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'orders_archive' AND pg_table_is_visible(c.oid))"
+    ))
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, created_at: Iterable[datetime]) -> None:
+    """Create the monthly orders_archive partitions these orders fall into (Postgres, partitioned archive)."""
+    months: Set[datetime] = {_month_start(moment) for moment in created_at}
+    for month in sorted(months):
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS orders_archive_{month:%Y_%m} PARTITION OF orders_archive "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+        ))
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int, partitioned: bool = False) -> int:
+    """
+    Move up to batch_size Delivered orders created before cutoff, with their
+    items, into the archive tables: two INSERT ... SELECT and two DELETE
+    statements, committed together. Returns the number of orders moved.
+    """
+    rows: List[Tuple[str, datetime]] = db.execute(archivable_statement(cutoff, batch_size)).all()
+    if not rows:
+        db.rollback()
+        return 0
+    ids = [order_id for order_id, _ in rows]
+    if partitioned:
+        ensure_partitions(db, (created_at for _, created_at in rows))
+    archived_at = datetime.utcnow()
+    db.execute(
+        insert(ArchivedOrder).from_select(
+            [*ORDER_COLUMNS, "archived_at"],
+            select(*(getattr(Order, c) for c in ORDER_COLUMNS), literal(archived_at)).where(Order.id.in_(ids)),
+        )
+    )
+    db.execute(
+        insert(ArchivedOrderedItem).from_select(
+            list(ITEM_COLUMNS),
+            select(*(getattr(OrderedItem, c) for c in ITEM_COLUMNS)).where(OrderedItem.order_id.in_(ids)),
+        )
+    )
+    db.execute(delete(OrderedItem).where(OrderedItem.order_id.in_(ids)))
+    db.execute(delete(Order).where(Order.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive_orders(
+    db: Session,
+    older_than_days: int = ORDER_ARCHIVE_AFTER_DAYS,
+    batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive in batches until no old Delivered order is left (or max_batches). Returns the orders moved."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    partitioned = is_partitioned(db)
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(db, cutoff, batch_size, partitioned)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+    return moved
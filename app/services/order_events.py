@@ -0,0 +1,362 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.model.order import OrderStatus
+from app.model.order_event import OrderEvent
+from app.schemas.order import OrderOut
+from app.services.cache_versions import ORDER_EVENTS, bump, watcher
+from app.utils.metrics import Gauge, registry
+
+# Events kept for Last-Event-ID replay, in memory and in the order_events
+# table; older ones are answered with a reset
+ORDER_EVENTS_BUFFER = int(os.getenv("ORDER_EVENTS_BUFFER", "1000"))
+# Open streams per worker; further subscribers get 503 and retry
+ORDER_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("ORDER_EVENTS_MAX_SUBSCRIBERS", "500"))
+# A comment line this often keeps proxies from closing an idle stream
+ORDER_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("ORDER_EVENTS_KEEPALIVE_SECONDS", "15"))
+# Streams end after this long and the client reconnects with Last-Event-ID, so
+# a draining worker is not held open and subscribers spread over new workers
+ORDER_EVENTS_MAX_STREAM_SECONDS = float(os.getenv("ORDER_EVENTS_MAX_STREAM_SECONDS", "300"))
+ORDER_EVENTS_RETRY_MS = 3000
+# Rows read per query when catching up
+FETCH_BATCH_SIZE = 500
+# Wait before reading again after the database could not be read
+FETCH_RETRY_SECONDS = 1.0
+# Ids are handed out at insert but become visible at commit, so on Postgres a
+# later id can be read before an earlier one. Events after a missing id wait
+# for it this long before it is taken for a rolled-back insert and skipped.
+ORDER_EVENTS_GAP_SECONDS = float(os.getenv("ORDER_EVENTS_GAP_SECONDS", "2"))
+# How often the reader looks again while an id is missing
+GAP_RECHECK_SECONDS = 0.05
+
+CREATED = "order.created"
+STATUS_CHANGED = "order.status_changed"
+DELETED = "order.deleted"
+# Tells the client its Last-Event-ID can't be resumed; it should refetch GET /api/orders
+RESET = "reset"
+
+KEEPALIVE = b": keepalive\n\n"
+
+logger = logging.getLogger(__name__)
+
+
+class OrderStatusChanged(BaseModel):
+    order: OrderOut
+    previous_status: OrderStatus = Field(..., alias="previousStatus")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class OrderDeleted(BaseModel):
+    id: str
+
+
+def _frame(event_id: Optional[int], event_type: str, data: bytes) -> bytes:
+    head = f"event: {event_type}\n" if event_id is None else f"id: {event_id}\nevent: {event_type}\n"
+    return head.encode() + b"data: " + data + b"\n\n"
+
+
+class OrderEventBroker:
+    """
+    Fan-out of order changes to Server-Sent Events subscribers, across workers.
+
+    Write paths add an order_events row in the transaction of the change; its
+    id comes from the table's sequence, so ids are the same on every worker
+    and recording takes no lock beyond the insert. A reader thread per worker
+    reads the rows after the newest id it has, right after a local commit
+    (committed()) and when the cache version watcher sees another worker's
+    wake-up hint, and appends them, framed once into SSE bytes, to a bounded
+    ring, holding back events behind a missing id (see
+    ORDER_EVENTS_GAP_SECONDS) so the ring stays in id order. A Last-Event-ID
+    from any worker is resumed from that ring.
+
+    Subscribers are async generators on the event loop, not threads: an idle
+    subscriber is one suspended coroutine waiting on a shared asyncio.Event
+    that publish() sets once per batch through call_soon_threadsafe.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = ORDER_EVENTS_BUFFER,
+        session_factory: Callable[[], Session] = ReadSessionLocal,
+        writer_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.session_factory = session_factory
+        self.writer_factory = writer_factory
+        self._lock = threading.Lock()
+        self._ring: Deque[Tuple[int, bytes]] = deque(maxlen=buffer_size)
+        # Newest id read, and the newest id when the ring was first loaded; None until then
+        self._last: Optional[int] = None
+        self._base: Optional[int] = None
+        self._pruned = 0
+        # The first missing id and when it was first seen missing
+        self._gap: Optional[Tuple[int, float]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._closed = False
+        self._fetch = threading.Event()
+        self._stopping = threading.Event()
+        # Set by a local commit until the "order_events" stamp has been bumped
+        self._hint = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.subscribers = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Attach to the worker's event loop; done in the lifespan, or by the first subscriber."""
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self._closed = False
+
+    def close(self) -> None:
+        """
+        End every open stream, from the lifespan shutdown: each stream waits on
+        the shared event, which this sets with the closed flag raised.
+        """
+        self._closed = True
+        self._notify()
+
+    # -- recording (write paths) -----------------------------------------------
+
+    def record(self, db: Session, event_type: str, data: bytes) -> None:
+        """Add an event to the caller's transaction. Call committed() after the commit."""
+        db.add(OrderEvent(event=event_type, data=data))
+
+    def order_created(self, db: Session, order: OrderOut) -> None:
+        self.record(db, CREATED, order.model_dump_json(by_alias=True).encode())
+
+    def order_status_changed(self, db: Session, order: OrderOut, previous_status: OrderStatus) -> None:
+        event = OrderStatusChanged.model_construct(order=order, previous_status=previous_status)
+        self.record(db, STATUS_CHANGED, event.model_dump_json(by_alias=True).encode())
+
+    def order_deleted(self, db: Session, order_id: str) -> None:
+        self.record(db, DELETED, OrderDeleted.model_construct(id=order_id).model_dump_json().encode())
+
+    # -- reading ---------------------------------------------------------------
+
+    def committed(self) -> None:
+        """After a write path's commit: read the new events here, then wake the other workers."""
+        self._hint.set()
+        self._fetch.set()
+
+    def wake(self) -> None:
+        """Have the reader thread look for new events (another worker's wake-up hint)."""
+        self._fetch.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="order-events-reader", daemon=True)
+        self._thread.start()
+        # The first read fills the ring with the most recent events
+        self.wake()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._fetch.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self._fetch.wait(GAP_RECHECK_SECONDS if self._gap else None)
+            self._fetch.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                self.fetch()
+                self._signal()
+            except SQLAlchemyError as exc:
+                # The events stay in the table; read them once the database is back
+                logger.warning("Order events not read: %s", exc)
+                if self._stopping.wait(FETCH_RETRY_SECONDS):
+                    return
+                self._fetch.set()
+
+    def fetch(self) -> None:
+        """Read the events committed since the last read and publish them; the first read loads the ring."""
+        columns = (OrderEvent.id, OrderEvent.event, OrderEvent.data)
+        with self.session_factory() as db:
+            if self._last is None:
+                recent = select(*columns).order_by(OrderEvent.id.desc()).limit(self._ring.maxlen)
+                self.load(reversed(db.execute(recent).all()))
+                return
+            while True:
+                newer = select(*columns).where(OrderEvent.id > self._last).order_by(OrderEvent.id)
+                rows = db.execute(newer.limit(FETCH_BATCH_SIZE)).all()
+                ready = self._before_gap(rows)
+                self.publish(ready)
+                if len(rows) < FETCH_BATCH_SIZE or len(ready) < len(rows):
+                    break
+        self._prune()
+
+    def _before_gap(self, rows: Sequence[Tuple[int, str, bytes]]) -> Sequence[Tuple[int, str, bytes]]:
+        """The rows up to the first id that is missing for less than ORDER_EVENTS_GAP_SECONDS."""
+        expected = self._last + 1
+        for index, row in enumerate(rows):
+            if row[0] != expected:
+                now = time.monotonic()
+                if self._gap is None or self._gap[0] != expected:
+                    self._gap = (expected, now)
+                if now - self._gap[1] < ORDER_EVENTS_GAP_SECONDS:
+                    return rows[:index]
+            expected = row[0] + 1
+        self._gap = None
+        return rows
+
+    def _signal(self) -> None:
+        # The wake-up hint for the other workers' cache version watchers, in a
+        # transaction of its own: order transactions never touch the stamp row.
+        # One bump covers every local commit since the last one.
+        if not self._hint.is_set():
+            return
+        self._hint.clear()
+        try:
+            with self.writer_factory() as db:
+                bump(db, ORDER_EVENTS)
+                db.commit()
+        except SQLAlchemyError:
+            self._hint.set()
+            raise
+
+    def _prune(self) -> None:
+        # Keep what a worker starting now would load; every worker does this, once per buffer's worth
+        if self._last - self._pruned < self._ring.maxlen:
+            return
+        with self.writer_factory() as db:
+            db.execute(delete(OrderEvent).where(OrderEvent.id <= self._last - self._ring.maxlen))
+            db.commit()
+        self._pruned = self._last
+
+    def load(self, rows: Iterable[Tuple[int, str, bytes]]) -> None:
+        """Fill the ring with past events, oldest first; streams then start after the newest."""
+        with self._lock:
+            for event_id, event_type, data in rows:
+                self._ring.append((event_id, _frame(event_id, event_type, data)))
+            self._last = self._base = self._ring[-1][0] if self._ring else 0
+            self._pruned = self._last
+        self._notify()
+
+    def publish(self, rows: Sequence[Tuple[int, str, bytes]]) -> None:
+        """Append events newer than the ring, oldest first, and wake the subscribers once."""
+        if not rows:
+            return
+        with self._lock:
+            for event_id, event_type, data in rows:
+                self._ring.append((event_id, _frame(event_id, event_type, data)))
+            self._last = self._ring[-1][0]
+        self._notify()
+
+    def _notify(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            # Loop closed between the check and the call
+            pass
+
+    def _wake(self) -> None:
+        # Resolves every waiter at once; clearing doesn't un-wake them
+        self._changed.set()
+        self._changed.clear()
+
+    # -- subscribing -----------------------------------------------------------
+
+    def accepts_subscriber(self) -> bool:
+        return self.subscribers < ORDER_EVENTS_MAX_SUBSCRIBERS
+
+    def _resume_from(self, last_event_id: Optional[str]) -> Tuple[Optional[int], bool]:
+        """
+        The id to stream after, and whether last_event_id can't be resumed
+        (a reset). None until the ring is loaded: the stream then starts at
+        the ring's base.
+        """
+        if self._last is None:
+            return None, last_event_id is not None
+        if last_event_id is None:
+            return self._last, False
+        if not last_event_id.isdigit():
+            return self._last, True
+        event_id = int(last_event_id)
+        # Resumable if nothing after it has left the ring
+        oldest = self._ring[0][0] - 1 if self._ring else self._last
+        if event_id > self._last or event_id < oldest:
+            return self._last, True
+        return event_id, False
+
+    def _after(self, cursor: int) -> List[Tuple[int, bytes]]:
+        with self._lock:
+            if not self._ring or self._ring[-1][0] <= cursor:
+                return []
+            # Recent events are at the right; walk back to the cursor
+            newer = []
+            for entry in reversed(self._ring):
+                if entry[0] <= cursor:
+                    break
+                newer.append(entry)
+        newer.reverse()
+        return newer
+
+    async def stream(
+        self, last_event_id: Optional[str] = None, max_seconds: float = ORDER_EVENTS_MAX_STREAM_SECONDS
+    ) -> AsyncIterator[bytes]:
+        """SSE body: replay after last_event_id (or a reset), then live events and keepalives."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.bind(loop)
+        self.subscribers += 1
+        try:
+            yield f"retry: {ORDER_EVENTS_RETRY_MS}\n\n".encode()
+            with self._lock:
+                cursor, reset = self._resume_from(last_event_id)
+            if reset:
+                yield _frame(cursor, RESET, b"{}")
+            deadline = time.monotonic() + max_seconds
+            while not self._closed:
+                if cursor is None:
+                    cursor = self._base
+                entries = self._after(cursor) if cursor is not None else []
+                if entries:
+                    cursor = entries[-1][0]
+                    # One chunk per wake-up, however many events arrived
+                    yield b"".join(frame for _, frame in entries)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                # No await between the check above and the wait, so a wake-up can't be missed
+                try:
+                    # asyncio.timeout rather than wait_for: no task per waiter per wake-up
+                    async with asyncio.timeout(min(ORDER_EVENTS_KEEPALIVE_SECONDS, remaining)):
+                        await self._changed.wait()
+                except TimeoutError:
+                    if time.monotonic() < deadline:
+                        yield KEEPALIVE
+        finally:
+            self.subscribers -= 1
+
+
+order_events = OrderEventBroker()
+watcher.watch(ORDER_EVENTS, order_events.wake)
+
+registry.register(
+    Gauge(
+        "order_events_subscribers",
+        "Open order event streams in this worker.",
+        callback=lambda: {(): order_events.subscribers},
+    )
+)
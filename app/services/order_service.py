@@ -1,10 +1,85 @@
-from typing import List, Tuple
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, case, delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException, status
 from app.model.product import Product
 from app.model.order import Order, OrderStatus
 from app.model.ordered_item import OrderedItem
-from app.schemas.order import OrderedItemIn
+from app.schemas.order import OrderedItemIn, OrderOut, OrderPageOut
+from app.services import analytics_service
+from app.services.notification_dispatcher import dispatcher, enqueue_notification
+from app.services.order_events import order_events
+from app.utils import telegram_notifier
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def order_filters(
+    status_filter: Optional[OrderStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    model=Order,
+) -> list:
+    """
+    WHERE clauses shared by the order listing and export queries.
+    created_from is inclusive, created_to is exclusive. model=ArchivedOrder
+    gives the same clauses for the archive table.
+    """
+    clauses = []
+    if status_filter is not None:
+        clauses.append(model.status == status_filter)
+    if created_from is not None:
+        clauses.append(model.created_at >= created_from)
+    if created_to is not None:
+        clauses.append(model.created_at < created_to)
+    return clauses
+
+
+def order_page_statement(filters: Sequence, cursor: Optional[str], limit: int) -> Select:
+    """
+    Keyset pagination on (created_at, id), newest first. Each page is a range
+    scan on ix_orders_created_at_id (or the status variant), so deep pages
+    cost the same as the first one. Fetches one extra row to detect a next page.
+    """
+    stmt = select(Order).where(*filters)
+    if cursor:
+        after_created_at, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(after_created_at, after_id))
+    return stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+
+
+def order_detail_statement(order_id: str) -> Select:
+    """
+    An order with its items and their products in two queries, however many
+    items it has: the order, then its items joined to products.
+    """
+    return (
+        select(Order)
+        .where(Order.id == order_id)
+        .options(selectinload(Order.items).joinedload(OrderedItem.product, innerjoin=True))
+    )
+
+
+def order_out(order: Order) -> OrderOut:
+    # Loaded rows are already well-typed, so the response model skips validation
+    return OrderOut.model_construct(
+        id=order.id,
+        name=order.name,
+        total_price=order.total_price,
+        status=order.status,
+        created_at=order.created_at,
+    )
+
+
+def build_order_page(orders: Sequence[Order], limit: int) -> OrderPageOut:
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    return OrderPageOut.model_construct(items=[order_out(o) for o in orders], next_cursor=next_cursor)
+
 
 def compute_total_and_validate(db: Session, items: List[OrderedItemIn]) -> Tuple[float, List[OrderedItem]]:
     total = 0.0
@@ -19,14 +94,101 @@ def compute_total_and_validate(db: Session, items: List[OrderedItemIn]) -> Tuple
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product not found: {it.product_id}")
         if not product.in_stock:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product out of stock: {product.name}")
+        # Cheap early rejection; the authoritative check is reserve_stock's UPDATE
+        if product.available_kg is not None and product.available_kg < it.quantity_in_kg:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Insufficient stock: {product.name}")
         line_total = it.quantity_in_kg * product.price_per_kg
         total += line_total
-        ordered_rows.append(OrderedItem(product_id=product.id, quantity_in_kg=it.quantity_in_kg))
+        ordered_rows.append(
+            OrderedItem(
+                product_id=product.id,
+                product=product,
+                quantity_in_kg=it.quantity_in_kg,
+                unit_price_per_kg=product.price_per_kg,
+            )
+        )
 
     return total, ordered_rows
 
-def create_order(db: Session, name: str, address: str, phone_number: str, items: List[OrderedItemIn]) -> Order:
+
+def _quantities(rows: Iterable[OrderedItem], products: Dict[str, Product]) -> Dict[str, float]:
+    """Total kg per stock-tracked product."""
+    quantities: Dict[str, float] = defaultdict(float)
+    for row in rows:
+        product = products.get(row.product_id)
+        if product is not None and product.available_kg is not None:
+            quantities[row.product_id] += row.quantity_in_kg
+    return quantities
+
+
+def _stock_update(quantities: Dict[str, float], sign: int):
+    # One statement for the whole order: available_kg +/- CASE id WHEN ... END.
+    # Rows are locked in id order (FOR UPDATE is a no-op on SQLite, whose writer
+    # lock is database-wide), so two orders sharing products cannot deadlock.
+    ids = sorted(quantities)
+    delta = case(quantities, value=Product.id)
+    locked = select(Product.id).where(Product.id.in_(ids)).order_by(Product.id).with_for_update()
+    return (
+        update(Product)
+        .where(Product.id.in_(locked), Product.available_kg.is_not(None))
+        .values(available_kg=Product.available_kg + sign * delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_stock(db: Session, rows: Iterable[OrderedItem]) -> None:
+    """
+    Take the ordered kg off every stock-tracked product in one conditional
+    UPDATE ... WHERE available_kg >= qty. Concurrency is left to the database's
+    row locks: a reservation either fits the stock left by committed orders or
+    matches no row. Raises 409 if any product is short; the caller's transaction
+    is then rolled back, undoing the rows that did match. Stock levels are not
+    part of the catalog snapshot, so no cache version is bumped.
+    """
+    rows = list(rows)
+    # Rows from compute_total_and_validate carry their product. The session's
+    # identity map only holds weak references, so db.get() could go back to SQL.
+    products = {row.product_id: row.product for row in rows}
+    quantities = _quantities(rows, products)
+    if not quantities:
+        return
+    stmt = _stock_update(quantities, -1).where(Product.available_kg >= case(quantities, value=Product.id))
+    if db.get_bind().dialect.update_returning:
+        short = set(quantities) - set(db.scalars(stmt.returning(Product.id)))
+    else:
+        short = set(quantities) if db.execute(stmt).rowcount != len(quantities) else set()
+    if short:
+        names = sorted(products[product_id].name for product_id in short)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Insufficient stock: {', '.join(names)}")
+
+
+def release_stock(db: Session, rows: Iterable[OrderedItem]) -> None:
+    """Give the kg of an order back to its stock-tracked products."""
+    rows = list(rows)
+    if not rows:
+        return
+    # Unlike reserve_stock the products may not be loaded yet; read them in one query
+    products = {p.id: p for p in db.scalars(select(Product).where(Product.id.in_({r.product_id for r in rows})))}
+    quantities = _quantities(rows, products)
+    if quantities:
+        db.execute(_stock_update(quantities, 1))
+
+
+def create_order(
+    db: Session,
+    name: str,
+    address: str,
+    phone_number: str,
+    items: List[OrderedItemIn],
+    before_commit: Optional[Callable[[Session, Order], None]] = None,
+) -> Order:
+    """
+    Validate, reserve stock, insert the order and commit. before_commit runs
+    after the order is flushed, inside the same transaction (e.g. to record the
+    idempotent response together with the order).
+    """
     total, ordered_rows = compute_total_and_validate(db, items)
+    reserve_stock(db, ordered_rows)
 
     order = Order(name=name, address=address, phone_number=phone_number, total_price=total, status=OrderStatus.Pending)
     db.add(order)
@@ -35,7 +197,85 @@ def create_order(db: Session, name: str, address: str, phone_number: str, items:
     for row in ordered_rows:
         row.order_id = order.id
         db.add(row)
+    analytics_service.record_order_created(db, order, ordered_rows)
 
+    # Written in the order's transaction; delivered by the background dispatcher
+    if telegram_notifier.is_configured():
+        enqueue_notification(db, telegram_notifier.format_new_order_message(order))
+
+    if before_commit is not None:
+        before_commit(db, order)
+    order_events.order_created(db, order_out(order))
     db.commit()
+    dispatcher.wake()
+    order_events.committed()
     db.refresh(order)
     return order
+
+
+async def create_order_async(
+    db: AsyncSession,
+    name: str,
+    address: str,
+    phone_number: str,
+    items: List[OrderedItemIn],
+    before_commit: Optional[Callable[[Session, Order], None]] = None,
+) -> Order:
+    # Same unit of work as create_order, run on the async session's connection
+    return await db.run_sync(
+        lambda session: create_order(
+            session, name=name, address=address, phone_number=phone_number, items=items, before_commit=before_commit
+        )
+    )
+
+
+def _conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT, detail="Order was changed concurrently; reload it and retry"
+    )
+
+
+def change_order_status(db: Session, order: Order, new_status: OrderStatus) -> OrderOut:
+    """
+    Compare-and-set on the status that was read: a concurrent change or delete
+    makes the UPDATE match no row, and the caller gets 409 instead of a second
+    rollup delta taken from the same old status. Returns the updated order,
+    built before commit: the row may be deleted as soon as it is committed.
+    """
+    old_status = order.status
+    changed = db.execute(
+        update(Order).where(Order.id == order.id, Order.status == old_status).values(status=new_status)
+    ).rowcount
+    if changed != 1:
+        db.rollback()
+        raise _conflict()
+    analytics_service.record_status_change(db, order, old_status)
+    out = order_out(order)
+    order_events.order_status_changed(db, out, old_status)
+    db.commit()
+    order_events.committed()
+    return out
+
+
+def remove_order(db: Session, order: Order) -> None:
+    old_status = order.status
+    items = list(order.items)
+    order_id = order.id
+    # Same compare-and-set as change_order_status; the order row is claimed
+    # before the rollup and stock rows, in the same lock order as a status change
+    deleted = db.execute(
+        delete(Order).where(Order.id == order_id, Order.status == old_status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if deleted != 1:
+        db.rollback()
+        raise _conflict()
+    # The foreign key cascades on Postgres; SQLite doesn't enforce it
+    db.execute(delete(OrderedItem).where(OrderedItem.order_id == order_id).execution_options(synchronize_session=False))
+    analytics_service.record_order_removed(db, order)
+    # Delivered goods have left the shop; anything else goes back on the shelf
+    if old_status != OrderStatus.Delivered:
+        release_stock(db, items)
+    order_events.order_deleted(db, order_id)
+    db.commit()
+    order_events.committed()
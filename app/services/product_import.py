@@ -0,0 +1,170 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.services.cache_versions import CATALOG
+from app.services.search import record_search_changes
+from app.model.product import Product
+from app.schemas.product import ProductImportResult, ProductImportRow, ProductImportSummary
+
+BULK_IMPORT_MAX_ROWS = 5000
+# Rows per INSERT statement; keeps bound parameters well under SQLite's limit
+BULK_IMPORT_CHUNK_SIZE = 500
+
+UPDATABLE_FIELDS = ("name", "image", "price_per_kg", "in_stock", "available_kg")
+
+
+def read_csv_rows(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse a CSV upload with a header row. Empty cells mean "not provided".
+    Accepts the same column names as the JSON payload (id, name, image, price_per_kg, in_stock, available_kg).
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8 encoded")
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value is not None and value.strip() != ""}
+        for row in reader
+    ]
+
+
+def _validate_rows(raw_rows: List[Any]) -> Tuple[List[Optional[ProductImportRow]], Dict[int, str]]:
+    rows: List[Optional[ProductImportRow]] = []
+    errors: Dict[int, str] = {}
+    for index, raw in enumerate(raw_rows):
+        try:
+            rows.append(ProductImportRow.model_validate(raw))
+        except ValidationError as exc:
+            rows.append(None)
+            errors[index] = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+            )
+    return rows, errors
+
+
+def import_products(db: Session, raw_rows: List[Any]) -> ProductImportSummary:
+    """
+    Validate the whole payload, then create or update every row in one transaction.
+
+    Nothing is written unless every row is valid; otherwise a 422 is raised whose
+    detail carries the per-row summary. Existing products are read in one query,
+    then rows are written as multi-row INSERT ... ON CONFLICT (id) DO UPDATE
+    statements, one per set of provided columns, so a partial row never
+    overwrites columns it did not mention.
+    """
+    if not raw_rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No rows to import")
+    if len(raw_rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {BULK_IMPORT_MAX_ROWS} rows per import",
+        )
+
+    rows, errors = _validate_rows(raw_rows)
+
+    ids = {r.id for r in rows if r and r.id}
+    names = {r.name for r in rows if r and not r.id}
+    existing: Dict[str, Dict[str, Any]] = {}
+    ids_by_name: Dict[str, List[str]] = {}
+    if ids or names:
+        found = db.execute(
+            select(
+                Product.id, Product.name, Product.image, Product.price_per_kg, Product.in_stock, Product.available_kg
+            ).where(or_(Product.id.in_(ids), Product.name.in_(names)))
+        )
+        for row in found:
+            existing[row.id] = row._asdict()
+            ids_by_name.setdefault(row.name, []).append(row.id)
+
+    now = datetime.utcnow()
+    results: List[ProductImportResult] = []
+    # provided columns -> complete rows to write
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    seen_ids: Dict[str, int] = {}
+    seen_new_names: Dict[str, int] = {}
+
+    for index, row in enumerate(rows):
+        if row is None:
+            results.append(ProductImportResult(row=index, action="error", error=errors[index]))
+            continue
+
+        product_id = row.id
+        if product_id is None:
+            matches = ids_by_name.get(row.name, [])
+            if len(matches) > 1:
+                errors[index] = f"Name matches {len(matches)} products; use id instead"
+            elif matches:
+                product_id = matches[0]
+        current = existing.get(product_id) if product_id else None
+        provided = {f: getattr(row, f) for f in UPDATABLE_FIELDS if getattr(row, f) is not None}
+
+        if index not in errors and current is None and ("name" not in provided or "price_per_kg" not in provided):
+            errors[index] = "New products need name and price_per_kg"
+        if index not in errors and product_id is not None and product_id in seen_ids:
+            errors[index] = f"Same product as row {seen_ids[product_id]}"
+        if index not in errors and product_id is None and row.name in seen_new_names:
+            errors[index] = f"Same product as row {seen_new_names[row.name]}"
+        if index in errors:
+            results.append(ProductImportResult(row=index, id=row.id, name=row.name, action="error", error=errors[index]))
+            continue
+
+        if product_id is None:
+            seen_new_names[row.name] = index
+            product_id = str(uuid.uuid4())
+        seen_ids[product_id] = index
+        values = dict(current) if current else {"id": product_id, "image": None, "in_stock": True, "available_kg": None, "created_at": now}
+        values.update(provided, id=product_id, updated_at=now)
+        values.setdefault("created_at", now)
+        groups.setdefault(tuple(sorted(provided)), []).append(values)
+        results.append(
+            ProductImportResult(
+                row=index, id=product_id, name=values["name"], action="updated" if current else "created"
+            )
+        )
+
+    summary = ProductImportSummary(
+        created=sum(r.action == "created" for r in results),
+        updated=sum(r.action == "updated" for r in results),
+        errors=len(errors),
+        results=results,
+    )
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=summary.model_dump())
+
+    for columns, values in groups.items():
+        _write_group(db, columns, values, existing)
+    record_search_changes(db, (r.id for r in results), CATALOG)
+    db.commit()
+    return summary
+
+
+def _write_group(db: Session, columns: Tuple[str, ...], values: List[Dict[str, Any]], existing: Dict[str, Any]) -> None:
+    for start in range(0, len(values), BULK_IMPORT_CHUNK_SIZE):
+        chunk = values[start : start + BULK_IMPORT_CHUNK_SIZE]
+        stmt = dialect_insert(db, Product)
+        if stmt is not None:
+            stmt = stmt.values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Product.id],
+                set_={c: stmt.excluded[c] for c in (*columns, "updated_at")},
+            )
+            db.execute(stmt)
+            continue
+
+        # No native upsert: executemany UPDATE by primary key plus a multi-row INSERT
+        updates = [{k: v[k] for k in ("id", *columns, "updated_at")} for v in chunk if v["id"] in existing]
+        inserts = [v for v in chunk if v["id"] not in existing]
+        if updates:
+            db.execute(update(Product), updates)
+        if inserts:
+            db.execute(Product.__table__.insert(), inserts)
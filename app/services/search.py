@@ -0,0 +1,460 @@
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import merge, nsmallest
+from itertools import product as combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.model.cache_version import CacheVersion
+from app.model.product import Product
+from app.model.search_change import SearchChange
+from app.services.cache_versions import SEARCH, bump, watcher
+
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", "20"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+# Vocabulary words one prefix may expand to ("a" would otherwise pull in half the catalog)
+SEARCH_MAX_PREFIX_EXPANSIONS = int(os.getenv("SEARCH_MAX_PREFIX_EXPANSIONS", "64"))
+# Query words of at least this many characters tolerate one typo, and two from the second length
+SEARCH_FUZZY_MIN_LENGTH = int(os.getenv("SEARCH_FUZZY_MIN_LENGTH", "4"))
+SEARCH_FUZZY_TWO_EDITS_LENGTH = int(os.getenv("SEARCH_FUZZY_TWO_EDITS_LENGTH", "8"))
+MAX_QUERY_WORDS = 6
+# Versions of the search change log kept; a worker further behind rebuilds its index
+SEARCH_CHANGES_KEPT = int(os.getenv("SEARCH_CHANGES_KEPT", "1000"))
+
+# How a product matched one query word, best first; a product ranks by the sum over words
+EXACT, PREFIX, ONE_EDIT, TWO_EDITS = 0, 1, 2, 3
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    # Case- and accent-insensitive: "Jalapeño" is found as "jalapeno"
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"^{word}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance: Levenshtein plus the transposition of
+    two adjacent letters as one edit ("appel" -> "apple"). Returns limit + 1
+    as soon as the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        # A transposition reaches back two rows, but never below the last row's minimum
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class ProductSearchIndex:
+    """
+    In-process index over product names, answering a query without SQL.
+
+    Products live in integer slots. Each name word has a posting set of slots
+    (for intersections) and the same slots as a list kept sorted by
+    (name length, name), the tie-break inside a rank, so the best few of a
+    large match are read off the front of the lists instead of sorting it.
+    The sorted vocabulary answers prefixes with bisect, and a trigram index
+    over the vocabulary finds typo candidates, checked with a bounded edit
+    distance.
+
+    Like catalog_cache it is process-local: every write path that changes a
+    product's name or in_stock logs it with record_search_changes() and calls
+    upsert()/remove() after commit. Other workers apply the logged products
+    in sync_product_index(). `version` is the "search" cache version the
+    index is complete up to; each product remembers the version of its
+    newest change, so a slower re-read never overwrites a newer local write.
+    """
+
+    # Everything rebuild() replaces
+    _STATE = ("_slot_of", "_ids", "_keys", "_words", "_free", "_in_stock", "_postings", "_ranked", "_vocabulary", "_trigrams")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # Changes made while a rebuild runs, replayed onto the new index
+        self._pending: Optional[List[Tuple[str, Optional[str], bool]]] = None
+        self.ready = False
+        # None: unknown, the next sync rebuilds
+        self.version: Optional[int] = None
+        self._changed_at: Dict[str, int] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._slot_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._keys: List[Optional[Tuple[int, str, str]]] = []
+        self._words: List[Tuple[str, ...]] = []
+        self._free: List[int] = []
+        self._in_stock: Set[int] = set()
+        self._postings: Dict[str, Set[int]] = {}
+        self._ranked: Dict[str, List[int]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # -- maintenance ---------------------------------------------------------
+
+    def rebuild(self, rows: Iterable[Tuple[str, str, bool]], version: Optional[int] = None) -> None:
+        """
+        Replace the whole index with (id, name, in_stock) rows, read at or
+        after `version`. The new index is built aside and swapped in, so
+        searches keep being answered from the old one meanwhile; upserts and
+        removes made during the build are replayed onto the new one.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._pending = []
+            fresh = ProductSearchIndex()
+            try:
+                fresh._fill(rows)
+            finally:
+                with self._lock:
+                    pending, self._pending = self._pending, None
+            with self._lock:
+                for product_id, name, in_stock in pending:
+                    fresh._remove(product_id)
+                    if name is not None:
+                        fresh._add(product_id, name, in_stock, keep_order=True)
+                for attribute in self._STATE:
+                    setattr(self, attribute, getattr(fresh, attribute))
+                self.ready = True
+                self.version = version
+                self._changed_at = {
+                    product_id: changed_at
+                    for product_id, changed_at in self._changed_at.items()
+                    if version is not None and changed_at > version
+                }
+
+    def _fill(self, rows: Iterable[Tuple[str, str, bool]]) -> None:
+        for product_id, name, in_stock in rows:
+            self._add(product_id, name, in_stock, keep_order=False)
+        # Filling the ranked lists in key order leaves each of them sorted
+        for slot in sorted(self._slot_of.values(), key=self._keys.__getitem__):
+            for word in self._words[slot]:
+                self._ranked[word].append(slot)
+        self._vocabulary.sort()
+
+    def upsert(self, product_id: str, name: str, in_stock: bool, version: Optional[int] = None) -> None:
+        """Index a product after a write; `version` is what record_search_changes() returned."""
+        with self._lock:
+            if not self._stale(product_id, version):
+                self._replace(product_id, name, in_stock)
+
+    def remove(self, product_id: str, version: Optional[int] = None) -> None:
+        with self._lock:
+            if not self._stale(product_id, version):
+                self._replace(product_id, None, False)
+
+    def apply(self, version: int, changes: Iterable[Tuple[str, int, Optional[str], bool]]) -> None:
+        """
+        Apply (id, version of its change, name, in_stock) rows read after the
+        change log up to `version`, name None for a deleted product; the
+        index is then complete up to `version`.
+        """
+        with self._lock:
+            for product_id, changed_at, name, in_stock in changes:
+                if not self._stale(product_id, changed_at):
+                    self._replace(product_id, name, in_stock)
+            if self.version is None or version > self.version:
+                self.version = version
+
+    def _stale(self, product_id: str, version: Optional[int]) -> bool:
+        # A change older than one already applied to the product is skipped
+        if version is None:
+            return False
+        if self._changed_at.get(product_id, 0) > version:
+            return True
+        self._changed_at[product_id] = version
+        if self.version == version - 1:
+            self.version = version
+        return False
+
+    def _replace(self, product_id: str, name: Optional[str], in_stock: bool) -> None:
+        if self._pending is not None:
+            self._pending.append((product_id, name, in_stock))
+        self._remove(product_id)
+        if name is not None:
+            self._add(product_id, name, in_stock, keep_order=True)
+
+    def _add(self, product_id: str, name: str, in_stock: bool, keep_order: bool) -> None:
+        normalized = normalize(name)
+        slot_words = tuple(dict.fromkeys(_WORD.findall(normalized)))
+        key = (len(normalized), normalized, product_id)
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot], self._keys[slot], self._words[slot] = product_id, key, slot_words
+        else:
+            slot = len(self._ids)
+            self._ids.append(product_id)
+            self._keys.append(key)
+            self._words.append(slot_words)
+        self._slot_of[product_id] = slot
+        if in_stock:
+            self._in_stock.add(slot)
+        for word in slot_words:
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = set()
+                self._ranked[word] = []
+                if keep_order:
+                    insort(self._vocabulary, word)
+                else:
+                    self._vocabulary.append(word)
+                for gram in trigrams(word):
+                    self._trigrams.setdefault(gram, set()).add(word)
+            posting.add(slot)
+            if keep_order:
+                insort(self._ranked[word], slot, key=self._keys.__getitem__)
+
+    def _remove(self, product_id: str) -> None:
+        slot = self._slot_of.pop(product_id, None)
+        if slot is None:
+            return
+        self._in_stock.discard(slot)
+        for word in self._words[slot]:
+            posting = self._postings[word]
+            posting.discard(slot)
+            if not posting:
+                del self._postings[word]
+                del self._ranked[word]
+                del self._vocabulary[bisect_left(self._vocabulary, word)]
+                for gram in trigrams(word):
+                    self._trigrams[gram].discard(word)
+            else:
+                ranked = self._ranked[word]
+                del ranked[bisect_left(ranked, self._keys[slot], key=self._keys.__getitem__)]
+        self._ids[slot], self._keys[slot], self._words[slot] = None, None, ()
+        self._free.append(slot)
+
+    # -- queries -------------------------------------------------------------
+
+    def search(self, query: str, limit: int = SEARCH_DEFAULT_LIMIT, in_stock: Optional[bool] = None) -> List[str]:
+        """
+        Ids of the products whose name matches every query word, best first:
+        exact words, then prefixes, then one and two typos; shorter names
+        first within a rank.
+        """
+        query_words = list(dict.fromkeys(words(query)))[:MAX_QUERY_WORDS]
+        if not query_words or limit <= 0:
+            return []
+        with self._lock:
+            # Per query word: rank -> (slots whose best match for the word has that rank, vocabulary words behind them)
+            tiers = [self._tiers(word) for word in query_words]
+            if not all(tiers):
+                return []
+            by_total: Dict[int, List[Tuple[int, ...]]] = {}
+            for combination in combinations(*(sorted(t) for t in tiers)):
+                by_total.setdefault(sum(combination), []).append(combination)
+            results: List[int] = []
+            for total in sorted(by_total):
+                level: List[int] = []
+                for combination in by_total[total]:
+                    parts = sorted((tiers[i][rank] for i, rank in enumerate(combination)), key=lambda part: len(part[0]))
+                    slots, sources = parts[0]
+                    required = [part[0] for part in parts[1:]]
+                    if in_stock is True:
+                        required.append(self._in_stock)
+                    excluded = self._in_stock if in_stock is False else None
+                    # Each combination is disjoint from the others; keep its best and merge below
+                    level.extend(self._best(slots, sources, required, excluded, limit - len(results)))
+                if len(by_total[total]) > 1:
+                    level.sort(key=self._keys.__getitem__)
+                results.extend(level[: limit - len(results)])
+                if len(results) >= limit:
+                    break
+            return [self._ids[slot] for slot in results]
+
+    def _tiers(self, word: str) -> Dict[int, Tuple[Set[int], List[str]]]:
+        matches: Dict[int, Tuple[Set[int], List[str]]] = {}
+        exact = self._postings.get(word)
+        if exact:
+            matches[EXACT] = (exact, [word])
+        start = bisect_left(self._vocabulary, word)
+        prefix_words = [
+            candidate
+            for candidate in self._vocabulary[start : start + SEARCH_MAX_PREFIX_EXPANSIONS + 1]
+            if candidate.startswith(word) and candidate != word
+        ]
+        # Union only when needed: posting sets are never modified here
+        prefixed = self._postings[prefix_words[0]] if len(prefix_words) == 1 else set().union(
+            *(self._postings[candidate] for candidate in prefix_words)
+        )
+        for rank, found, sources in ((PREFIX, prefixed, prefix_words), *self._fuzzy(word)):
+            # A slot keeps only its best rank for this word
+            for better, _ in matches.values():
+                found = found - better
+            if found:
+                matches[rank] = (found, sources)
+        return matches
+
+    def _fuzzy(self, word: str) -> List[Tuple[int, Set[int], List[str]]]:
+        if len(word) < SEARCH_FUZZY_MIN_LENGTH:
+            return []
+        max_edits = 2 if len(word) >= SEARCH_FUZZY_TWO_EDITS_LENGTH else 1
+        grams = trigrams(word)
+        shared: Counter = Counter()
+        for gram in grams:
+            candidates = self._trigrams.get(gram)
+            if candidates:
+                shared.update(candidates)
+        # Each edit destroys at most three of the word's trigrams, a transposition four
+        needed = max(1, len(grams) - 4 * max_edits)
+        found: Dict[int, Tuple[Set[int], List[str]]] = {}
+        for candidate, count in shared.items():
+            if count < needed or candidate == word:
+                continue
+            distance = edit_distance(word, candidate, max_edits)
+            if distance <= max_edits:
+                slots, sources = found.setdefault(ONE_EDIT + distance - 1, (set(), []))
+                slots |= self._postings[candidate]
+                sources.append(candidate)
+        return [(rank, slots, sources) for rank, (slots, sources) in sorted(found.items())]
+
+    def _best(
+        self, slots: Set[int], sources: List[str], required: List[Set[int]], excluded: Optional[Set[int]], count: int
+    ) -> List[int]:
+        """
+        The first `count` slots in key order that are in `slots` and every
+        `required` set but not in `excluded`; the postings of `sources` cover `slots`.
+        """
+        if not slots or count <= 0:
+            return []
+        ranked = [self._ranked[word] for word in sources]
+        covered = sum(len(r) for r in ranked)
+        # Estimated matches, taking the sets as independent
+        expected = float(len(slots))
+        for other in required:
+            expected *= len(other) / len(self._slot_of)
+        if excluded is not None:
+            expected *= 1 - len(excluded) / len(self._slot_of)
+        # Walking the ranked lists takes ~count * covered / expected steps; selecting from the matches ~expected
+        if expected * expected <= count * covered:
+            matches = slots.intersection(*required) if required else slots
+            if excluded is not None:
+                matches = matches - excluded
+            return nsmallest(count, matches, key=self._keys.__getitem__)
+        walk = ranked[0] if len(ranked) == 1 else merge(*ranked, key=self._keys.__getitem__)
+        best: List[int] = []
+        for slot in walk:
+            if (
+                slot in slots
+                and all(slot in other for other in required)
+                and (excluded is None or slot not in excluded)
+                # A slot in several source lists (e.g. "apples" and "applesauce") comes up once per list
+                and (len(ranked) == 1 or slot not in best)
+            ):
+                best.append(slot)
+                if len(best) == count:
+                    break
+        return best
+
+
+product_index = ProductSearchIndex()
+
+
+def index_rows_statement():
+    return select(Product.id, Product.name, Product.in_stock)
+
+
+def load_product_index(db: Session) -> None:
+    # The stamp before the rows: a write in between is in the rows and applied again by the next sync
+    version = watcher.version(SEARCH)
+    product_index.rebuild(db.execute(index_rows_statement()), version)
+
+
+def reload_product_index() -> None:
+    """Rebuild from the primary, e.g. at startup."""
+    with ReadSessionLocal() as db:
+        load_product_index(db)
+
+
+def record_search_changes(db: Session, product_ids: Iterable[str], *also_bump: str) -> int:
+    """
+    Bump the "search" cache version (and also_bump) and log the products the
+    write changes, in the caller's transaction: last before commit, like
+    bump(). Returns the version, for upsert()/remove() after commit.
+    """
+    version = bump(db, SEARCH, *also_bump)[SEARCH]
+    db.add_all([SearchChange(version=version, product_id=product_id) for product_id in set(product_ids)])
+    return version
+
+
+_sync_lock = threading.Lock()
+_pruned_at = 0
+
+
+def sync_product_index() -> None:
+    """
+    Catch up with product writes made elsewhere: re-read only the products
+    logged since the index's version. Rebuilds when the index has no version
+    or the log no longer reaches back to it.
+    """
+    with _sync_lock, ReadSessionLocal() as db:
+        known = product_index.version
+        current = db.scalar(select(CacheVersion.version).where(CacheVersion.name == SEARCH))
+        if current is None or (known is not None and current <= known):
+            return
+        logged = []
+        if known is not None and current - known <= SEARCH_CHANGES_KEPT:
+            logged = db.execute(
+                select(SearchChange.version, SearchChange.product_id)
+                .where(SearchChange.version > known, SearchChange.version <= current)
+            ).all()
+        # Every version in between must be logged: one that was pruned, or bumped without a log, means rebuild
+        if known is None or {version for version, _ in logged} != set(range(known + 1, current + 1)):
+            product_index.rebuild(db.execute(index_rows_statement()), current)
+        else:
+            changed_at: Dict[str, int] = {}
+            for version, product_id in logged:
+                changed_at[product_id] = max(version, changed_at.get(product_id, 0))
+            rows = {row.id: row for row in db.execute(index_rows_statement().where(Product.id.in_(changed_at)))}
+            product_index.apply(current, [
+                (product_id, version, rows[product_id].name, rows[product_id].in_stock) if product_id in rows
+                else (product_id, version, None, False)
+                for product_id, version in changed_at.items()
+            ])
+    _prune_search_changes(current)
+
+
+def _prune_search_changes(current: int) -> None:
+    # Every worker syncing does this, once per SEARCH_CHANGES_KEPT versions
+    global _pruned_at
+    if current - _pruned_at < SEARCH_CHANGES_KEPT:
+        return
+    with SessionLocal() as db:
+        db.execute(delete(SearchChange).where(SearchChange.version <= current - SEARCH_CHANGES_KEPT))
+        db.commit()
+    _pruned_at = current
+
+
+watcher.watch(SEARCH, sync_product_index)
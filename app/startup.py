@@ -0,0 +1,195 @@
+"""
+Application lifespan: everything that used to happen at import time (schema
+creation, upload directories) plus explicit warm-up, so importing app.main
+touches neither the database nor the filesystem.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy.pool import QueuePool
+
+import app.model  # noqa: F401  (registers every mapper before configure_mappers)
+from app.db import session as db_session
+from app.db.base import Base
+from app.routes.discount import _build_discount_body, discount_cache
+from app.routes.product import _build_catalog_body
+from app.services import cache_versions, image_variants
+from app.services.catalog import catalog_cache
+from app.services.notification_dispatcher import dispatcher
+from app.services.order_events import order_events
+from app.services.search import load_product_index, product_index, reload_product_index
+from app.utils.telegram_notifier import is_configured as notifier_configured
+from app.utils.uploads import ensure_upload_dirs
+
+# Dev convenience only: create missing tables at startup. Production schema
+# changes go through Alembic (alembic upgrade head) before the workers start.
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "0") == "1"
+# Open pool connections, configure mappers and fill the snapshot caches before
+# the first request instead of on it
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "1") != "0"
+# Connections opened per pool (capped at the pool size)
+STARTUP_PREWARM_CONNECTIONS = int(os.getenv("STARTUP_PREWARM_CONNECTIONS", "2"))
+# Catalog snapshots are keyed by the public base URL clients use
+# ("https://api.example.com"); comma-separated, empty to skip
+STARTUP_PREWARM_BASES = [
+    base.strip().rstrip("/") for base in os.getenv("STARTUP_PREWARM_BASES", "").split(",") if base.strip()
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _distinct(engines) -> List:
+    unique = []
+    for engine in engines:
+        if engine is not None and all(engine is not seen for seen in unique):
+            unique.append(engine)
+    return unique
+
+
+def _sync_engines() -> List:
+    return _distinct((db_session.engine, db_session.read_engine, db_session.replica_engine))
+
+
+def _async_engines() -> List:
+    return _distinct((db_session.async_engine, db_session.async_read_engine, db_session.async_replica_engine))
+
+
+def _connections_for(pool) -> int:
+    if isinstance(pool, QueuePool):
+        return max(1, min(STARTUP_PREWARM_CONNECTIONS, pool.size()))
+    return 1
+
+
+def create_schema() -> None:
+    Base.metadata.create_all(bind=db_session.engine)
+    with db_session.SessionLocal() as db:
+        cache_versions.seed(db)
+        db.commit()
+
+
+def _prewarm_sync_pools(engines) -> None:
+    for engine in engines:
+        # Hold them all at once so the pool really opens that many connections
+        with ExitStack() as stack:
+            for _ in range(_connections_for(engine.pool)):
+                connection = stack.enter_context(engine.connect())
+                connection.execute(text("SELECT 1"))
+
+
+async def _prewarm_async_pools(engines) -> None:
+    for engine in engines:
+        async with AsyncExitStack() as stack:
+            for _ in range(_connections_for(engine.sync_engine.pool)):
+                connection = await stack.enter_async_context(engine.connect())
+                await connection.execute(text("SELECT 1"))
+
+
+def _warm_caches(db: Session) -> None:
+    # Compiles the catalog and discount queries into the engine's statement cache
+    # and builds the pydantic serializers, even when no snapshot gets stored.
+    # Storing compresses too (hundreds of milliseconds for a large catalog).
+    generation = discount_cache.generation
+    discount_cache.store("discount", _build_discount_body(db), generation)
+    generation = catalog_cache.generation
+    for base in STARTUP_PREWARM_BASES or [""]:
+        body = _build_catalog_body(db, base)
+        if base:
+            catalog_cache.store(base, body, generation)
+
+
+def _prewarm_sync() -> None:
+    _prewarm_sync_pools(_sync_engines())
+    with db_session.ReadSessionLocal() as db:
+        _warm_caches(db)
+
+
+async def prewarm() -> None:
+    """
+    Best effort: a database that is down or not migrated yet is logged, not
+    fatal, so the worker still starts and recovers once the database does.
+    """
+    started = time.perf_counter()
+    configure_mappers()
+    try:
+        if db_session.ASYNC_DB:
+            await _prewarm_async_pools(_async_engines())
+            async with db_session.AsyncReadSessionLocal() as db:
+                await db.run_sync(_warm_caches)
+        else:
+            await run_in_threadpool(_prewarm_sync)
+    except SQLAlchemyError as exc:
+        logger.warning("Startup prewarm skipped the database: %s", exc)
+        return
+    logger.info("Startup prewarm finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+async def build_search_index() -> None:
+    """Not part of the optional prewarm: search needs it. If it fails, the first search builds it."""
+    started = time.perf_counter()
+    try:
+        if db_session.ASYNC_DB:
+            async with db_session.AsyncReadSessionLocal() as db:
+                await db.run_sync(load_product_index)
+        else:
+            await run_in_threadpool(reload_product_index)
+    except SQLAlchemyError as exc:
+        logger.warning("Product search index not built at startup: %s", exc)
+        return
+    logger.info("Indexed %d products for search in %.0f ms", len(product_index), (time.perf_counter() - started) * 1000)
+
+
+async def read_cache_versions() -> None:
+    """
+    Record the current stamps before the caches are filled, so the watcher
+    only reloads for writes made after that. If the database is unreachable
+    the first successful poll reloads everything.
+    """
+    try:
+        await run_in_threadpool(cache_versions.watcher.refresh, False)
+    except SQLAlchemyError as exc:
+        logger.warning("Cache versions not read at startup: %s", exc)
+
+
+async def dispose_engines() -> None:
+    for engine in _async_engines():
+        await engine.dispose()
+    for engine in _sync_engines():
+        engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_upload_dirs()
+    if DB_CREATE_ALL:
+        await run_in_threadpool(create_schema)
+    await read_cache_versions()
+    if STARTUP_PREWARM:
+        await prewarm()
+    await build_search_index()
+    cache_versions.watcher.start()
+    order_events.bind(asyncio.get_running_loop())
+    order_events.start()
+    if notifier_configured():
+        dispatcher.start()
+    try:
+        yield
+    finally:
+        # Ends the event streams still open. uvicorn only gets here once open
+        # responses have finished, so a stopping worker is held by its streams
+        # for at most --timeout-graceful-shutdown (see render.yaml), after
+        # which uvicorn cancels them; without it, ORDER_EVENTS_MAX_STREAM_SECONDS.
+        order_events.close()
+        order_events.stop()
+        cache_versions.watcher.stop()
+        dispatcher.stop()
+        image_variants.shutdown()
+        await dispose_engines()
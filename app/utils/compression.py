@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+# Compressed event streams sit in proxy buffers and defeat the point; keep them plain
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Content-codings we can produce, in order of preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class CompressionStats:
+    """Per-encoding counters; CPU time is measured with thread_time around each compress call."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+            )
+            entry["responses"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {encoding: dict(entry) for encoding, entry in self._stats.items()}
+
+
+compression_stats = CompressionStats()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, honoring q=0; None for identity."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """One-shot compression, recorded in compression_stats."""
+    started = time.thread_time()
+    if encoding == "br":
+        out = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        out = _gzip_compressor(GZIP_LEVEL)
+        out = out.compress(data) + out.flush()
+    compression_stats.record(encoding, len(data), len(out), time.thread_time() - started)
+    return out
+
+
+def _gzip_compressor(level: int):
+    # wbits=31 selects the gzip container
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        self.bytes_in = self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = _gzip_compressor(GZIP_LEVEL)
+
+    def feed(self, data: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        if self.encoding == "br":
+            out = self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+        else:
+            out = self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        if final:
+            compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+        return out
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for compressible response types.
+
+    Single-message bodies below minimum_size go out untouched. Streaming bodies
+    (e.g. the order export) are compressed incrementally and flushed per chunk.
+    Responses that already carry a Content-Encoding, such as precompressed
+    snapshots, are passed through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] < 200
+                    or message["status"] in (204, 206, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(UNCOMPRESSED_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                headers["content-encoding"] = encoding
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    headers["content-length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    passthrough = True
+                    return
+                del headers["content-length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start_message)
+            await send({"type": "http.response.body", "body": compressor.feed(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
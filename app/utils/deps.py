@@ -1,6 +1,17 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.db.session import (
+    DATABASE_REPLICA_URL,
+    AsyncReadSessionLocal,
+    AsyncReplicaSessionLocal,
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    ReplicaSessionLocal,
+    SessionLocal,
+)
+from app.utils.read_routing import reads_from_primary
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -8,3 +19,41 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Read-only session that never lags the primary; may use a read-only connection pool."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_replica_db(request: Request) -> Generator[Session, None, None]:
+    """Read-only session on the replica, or on the primary inside the client's read-your-writes window."""
+    primary = reads_from_primary(request, DATABASE_REPLICA_URL is not None)
+    factory = ReadSessionLocal if primary else ReplicaSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires DB_MODE=async")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    if AsyncReadSessionLocal is None:
+        raise RuntimeError("Async database access requires DB_MODE=async")
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def get_async_replica_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    if AsyncReadSessionLocal is None:
+        raise RuntimeError("Async database access requires DB_MODE=async")
+    primary = reads_from_primary(request, DATABASE_REPLICA_URL is not None)
+    factory = AsyncReadSessionLocal if primary else AsyncReplicaSessionLocal
+    async with factory() as db:
+        yield db
@@ -0,0 +1,328 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import compression_stats
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Pool checkouts are usually instant; the interesting tail is waiting for a free connection
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+_KNOWN_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+_KNOWN_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "WITH"))
+# Emitted explicitly on some backends only (the SQLite profile); not counted per request
+_TRANSACTION_CONTROL = frozenset(("BEGIN", "COMMIT", "ROLLBACK"))
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Scalar(_Metric):
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[LabelValues, float]]] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        # Values owned by another component are read from the callback at scrape time
+        self._callback = callback
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        if self._callback is not None:
+            values = self._callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in sorted(values.items())
+        ]
+
+
+class Counter(_Scalar):
+    kind = "counter"
+
+
+class Gauge(_Scalar):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (not cumulative) + overflow, sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(counts), total)) for k, (counts, total) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+)
+http_duration = registry.register(
+    Histogram("http_request_duration_seconds", "Time to the end of the response body.", ("method", "route"))
+)
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "Requests being served right now."))
+db_statements = registry.register(
+    Histogram(
+        "db_statements_per_request", "SQL statements executed per request.", ("route",), buckets=STATEMENT_COUNT_BUCKETS
+    )
+)
+db_request_seconds = registry.register(
+    Histogram("db_time_per_request_seconds", "Time spent executing SQL per request.", ("route",))
+)
+db_statement_seconds = registry.register(
+    Histogram("db_statement_duration_seconds", "Duration of single SQL statements.", ("operation",))
+)
+db_pool_wait = registry.register(
+    Histogram("db_pool_checkout_wait_seconds", "Time to obtain a connection from the pool.", ("pool",), buckets=POOL_WAIT_BUCKETS)
+)
+
+
+# Engines whose pools are reported; read at scrape time so a disposed pool is replaced too
+_engines: Dict[str, Engine] = {}
+
+
+def _pool_values(read: Callable[[object], float]) -> Callable[[], Dict[LabelValues, float]]:
+    def collect() -> Dict[LabelValues, float]:
+        values = {}
+        for name, engine in list(_engines.items()):
+            try:
+                values[(name,)] = read(engine.pool)
+            except (AttributeError, TypeError):
+                pass  # pool classes without a fixed size (SingletonThreadPool, NullPool)
+        return values
+
+    return collect
+
+
+registry.register(
+    Gauge("db_pool_checked_out", "Connections currently checked out.", ("pool",), callback=_pool_values(lambda p: p.checkedout()))
+)
+registry.register(Gauge("db_pool_size", "Configured pool size.", ("pool",), callback=_pool_values(lambda p: p.size())))
+registry.register(
+    Gauge(
+        "db_pool_utilization",
+        "Checked-out connections as a fraction of the pool size (above 1 while in overflow).",
+        ("pool",),
+        callback=_pool_values(lambda p: p.checkedout() / p.size()),
+    )
+)
+
+
+def _compression_values(field: str) -> Callable[[], Dict[LabelValues, float]]:
+    return lambda: {(encoding,): entry[field] for encoding, entry in compression_stats.snapshot().items()}
+
+
+for _field, _doc in (
+    ("responses", "Responses compressed."),
+    ("bytes_in", "Bytes before compression."),
+    ("bytes_out", "Bytes after compression."),
+    ("cpu_seconds", "CPU time spent compressing."),
+):
+    registry.register(
+        Counter(f"http_compression_{_field}_total", _doc, ("encoding",), callback=_compression_values(_field))
+    )
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request; the engine hooks add to it.
+# Threadpool handlers and AsyncSession.run_sync inherit the context, so they share the object.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template (/api/orders/{order_id}), never the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Per-route request counts and latency, in-flight requests and per-request SQL
+    statistics. Routes are labelled by template, so label cardinality is bounded
+    by the number of routes rather than by ids in URLs.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in _KNOWN_METHODS else "OTHER"
+        status_code = 500
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            current_request_stats.reset(token)
+            route = route_template(scope)
+            http_requests.inc((method, route, str(status_code)))
+            http_duration.observe(elapsed, (method, route))
+            db_statements.observe(stats.statements, (route,))
+            db_request_seconds.observe(stats.db_seconds, (route,))
+
+
+class _TimedCheckout:
+    # Mixed into a QueuePool class; _do_get is where a checkout blocks when the pool is exhausted
+    _metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started, (self._metrics_name,))
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics_name = self._metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    head = statement.lstrip()[:9].split(None, 1)
+    operation = head[0].upper() if head else ""
+    db_statement_seconds.observe(elapsed, (operation if operation in _KNOWN_OPERATIONS else "OTHER",))
+    stats = current_request_stats.get()
+    if stats is not None and operation not in _TRANSACTION_CONTROL:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time every statement on `engine` and report its pool as `name`. Pass
+    AsyncEngine.sync_engine. Installed even with METRICS_ENABLED=0, since the
+    query budgets count statements through the same hooks.
+    """
+    _engines[name] = engine
+    if isinstance(engine.pool, _TimedCheckout):
+        engine.pool._metrics_name = name
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,65 +1,198 @@
-from typing import Callable, Optional
+import ipaddress
+import os
+import re
+from typing import List, Optional, Tuple, Union
 
-from starlette.datastructures import URL
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+# Comma-separated IPs/CIDRs of the reverse proxies allowed to set forwarding
+# headers, or "*" when the app is only reachable through a proxy (e.g. Render).
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1")
+
+# Trust decisions are cached per client address; a keep-alive connection pays
+# for the CIDR check once. The cache is simply dropped when it fills up.
+TRUST_CACHE_SIZE = 4096
+
+_IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+_FORWARDING_HEADERS = frozenset((b"forwarded", b"x-forwarded-for", b"x-forwarded-proto", b"x-forwarded-host"))
+
+# One forwarded-pair of RFC 7239: token "=" ( token / quoted-string ), plus the separator after it
+_FORWARDED_PAIR = re.compile(r'\s*([^=;,\s]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;,\s]*)\s*([;,]?)')
+# Quoted strings holding a separator or an escape need the full grammar
+_NEEDS_FULL_PARSE = re.compile(r'"[^"]*[,;\\]')
+
+
+class TrustedProxies:
+    """Precompiled set of proxy networks with a per-address decision cache."""
+
+    def __init__(self, spec: str) -> None:
+        entries = [e.strip() for e in spec.split(",") if e.strip()]
+        self.trust_all = "*" in entries
+        self.networks: List[_IPNetwork] = [ipaddress.ip_network(e, strict=False) for e in entries if e != "*"]
+        self._cache: dict = {}
+
+    def __contains__(self, host: Optional[str]) -> bool:
+        if self.trust_all:
+            return True
+        if not host:
+            return False
+        trusted = self._cache.get(host)
+        if trusted is None:
+            try:
+                address = ipaddress.ip_address(host)
+            except ValueError:
+                trusted = False
+            else:
+                trusted = any(address in network for network in self.networks)
+            if len(self._cache) >= TRUST_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[host] = trusted
+        return trusted
+
+
+def parse_forwarded(value: str) -> List[dict]:
+    """Elements of an RFC 7239 Forwarded header, leftmost (closest to the client) first."""
+    if not _NEEDS_FULL_PARSE.search(value):
+        # Common case: plain split, about 5x cheaper than the regex below
+        elements = []
+        for element in value.split(","):
+            pairs = {}
+            for pair in element.split(";"):
+                key, sep, raw = pair.partition("=")
+                if sep:
+                    pairs[key.strip().lower()] = raw.strip().strip('"')
+            if pairs:
+                elements.append(pairs)
+        return elements
+    elements: List[dict] = [{}]
+    for match in _FORWARDED_PAIR.finditer(value):
+        key, raw, separator = match.groups()
+        if raw.startswith('"'):
+            raw = re.sub(r"\\(.)", r"\1", raw[1:-1])
+        elements[-1][key.lower()] = raw
+        if separator == ",":
+            elements.append({})
+    return [e for e in elements if e]
+
+
+def _forwarded_node(node: str) -> str:
+    # for= may carry a port and IPv6 is bracketed: "[2001:db8::1]:4711", "192.0.2.1:80"
+    if node.startswith("["):
+        return node[1 : node.find("]")] if "]" in node else node
+    if node.count(":") == 1:
+        return node.split(":", 1)[0]
+    return node
+
+
+def _split_host(host: str, scheme: str) -> Tuple[str, int]:
+    default_port = 443 if scheme in ("https", "wss") else 80
+    name, sep, port = host.rpartition(":")
+    # A bare IPv6 literal ("[::1]") has colons but no port
+    if not sep or name.endswith(":") or host.endswith("]"):
+        return host.strip("[]"), default_port
+    try:
+        return name.strip("[]"), int(port)
+    except ValueError:
+        return name.strip("[]"), default_port
+
 
 class ProxyHeaderMiddleware:
     """
-    Minimal middleware to honor X-Forwarded-* headers from a trusted proxy.
+    Apply Forwarded / X-Forwarded-* headers set by a trusted reverse proxy.
 
-    Notes:
-    - Only enable when behind a proxy that sets these headers correctly.
-    - In production, validate the client IP is one of your proxy IPs before trusting headers.
+    Headers are only honored when the direct peer is in `trusted_proxies`.
+    Forwarded (RFC 7239) wins over the X-Forwarded-* family. The client is the
+    rightmost address in the chain that is not itself a trusted proxy, so a
+    client cannot spoof its IP by sending its own X-Forwarded-For. With "*"
+    only the direct peer is vouched for, so the client is the rightmost entry.
+    Scheme and Host come from what the proxy nearest the client appended,
+    never from values the client sent. The raw header list is scanned once,
+    and only Host is ever rewritten.
     """
 
-    def __init__(self, app: ASGIApp, trust: bool = True) -> None:
+    def __init__(self, app: ASGIApp, trusted_proxies: str = TRUSTED_PROXIES) -> None:
         self.app = app
-        self.trust = trust
+        self.trusted = TrustedProxies(trusted_proxies)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if scope.get("type") != "http" or not self.trust:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        client = scope.get("client")
+        if (client[0] if client else None) not in self.trusted:
             await self.app(scope, receive, send)
             return
 
-        headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
-
-        forwarded_proto = headers.get("x-forwarded-proto")
-        forwarded_host = headers.get("x-forwarded-host") or headers.get("host")
-        forwarded_for = headers.get("x-forwarded-for")
-
-        if forwarded_proto:
-            scope["scheme"] = forwarded_proto.split(",")[0].strip()
-
-        if forwarded_host:
-            server_host = forwarded_host.split(",")[0].strip()
-            # Preserve port if provided
-            if ":" in server_host:
-                host, port_str = server_host.rsplit(":", 1)
-                try:
-                    port = int(port_str)
-                except ValueError:
-                    port = 443 if scope.get("scheme") == "https" else 80
-                scope["server"] = (host, port)
-                # Update Host header
-                self._set_header(scope, b"host", server_host.encode())
+        headers = scope["headers"]
+        forwarded = x_proto = x_host = x_for = None
+        # ASGI servers lower-case header names, so raw bytes compare directly
+        # and one set membership test is all an unrelated header costs.
+        for key, value in headers:
+            if key not in _FORWARDING_HEADERS:
+                continue
+            if key == b"x-forwarded-for":
+                x_for = value if x_for is None else x_for + b"," + value
+            elif key == b"x-forwarded-proto":
+                x_proto = value
+            elif key == b"x-forwarded-host":
+                x_host = value
             else:
-                scope["server"] = (server_host, 443 if scope.get("scheme") == "https" else 80)
-                self._set_header(scope, b"host", server_host.encode())
+                forwarded = value if forwarded is None else forwarded + b"," + value
 
-        # Optionally set client IP from X-Forwarded-For (first is original client)
-        if forwarded_for:
-            client_ip = forwarded_for.split(",")[0].strip()
-            scope["client"] = (client_ip, scope.get("client", (None, 0))[1] or 0)
+        if forwarded is None and x_proto is None and x_host is None and x_for is None:
+            await self.app(scope, receive, send)
+            return
+
+        proto = host = client_host = None
+        if forwarded is not None:
+            elements = parse_forwarded(forwarded.decode("latin-1"))
+            if elements:
+                chain = [_forwarded_node(e.get("for", "")) for e in elements]
+                # The element appended by the proxy that received the client's request
+                index = self._client_index(chain)
+                proto = elements[index].get("proto")
+                host = elements[index].get("host")
+                client_host = chain[index] or None
+        else:
+            # Proxies either overwrite these or append to them: the last value is theirs
+            if x_proto is not None:
+                proto = x_proto.decode("latin-1").rsplit(",", 1)[-1].strip()
+            if x_host is not None:
+                host = x_host.decode("latin-1").rsplit(",", 1)[-1].strip()
+            if x_for is not None:
+                chain = [node.strip() for node in x_for.decode("latin-1").split(",")]
+                client_host = chain[self._client_index(chain)] or None
+
+        if proto:
+            scope["scheme"] = proto.lower() if scope["type"] == "http" else ("wss" if proto.lower() == "https" else "ws")
+        if host:
+            scope["server"] = _split_host(host, scope["scheme"])
+            self._replace_host(scope, host.encode("latin-1"))
+        if client_host:
+            scope["client"] = (client_host, client[1] if client else 0)
 
         await self.app(scope, receive, send)
 
     @staticmethod
-    def _set_header(scope: Scope, key: bytes, value: bytes) -> None:
-        headers = scope.get("headers") or []
-        # Remove existing key
-        headers = [(k, v) for (k, v) in headers if k.lower() != key.lower()]
-        headers.append((key, value))
-        scope["headers"] = headers
-
+    def _replace_host(scope: Scope, host: bytes) -> None:
+        headers = scope["headers"]
+        if not isinstance(headers, list):
+            headers = scope["headers"] = list(headers)
+        for index, (key, _) in enumerate(headers):
+            if key == b"host":
+                headers[index] = (b"host", host)
+                return
+        headers.append((b"host", host))
 
+    def _client_index(self, chain: List[str]) -> int:
+        """Index of the client in a non-empty forwarding chain (leftmost = closest to the client)."""
+        if self.trusted.trust_all:
+            # Only the direct peer is known to be a proxy; anything left of its entry may be forged
+            return len(chain) - 1
+        for index in range(len(chain) - 1, -1, -1):
+            # An unknown or obfuscated hop can't be vouched for either
+            if not chain[index] or chain[index] not in self.trusted:
+                return index
+        # Every hop is a trusted proxy, so every entry was appended by one
+        return 0
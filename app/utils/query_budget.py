@@ -0,0 +1,91 @@
+import logging
+import os
+from typing import Callable, Optional, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import RequestStats, current_request_stats
+
+# "off" (default), "log" to warn about routes over budget, or "enforce" to fail
+# the request: meant for tests and CI, where an N+1 regression should break the build
+QUERY_BUDGET_MODE = (os.getenv("QUERY_BUDGET_MODE") or "off").lower()
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(statements: int) -> Callable[[F], F]:
+    """
+    Declare the most SQL statements a route may execute per request. The count
+    must not depend on the size of the data (items in an order, products in
+    the catalog), which is exactly what an N+1 query breaks.
+    """
+
+    def decorate(endpoint: F) -> F:
+        endpoint.query_budget = statements
+        return endpoint
+
+    return decorate
+
+
+def _budget(scope: Scope) -> Optional[int]:
+    route = scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "query_budget", None)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the statements of each request (through the engine hooks in
+    app.utils.metrics) and compare them with the route's @query_budget, when
+    the response starts and again when it ends, so streamed bodies count too.
+    """
+
+    def __init__(self, app: ASGIApp, mode: str = QUERY_BUDGET_MODE) -> None:
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.mode not in ("log", "enforce"):
+            await self.app(scope, receive, send)
+            return
+
+        # Share MetricsMiddleware's counter when it runs; start one otherwise
+        stats = current_request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request_stats.set(stats)
+
+        over = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal over
+            if message["type"] == "http.response.start":
+                over = self._check(scope, stats)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+            if not over:
+                self._check(scope, stats)
+        finally:
+            if token is not None:
+                current_request_stats.reset(token)
+
+    def _check(self, scope: Scope, stats: RequestStats) -> bool:
+        budget = _budget(scope)
+        if budget is None or stats.statements <= budget:
+            return False
+        message = (
+            f"{scope['method']} {scope['route'].path} executed {stats.statements} SQL statements; "
+            f"its query budget is {budget}"
+        )
+        if self.mode == "enforce":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return True
@@ -0,0 +1,70 @@
+import logging
+import os
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import Counter, registry
+
+# After a successful write, the same client reads from the primary for this
+# long, so it sees its own order even while the replica is behind
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+_SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+logger = logging.getLogger(__name__)
+
+read_routing = registry.register(
+    Counter("db_read_routing_total", "Read sessions by target database and reason.", ("target", "reason"))
+)
+
+
+def reads_from_primary(connection: HTTPConnection, replica_configured: bool) -> bool:
+    """
+    Decide where the read session of a GET request goes, and count the decision:
+    the primary inside the client's read-your-writes window, the replica otherwise.
+    """
+    if not replica_configured:
+        read_routing.inc(("primary", "no_replica"))
+        return True
+    primary_until = connection.cookies.get(READ_YOUR_WRITES_COOKIE)
+    try:
+        pinned = primary_until is not None and float(primary_until) > time.time()
+    except ValueError:
+        pinned = False
+    if pinned:
+        read_routing.inc(("primary", "read_your_writes"))
+        logger.debug("%s %s read from primary (read-your-writes)", connection.scope.get("method"), connection.url.path)
+        return True
+    read_routing.inc(("replica", "default"))
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    Stamp successful writes (any non-safe method answered with 2xx/3xx) with a
+    cookie holding the time until which this client's reads go to the primary.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: int = READ_YOUR_WRITES_SECONDS) -> None:
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.window_seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={until}; Max-Age={self.window_seconds}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,5 +1,9 @@
 from typing import Any, Dict, Optional
 
+from starlette.responses import Response
+
+from app.schemas.common import ApiResponse
+
 def success_response(message: str, data: Optional[Any] = None) -> Dict[str, Any]:
     return {"success": True, "message": message, "data": data}
 
@@ -7,4 +11,23 @@ def error_response(message: str, errors: Optional[Dict[str, str]] = None) -> Dic
     payload = {"success": False, "message": message}
     if errors:
         payload["errors"] = errors
-    return payload
\ No newline at end of file
+    return payload
+
+class ApiJSONResponse(Response):
+    """A body that is already JSON bytes; Starlette sends it without re-encoding."""
+
+    media_type = "application/json"
+
+def dump_success(message: str, data: Any, data_type: Any) -> bytes:
+    """
+    Serialize the success envelope straight to JSON bytes in one pydantic-core pass.
+    `data` must already be an instance of `data_type` (e.g. built with model_construct);
+    it is not validated again. ApiResponse[data_type] is cached by pydantic.
+    """
+    envelope = ApiResponse[data_type].model_construct(success=True, message=message, data=data)
+    return envelope.model_dump_json(by_alias=True).encode()
+
+def success_json(message: str, data: Any, data_type: Any, status_code: int = 200) -> ApiJSONResponse:
+    # Returning a Response makes FastAPI skip response_model validation and
+    # serialization; the route's response_model still documents the schema.
+    return ApiJSONResponse(content=dump_success(message, data, data_type), status_code=status_code)
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.utils.compression import COMPRESSION_MIN_SIZE, ENCODINGS, compress, negotiate_encoding
+from app.utils.metrics import Counter, registry
+
+cache_lookups = registry.register(
+    Counter("cache_lookups_total", "Snapshot cache lookups by result (hit, miss, bypass).", ("cache", "result"))
+)
+cache_invalidations = registry.register(Counter("cache_invalidations_total", "Snapshot cache invalidations.", ("cache",)))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    body: bytes
+    etag: str
+    # Content-coding -> compressed body
+    _encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def of(cls, body: bytes, cached: bool = True) -> "Snapshot":
+        """
+        A cached snapshot is compressed up front by whoever builds it, so
+        requests never compress it. That happens while later misses wait on
+        the build lock, so it uses the same levels as streamed responses
+        (brotli 11 would take seconds on a catalog). A one-off snapshot
+        (cached=False) is compressed on demand like any other response.
+        """
+        # Strong validator: derived from the exact bytes we send
+        snapshot = cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        if cached and len(body) >= COMPRESSION_MIN_SIZE:
+            for encoding in ENCODINGS:
+                snapshot._encoded[encoding] = compress(body, encoding)
+        return snapshot
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+        return body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each content-coding is a different representation and needs its own strong ETag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+class SnapshotCache:
+    """
+    Process-local cache of pre-serialized response bodies.
+
+    Each entry is built once per variant key (e.g. per Host) and kept until
+    invalidate() is called after a write. A build that races with an
+    invalidation is returned to its caller but not stored, so a stale body
+    never outlives the write that made it stale.
+
+    Writes made by other workers arrive through app.services.cache_versions,
+    which calls invalidate(). While `trusted` returns False (those
+    notifications may be missing) entries are neither served nor stored.
+    """
+
+    def __init__(self, name: str, max_variants: int = 16, trusted: Optional[Callable[[], bool]] = None) -> None:
+        self.name = name
+        self.max_variants = max_variants
+        self._trusted = trusted or (lambda: True)
+        self._entries: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._async_build_lock = asyncio.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str, build: Callable[[], bytes]) -> Snapshot:
+        snapshot = self.lookup(key)
+        if snapshot is not None:
+            return snapshot
+        if not self._trusted():
+            return Snapshot.of(build(), cached=False)
+        # Serialize rebuilds so a burst of misses after a write builds (and compresses) once
+        with self._build_lock:
+            snapshot = self._lookup(key)
+            if snapshot is not None:
+                return snapshot
+            generation = self._generation
+            return self.store(key, build(), generation)
+
+    async def aget(self, key: str, build: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        """get() for async routes: build() awaits an async session; compression runs in the threadpool."""
+        snapshot = self.lookup(key)
+        if snapshot is not None:
+            return snapshot
+        if not self._trusted():
+            return Snapshot.of(await build(), cached=False)
+        async with self._async_build_lock:
+            snapshot = self._lookup(key)
+            if snapshot is not None:
+                return snapshot
+            generation = self._generation
+            body = await build()
+            return await run_in_threadpool(self.store, key, body, generation)
+
+    def lookup(self, key: str) -> Optional[Snapshot]:
+        if not self._trusted():
+            cache_lookups.inc((self.name, "bypass"))
+            return None
+        snapshot = self._lookup(key)
+        cache_lookups.inc((self.name, "miss" if snapshot is None else "hit"))
+        return snapshot
+
+    def _lookup(self, key: str) -> Optional[Snapshot]:
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is not None:
+                self._entries.move_to_end(key)
+            return snapshot
+
+    def store(self, key: str, body: bytes, generation: int) -> Snapshot:
+        """Store a body built from data read at `generation`; compresses it, so keep it off the event loop."""
+        if not self._trusted():
+            return Snapshot.of(body, cached=False)
+        snapshot = Snapshot.of(body)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = snapshot
+                # Bound the number of variants so arbitrary Host headers can't grow the cache
+                while len(self._entries) > self.max_variants:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        cache_invalidations.inc((self.name,))
+
+
+def snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    encoding = None
+    if len(snapshot.body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # no-cache: clients may store the body but must revalidate with the ETag
+    headers = {"ETag": snapshot.etag_for(encoding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    # Any representation of this snapshot is still current
+    current = (snapshot.etag, snapshot.etag_for("gzip"), snapshot.etag_for("br"))
+    if etag_matches(request.headers.get("if-none-match"), *current):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=snapshot.encoded(encoding), media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """
+    Evaluate an If-None-Match header against our ETags (weak comparison, RFC 9110 13.1.2).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
@@ -1,18 +1,52 @@
-import requests
+import html
 import os
 
+import requests
+from requests.adapters import HTTPAdapter
+
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Overridable so tests and staging can point at a local stub server
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+TELEGRAM_TIMEOUT_SECONDS = float(os.getenv("TELEGRAM_TIMEOUT_SECONDS", "10"))
+
+# Telegram rejects messages longer than this many characters
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+# One keep-alive connection pool per process. Retries are handled by the
+# outbox dispatcher, so the adapter itself never retries.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+
+
+def is_configured() -> bool:
+    return bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)
+
 
 def send_telegram_message(message: str):
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+    if not is_configured():
         raise ValueError("Telegram credentials are not set")
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         "chat_id": TELEGRAM_CHAT_ID,
         "text": message,
         "parse_mode": "HTML"
     }
-    response = requests.post(url, data=payload)
+    response = _session.post(url, data=payload, timeout=TELEGRAM_TIMEOUT_SECONDS)
+    response.raise_for_status()
     return response.json()
+
+
+def format_new_order_message(order) -> str:
+    # Customer-supplied fields are escaped so they can't break HTML parse mode
+    return f"""
+📦 <b>New Order Received!</b>
+Order ID: {order.id}
+Customer: {html.escape(order.name)}
+Phone: {html.escape(order.phone_number)}
+Address: {html.escape(order.address)}
+Total: ₹{order.total_price}
+Status: {order.status.value}
+"""
@@ -0,0 +1,31 @@
+from pathlib import Path
+from typing import Optional
+
+UPLOAD_ROOT = Path("uploads")
+PRODUCTS_SUBDIR = UPLOAD_ROOT / "products"
+# Resized copies of product images, named <source stem>-<variant>.<ext>
+VARIANTS_SUBDIR = PRODUCTS_SUBDIR / "variants"
+# Partial uploads land here first; same filesystem so the final rename is atomic
+INCOMING_SUBDIR = UPLOAD_ROOT / ".incoming"
+
+
+
+def ensure_upload_dirs() -> None:
+    """Create the upload tree; called at startup (app lifespan, scripts), never at import."""
+    for directory in (PRODUCTS_SUBDIR, VARIANTS_SUBDIR, INCOMING_SUBDIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
+
+def public_upload_path(fs_path: Path) -> str:
+    """Public path served by the /uploads mount in main.py."""
+    return f"/uploads/{fs_path.relative_to(UPLOAD_ROOT).as_posix()}"
+
+
+def local_upload_path(public_path: Optional[str]) -> Optional[Path]:
+    """Map "/uploads/<rel>" back to a file under UPLOAD_ROOT; None for anything else."""
+    if not public_path or not public_path.startswith("/uploads/"):
+        return None
+    rel_part = public_path[len("/uploads/"):]
+    if not rel_part:
+        return None
+    return UPLOAD_ROOT / rel_part
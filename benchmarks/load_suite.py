@@ -0,0 +1,267 @@
+"""
+Load-test every main route and report throughput and p50/p95/p99 latency.
+
+    python -m benchmarks.load_suite [--mode asgi|server|both] [--requests 500] [--concurrency 16]
+        [--orders 20000] [--products 500] [--database-url URL] [--db-mode sync|async]
+        [--output results.json] [--baseline old.json --max-regression 0.15]
+
+The database is seeded first (see benchmarks.seed). With no --database-url the
+run is fully offline against a fresh temporary SQLite file. To use Postgres,
+point it at a scratch database; --reset drops and recreates every table.
+
+asgi drives the app in-process over httpx.ASGITransport, measuring app and
+database time without sockets. server starts a real single-worker uvicorn
+process and drives it over HTTP on localhost.
+
+Results are written as JSON. With --baseline, every scenario is compared with
+the baseline run and the command exits 1 when p95 latency rose, or throughput
+fell, by more than --max-regression (a fraction).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Builds (path, request kwargs) for the n-th request
+    build: Callable[[int], tuple]
+    expected_status: int = 200
+
+
+def scenarios(product_ids: List[str], order_ids: List[str], seed: int) -> List[Scenario]:
+    rng = random.Random(seed)
+    pick = lambda ids: ids[rng.randrange(len(ids))]  # noqa: E731
+    order_body = lambda n: {  # noqa: E731
+        "name": "Load Test",
+        "address": "1 Benchmark Road",
+        "phoneNumber": "0123456789",
+        "orderedItems": [{"productId": pick(product_ids), "quantityInKg": 1.5} for _ in range(3)],
+    }
+    return [
+        Scenario("product_list", "GET", lambda n: ("/api/products", {})),
+        Scenario(
+            "product_create",
+            "POST",
+            lambda n: (
+                "/api/products",
+                {"data": {"name": f"Load {n}", "price_per_kg": "3.5", "image": "https://cdn.example.com/x.jpg"}},
+            ),
+            201,
+        ),
+        Scenario(
+            "product_update",
+            "PUT",
+            lambda n: (f"/api/products/{pick(product_ids)}", {"json": {"price_per_kg": round(1 + n % 50 / 10, 2)}}),
+        ),
+        Scenario("order_create", "POST", lambda n: ("/api/orders", {"json": order_body(n)}), 201),
+        Scenario("order_list", "GET", lambda n: ("/api/orders", {"params": {"limit": 50}})),
+        Scenario("order_detail", "GET", lambda n: (f"/api/orders/{pick(order_ids)}", {})),
+        Scenario("discount_get", "GET", lambda n: ("/api/discount", {})),
+        Scenario("discount_set", "POST", lambda n: ("/api/discount", {"json": {"text": f"Offer {n}"}})),
+    ]
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(fraction * len(ordered) + 0.5 - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(warmup + requests))
+
+    async def worker(record: bool, limit: int) -> None:
+        nonlocal errors
+        for n in counter:
+            if n >= limit:
+                return
+            path, kwargs = scenario.build(n)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, path, **kwargs)
+            elapsed = time.perf_counter() - started
+            if record:
+                latencies.append(elapsed)
+                if response.status_code != scenario.expected_status:
+                    errors += 1
+
+    await asyncio.gather(*(worker(False, warmup) for _ in range(concurrency)))
+    counter = iter(range(warmup, warmup + requests))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(True, warmup + requests) for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "mean_ms": ms(sum(latencies) / len(latencies)),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+async def run_all(client: httpx.AsyncClient, suite: List[Scenario], args) -> Dict[str, dict]:
+    results = {}
+    for scenario in suite:
+        if args.only and scenario.name not in args.only:
+            continue
+        results[scenario.name] = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+        print(f"  {scenario.name:<16} {_format(results[scenario.name])}", flush=True)
+    return results
+
+
+def _format(result: dict) -> str:
+    return (
+        f"{result['throughput_rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+        f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_server(suite: List[Scenario], args) -> Dict[str, dict]:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not come up")
+                await asyncio.sleep(0.1)
+            return await run_all(client, suite, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+async def run_asgi(suite: List[Scenario], args) -> Dict[str, dict]:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local", timeout=60) as client:
+        return await run_all(client, suite, args)
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Scenarios whose p95 or throughput regressed by more than max_regression."""
+    failures = []
+    for mode, scenarios_ in current["results"].items():
+        for name, result in scenarios_.items():
+            before = baseline.get("results", {}).get(mode, {}).get(name)
+            if not before:
+                continue
+            p95 = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+            throughput = 1 - result["throughput_rps"] / before["throughput_rps"] if before["throughput_rps"] else 0.0
+            line = f"{mode}/{name}: p95 {p95:+.1%}, throughput {-throughput:+.1%}"
+            print(("REGRESSION " if max(p95, throughput) > max_regression else "ok         ") + line)
+            if max(p95, throughput) > max_regression:
+                failures.append(line)
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=["asgi", "server", "both"], default="asgi")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true", help="drop all tables before seeding")
+    parser.add_argument("--db-mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/load_suite.db"
+    # app.db.session reads these at import time, and the uvicorn child inherits them
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DB_MODE"] = args.db_mode
+    # Never notify a real chat about thousands of synthetic orders
+    os.environ["TELEGRAM_BOT_TOKEN"] = ""
+
+    from sqlalchemy import create_engine
+
+    from benchmarks.seed import SeedVolumes, seed
+
+    engine = create_engine(database_url)
+    started = time.perf_counter()
+    data = seed(engine, SeedVolumes(args.products, args.orders, args.items_per_order, seed=args.seed), reset=args.reset)
+    engine.dispose()
+    print(f"Seeded {args.products} products / {args.orders} orders in {time.perf_counter() - started:.1f}s")
+
+    suite = scenarios(data.product_ids, data.order_ids, args.seed)
+    modes = ["asgi", "server"] if args.mode == "both" else [args.mode]
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "db_mode": args.db_mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "volumes": {"products": args.products, "orders": args.orders, "items_per_order": args.items_per_order},
+        },
+        "results": {},
+    }
+    for mode in modes:
+        print(f"[{mode}]")
+        runner = run_asgi if mode == "asgi" else run_server
+        report["results"][mode] = asyncio.run(runner(suite, args))
+
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+    errors = sum(r["errors"] for results in report["results"].values() for r in results.values())
+    failures: List[str] = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            failures = compare(report, json.load(fh), args.max_regression)
+    return 1 if failures or errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
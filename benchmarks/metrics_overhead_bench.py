@@ -0,0 +1,81 @@
+"""
+Cost of the /metrics instrumentation: MetricsMiddleware per request and the
+engine hooks per SQL statement, in nanoseconds.
+
+    python -m benchmarks.metrics_overhead_bench [--requests 200000] [--statements 100000]
+
+The middleware is called directly around a minimal ASGI app that matches a
+route and sends a response; the bare app's cost is subtracted. Statements are
+"SELECT 1" on an in-memory SQLite engine, timed with and without
+instrument_engine(); the difference is the per-statement overhead.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.utils.metrics import MetricsMiddleware, instrument_engine
+
+
+class _Route:
+    path = "/api/orders/{order_id}"
+
+
+ROUTE = _Route()
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def discard(message):
+    pass
+
+
+async def run(app, count: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(count):
+        scope = {"type": "http", "method": "GET", "path": "/api/orders/1", "headers": []}
+        await app(scope, None, discard)
+    return (time.perf_counter_ns() - started) / count
+
+
+def run_statements(engine, count: int) -> float:
+    statement = text("SELECT 1")
+    with engine.connect() as conn:
+        started = time.perf_counter_ns()
+        for _ in range(count):
+            conn.execute(statement)
+        return (time.perf_counter_ns() - started) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--statements", type=int, default=100_000)
+    args = parser.parse_args()
+
+    async def bench() -> None:
+        baseline = await run(endpoint, args.requests)
+        per_request = await run(MetricsMiddleware(endpoint), args.requests)
+        print(f"{'MetricsMiddleware':<28} {per_request - baseline:8.0f} ns/request")
+
+    asyncio.run(bench())
+
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    instrument_engine(instrumented, "bench")
+    # Warm up the statement caches of both engines before timing
+    run_statements(plain, 1000)
+    run_statements(instrumented, 1000)
+    bare = run_statements(plain, args.statements)
+    hooked = run_statements(instrumented, args.statements)
+    print(f"{'SELECT 1, plain':<28} {bare:8.0f} ns/statement")
+    print(f"{'SELECT 1, instrumented':<28} {hooked:8.0f} ns/statement ({hooked - bare:+.0f})")
+
+
+if __name__ == "__main__":
+    main()
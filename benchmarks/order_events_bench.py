@@ -0,0 +1,175 @@
+"""
+Fan-out of the order event feed to many idle subscribers.
+
+    python -m benchmarks.order_events_bench [--subscribers 500] [--events 200] [--http]
+
+Subscribers are consumers of OrderEventBroker.stream() on one event loop, as
+in a worker; events are published from another thread at --interval, like
+the broker's reader thread, without the database read. Reported: publish-to-receive latency over every
+(event, subscriber) pair, the process's thread count while the subscribers
+are connected, and the memory each idle subscriber holds.
+
+--http runs the same against `uvicorn app.main:app` with real
+GET /api/orders/events connections, publishing through POST /api/orders.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.startup_bench import _free_port
+
+from app.services.order_events import OrderEventBroker
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _data_lines(chunk: bytes):
+    for line in chunk.split(b"\n"):
+        if line.startswith(b"data: "):
+            yield line[6:]
+
+
+async def _consume(stream, events: int, latencies: List[float]) -> None:
+    received = 0
+    async for chunk in stream:
+        now = time.perf_counter()
+        for data in _data_lines(chunk):
+            sent = json.loads(data).get("sent")
+            if sent is not None:
+                latencies.append(now - sent)
+                received += 1
+        if received >= events:
+            return
+
+
+def report(latencies: List[float], expected: int, threads: int, per_subscriber: float = None) -> None:
+    print(f"deliveries {len(latencies)}/{expected}")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max {max(latencies) * 1000:.2f} ms")
+    line = f"threads while connected: {threads}"
+    if per_subscriber is not None:
+        line += f", memory per idle subscriber: {per_subscriber / 1024:.1f} KiB"
+    print(line)
+
+
+async def run_in_process(subscribers: int, events: int, interval: float) -> None:
+    broker = OrderEventBroker()
+    broker.bind(asyncio.get_running_loop())
+    # An empty feed: the streams start at id 0
+    broker.load([])
+    latencies: List[float] = []
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(_consume(broker.stream(), events, latencies)) for _ in range(subscribers)]
+    # Let every subscriber reach its wait
+    await asyncio.sleep(0.5)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+    threads = threading.active_count()
+
+    def publisher() -> None:
+        for event_id in range(1, events + 1):
+            broker.publish([(event_id, "bench", json.dumps({"sent": time.perf_counter()}).encode())])
+            time.sleep(interval)
+
+    thread = threading.Thread(target=publisher)
+    thread.start()
+    await asyncio.gather(*tasks)
+    thread.join()
+    broker.close()
+    report(latencies, subscribers * events, threads, per_subscriber)
+
+
+async def run_http(subscribers: int, events: int, interval: float) -> None:
+    import httpx
+
+    workdir = tempfile.mkdtemp()
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/events.db",
+        DB_CREATE_ALL="1",
+        ORDER_EVENTS_MAX_SUBSCRIBERS=str(subscribers),
+        PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=workdir,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=subscribers + 10)
+        async with httpx.AsyncClient(base_url=base, timeout=60, limits=limits) as client:
+            for _ in range(200):
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            product = await client.post(
+                "/api/products", data={"name": "Apple", "price_per_kg": "2", "image": "https://example.com/a.jpg"}
+            )
+            product_id = product.json()["data"]["id"]
+            latencies: List[float] = []
+            sent: List[float] = []
+            connected = asyncio.Semaphore(0)
+
+            async def subscriber() -> None:
+                async with client.stream("GET", "/api/orders/events") as response:
+                    response.raise_for_status()
+                    received = 0
+                    connected.release()
+                    async for chunk in response.aiter_bytes():
+                        now = time.perf_counter()
+                        for _ in _data_lines(chunk):
+                            latencies.append(now - sent[received])
+                            received += 1
+                        if received >= events:
+                            return
+
+            tasks = [asyncio.create_task(subscriber()) for _ in range(subscribers)]
+            # Events published before a subscriber is connected would never reach it
+            for _ in range(subscribers):
+                await connected.acquire()
+            await asyncio.sleep(0.2)
+            threads = len(os.listdir(f"/proc/{server.pid}/task")) if os.path.isdir("/proc") else -1
+            order = {"name": "Bench", "address": "x", "phoneNumber": "0123456789",
+                     "orderedItems": [{"productId": product_id, "quantityInKg": 1}]}
+            for _ in range(events):
+                sent.append(time.perf_counter())
+                response = await client.post("/api/orders", json=order)
+                response.raise_for_status()
+                await asyncio.sleep(interval)
+            await asyncio.gather(*tasks)
+        # Includes the order's own request time, as a dashboard would see it
+        report(latencies, subscribers * events, threads)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between events")
+    parser.add_argument("--http", action="store_true")
+    args = parser.parse_args()
+    runner = run_http if args.http else run_in_process
+    asyncio.run(runner(args.subscribers, args.events, args.interval))
+
+
+if __name__ == "__main__":
+    main()
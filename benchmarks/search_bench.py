@@ -0,0 +1,139 @@
+"""
+Latency of the in-memory product search index against a LIKE '%q%' scan.
+
+    python -m benchmarks.search_bench [--products 100000] [--queries 2000] [--no-sql]
+
+Builds ProductSearchIndex over synthetic product names (deterministic for
+--seed), then times query shapes the storefront sends: a whole word, a
+prefix being typed, a typo, two words, and the same with inStock=true.
+Reported per shape: p50/p99 in microseconds. Also times the full rebuild
+and incremental upsert/remove. Unless --no-sql, the same queries run as
+LIKE scans on an in-memory SQLite copy for comparison.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, select
+
+from app.db.base import Base
+from app.model.product import Product
+from app.services.search import ProductSearchIndex
+
+VARIETIES = [
+    "apple", "apricot", "avocado", "banana", "blackberry", "blueberry", "cherry", "coconut", "cranberry",
+    "grape", "grapefruit", "guava", "kiwi", "lemon", "lime", "lychee", "mango", "melon", "nectarine",
+    "orange", "papaya", "peach", "pear", "pineapple", "plum", "pomegranate", "raspberry", "strawberry",
+    "watermelon", "carrot", "potato", "tomato", "onion", "garlic", "spinach", "broccoli", "cabbage",
+    "cauliflower", "cucumber", "pepper", "zucchini", "eggplant", "pumpkin", "lettuce", "radish", "beetroot",
+]
+QUALIFIERS = [
+    "organic", "red", "green", "yellow", "baby", "wild", "sweet", "sour", "fresh", "frozen", "dried",
+    "local", "imported", "premium", "heirloom", "seedless", "jumbo", "mini", "golden", "black",
+]
+ORIGINS = ["spain", "italy", "kenya", "peru", "chile", "india", "mexico", "brazil", "morocco", "turkey"]
+
+
+def product_names(count: int, rng: random.Random) -> List[str]:
+    names = []
+    for n in range(count):
+        parts = rng.sample(QUALIFIERS, rng.randint(0, 2)) + [rng.choice(VARIETIES)]
+        if rng.random() < 0.5:
+            parts.append(rng.choice(ORIGINS))
+        # A lot or SKU suffix keeps names distinct, as in a real catalogue
+        parts.append(f"{rng.choice('abcdefgh')}{n % 997}")
+        names.append(" ".join(parts).title())
+    return names
+
+
+def typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    return word[:i] + word[i + 1 :] if rng.random() < 0.5 else word[:i] + rng.choice("aeiourst") + word[i + 1 :]
+
+
+def query_shapes(rng: random.Random) -> Dict[str, Callable[[], Tuple[str, object]]]:
+    return {
+        "word": lambda: (rng.choice(VARIETIES), None),
+        "prefix": lambda: ((w := rng.choice(VARIETIES))[: rng.randint(2, max(2, len(w) - 1))], None),
+        "typo": lambda: (typo(rng.choice([v for v in VARIETIES if len(v) >= 5]), rng), None),
+        "two words": lambda: (f"{rng.choice(QUALIFIERS)} {rng.choice(VARIETIES)}", None),
+        "word, in stock": lambda: (rng.choice(VARIETIES), True),
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-sql", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [(str(uuid.UUID(int=rng.getrandbits(128))), name, rng.random() < 0.8)
+            for name in product_names(args.products, rng)]
+
+    index = ProductSearchIndex()
+    started = time.perf_counter()
+    index.rebuild(rows)
+    print(f"rebuild {len(index)} products: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    changes = [(str(uuid.uuid4()), name, True) for name in product_names(1000, rng)]
+    started = time.perf_counter()
+    for row in changes:
+        index.upsert(*row)
+    upsert = (time.perf_counter() - started) / len(changes)
+    started = time.perf_counter()
+    for product_id, _, _ in changes:
+        index.remove(product_id)
+    remove = (time.perf_counter() - started) / len(changes)
+    print(f"upsert {upsert * 1e6:.1f} us, remove {remove * 1e6:.1f} us")
+
+    engine = None
+    if not args.no_sql:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[Product.__table__])
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            conn.execute(Product.__table__.insert(), [
+                {"id": i, "name": n, "in_stock": s, "price_per_kg": 1.0, "created_at": now, "updated_at": now}
+                for i, n, s in rows
+            ])
+
+    print(f"{'query':<16}{'index p50':>12}{'index p99':>12}{'hits':>8}" + ("" if engine is None else f"{'LIKE p50':>12}"))
+    for shape, make in query_shapes(rng).items():
+        queries = [make() for _ in range(args.queries)]
+        timings, hits = [], []
+        for q, in_stock in queries:
+            started = time.perf_counter()
+            found = index.search(q, args.limit, in_stock)
+            timings.append(time.perf_counter() - started)
+            hits.append(len(found))
+        line = (f"{shape:<16}{percentile(timings, 0.5) * 1e6:10.0f}us{percentile(timings, 0.99) * 1e6:10.0f}us"
+                f"{statistics.mean(hits):8.1f}")
+        if engine is not None:
+            sql_timings = []
+            with engine.connect() as conn:
+                for q, in_stock in queries[:50]:
+                    statement = select(Product.id).where(Product.name.ilike(f"%{q}%")).limit(args.limit)
+                    if in_stock is not None:
+                        statement = statement.where(Product.in_stock.is_(in_stock))
+                    started = time.perf_counter()
+                    conn.execute(statement).all()
+                    sql_timings.append(time.perf_counter() - started)
+            line += f"{statistics.median(sql_timings) * 1e6:10.0f}us"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
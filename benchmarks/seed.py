@@ -0,0 +1,138 @@
+"""
+Seed a database with synthetic products, orders and ordered items.
+
+    python -m benchmarks.seed --database-url sqlite:///./bench.db [--products 500] [--orders 20000] [--items-per-order 3]
+
+Uses multi-row Core INSERTs, so large volumes load quickly. Orders are spread
+over the last --days days with a random status, and the sales rollups are
+rebuilt afterwards. The data is deterministic for a given --seed.
+"""
+import argparse
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.model import Discount, Order, OrderedItem, OrderStatus, Product
+from app.services.analytics_service import rebuild_rollups
+
+CHUNK_SIZE = 500
+
+
+@dataclass
+class SeedVolumes:
+    products: int = 500
+    orders: int = 20_000
+    items_per_order: int = 3
+    days: int = 90
+    seed: int = 0
+
+
+@dataclass
+class SeededData:
+    product_ids: List[str] = field(default_factory=list)
+    order_ids: List[str] = field(default_factory=list)
+
+
+def _insert(db: Session, table, rows: List[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(table.insert(), rows[start : start + CHUNK_SIZE])
+
+
+def seed(engine: Engine, volumes: SeedVolumes, reset: bool = False) -> SeededData:
+    """Create the schema if needed and load `volumes` of data. reset drops every table first."""
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(volumes.seed)
+    now = datetime.utcnow()
+    data = SeededData()
+
+    products = []
+    for n in range(volumes.products):
+        product_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        data.product_ids.append(product_id)
+        created = now - timedelta(days=volumes.days + rng.random())
+        products.append(
+            {
+                "id": product_id,
+                "name": f"Product {n:05d}",
+                "image": f"https://cdn.example.com/products/{n}.jpg",
+                "price_per_kg": round(rng.uniform(0.5, 20.0), 2),
+                "in_stock": True,
+                "available_kg": None,
+                "created_at": created,
+                "updated_at": created,
+            }
+        )
+
+    statuses = list(OrderStatus)
+    prices = {p["id"]: p["price_per_kg"] for p in products}
+    with Session(engine) as db:
+        _insert(db, Product.__table__, products)
+        for start in range(0, volumes.orders, CHUNK_SIZE * 4):
+            orders, items = [], []
+            for _ in range(start, min(start + CHUNK_SIZE * 4, volumes.orders)):
+                order_id = str(uuid.UUID(int=rng.getrandbits(128)))
+                data.order_ids.append(order_id)
+                created = now - timedelta(seconds=rng.uniform(0, volumes.days * 86400))
+                total = 0.0
+                for product_id in rng.sample(data.product_ids, min(volumes.items_per_order, len(data.product_ids))):
+                    kg = round(rng.uniform(0.5, 5.0), 1)
+                    total += kg * prices[product_id]
+                    items.append(
+                        {
+                            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                            "order_id": order_id,
+                            "product_id": product_id,
+                            "quantity_in_kg": kg,
+                            "unit_price_per_kg": prices[product_id],
+                        }
+                    )
+                orders.append(
+                    {
+                        "id": order_id,
+                        "name": "Bench Customer",
+                        "address": "1 Benchmark Road",
+                        "phone_number": "0123456789",
+                        "total_price": round(total, 2),
+                        "status": rng.choice(statuses),
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                )
+            _insert(db, Order.__table__, orders)
+            _insert(db, OrderedItem.__table__, items)
+        if db.query(Discount).first() is None:
+            db.add(Discount(text="10% off all fruit"))
+        db.commit()
+        rebuild_rollups(db)
+    return data
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--products", type=int, default=SeedVolumes.products)
+    parser.add_argument("--orders", type=int, default=SeedVolumes.orders)
+    parser.add_argument("--items-per-order", type=int, default=SeedVolumes.items_per_order)
+    parser.add_argument("--days", type=int, default=SeedVolumes.days)
+    parser.add_argument("--seed", type=int, default=SeedVolumes.seed)
+    parser.add_argument("--reset", action="store_true", help="drop all tables first (scratch databases only)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    volumes = SeedVolumes(args.products, args.orders, args.items_per_order, args.days, args.seed)
+    data = seed(engine, volumes, reset=args.reset)
+    print(f"Seeded {len(data.product_ids)} products, {len(data.order_ids)} orders into {engine.url.render_as_string()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
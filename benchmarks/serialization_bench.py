@@ -0,0 +1,99 @@
+"""
+Per-item cost of serializing the product list, old path vs the single-pass one.
+
+    python -m benchmarks.serialization_bench [--products 10000] [--repeat 5]
+
+"before" replays what the handlers used to do: CatalogProductOut.model_validate on each
+ORM instance, then FastAPI validating the success_response dict against
+ApiResponse[List[CatalogProductOut]] and dumping it. "after" is _build_catalog_body:
+plain column rows, model_construct, one model_dump_json. Both run against an
+in-memory SQLite database and include the query.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.model.product import Product
+from app.routes.product import _absolute_image_url, _build_catalog_body
+from app.schemas.common import ApiResponse
+from app.schemas.product import CatalogProductOut
+from app.utils.response import success_response
+
+BASE = "http://bench.local"
+
+
+def seed(count: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    now = datetime.utcnow()
+    with Session() as db:
+        db.execute(
+            Product.__table__.insert(),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "name": f"Product {i}",
+                    "image": f"https://cdn.example.com/{i}.jpg",
+                    "price_per_kg": 1.0 + i % 97,
+                    "in_stock": bool(i % 3),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(count)
+            ],
+        )
+        db.commit()
+    return Session
+
+
+def before(db) -> bytes:
+    out = []
+    for product in db.query(Product).all():
+        item = CatalogProductOut.model_validate(product)
+        item.image = _absolute_image_url(BASE, item.image)
+        out.append(item)
+    adapter = TypeAdapter(ApiResponse[List[CatalogProductOut]])
+    value = adapter.validate_python(success_response("Products fetched successfully", out))
+    return adapter.dump_json(value, by_alias=True)
+
+
+def after(db) -> bytes:
+    return _build_catalog_body(db, BASE)
+
+
+def measure(Session, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with Session() as db:
+            started = time.perf_counter()
+            fn(db)
+            best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Session = seed(args.products)
+    with Session() as db:
+        assert before(db) == after(db), "both paths must produce identical bytes"
+
+    for name, fn in (("before", before), ("after", after)):
+        seconds = measure(Session, fn, args.repeat)
+        print(f"{name:>6}: {seconds * 1000:8.1f} ms total  {seconds / args.products * 1e6:6.2f} us/item")
+
+
+if __name__ == "__main__":
+    main()
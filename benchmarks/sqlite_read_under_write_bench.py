@@ -0,0 +1,152 @@
+"""
+Read throughput on SQLite while orders are being written, with and without the
+production SQLite profile (WAL, single writer, read-only pool).
+
+    python -m benchmarks.sqlite_read_under_write_bench [--seconds 5] [--readers 4] [--writers 2] [--profile both]
+
+Each profile gets a fresh seeded database file. Reader threads run the catalog
+query behind GET /api/products and the first page of GET /api/orders in a
+loop; first alone, then while writer threads place orders through
+create_order. With the profile, reads/s under write load should stay close to
+the idle figure; with SQLite's default rollback journal every commit locks
+readers out.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+os.environ["TELEGRAM_BOT_TOKEN"] = ""
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import sqlite as sqlite_profile  # noqa: E402
+from app.routes.product import CATALOG_COLUMNS  # noqa: E402
+from app.schemas.order import OrderedItemIn  # noqa: E402
+from app.services.order_service import create_order, order_page_statement  # noqa: E402
+from benchmarks.seed import SeedVolumes, seed  # noqa: E402
+
+CONNECT_ARGS = {"check_same_thread": False}
+
+
+@dataclass
+class PhaseResult:
+    reads_per_second: List[float] = field(default_factory=list)
+    writes: int = 0
+    read_errors: int = 0
+    write_errors: int = 0
+
+
+def make_engines(url: str, profile: bool, readers: int):
+    if not profile:
+        # What app.db.session did before the profile: one default pool for everything
+        engine = create_engine(url, connect_args=CONNECT_ARGS, pool_pre_ping=True)
+        return engine, engine
+    writer = create_engine(url, connect_args=CONNECT_ARGS, pool_pre_ping=True, pool_size=1, max_overflow=0, pool_timeout=60)
+    sqlite_profile.configure(writer, read_only=False)
+    reader = create_engine(url, connect_args=CONNECT_ARGS, pool_pre_ping=True, pool_size=readers, max_overflow=0)
+    sqlite_profile.configure(reader, read_only=True)
+    return writer, reader
+
+
+def run_phase(write_factory, read_factory, product_ids, seconds: float, readers: int, writers: int) -> PhaseResult:
+    result = PhaseResult()
+    stop = threading.Event()
+    lock = threading.Lock()
+    reads_by_second = [0] * int(seconds)
+    started = time.perf_counter()
+
+    def read_loop() -> None:
+        catalog = select(*CATALOG_COLUMNS)
+        orders = order_page_statement([], None, 20)
+        while not stop.is_set():
+            db = read_factory()
+            try:
+                db.execute(catalog).all()
+                db.scalars(orders).all()
+                second = int(time.perf_counter() - started)
+                with lock:
+                    if second < len(reads_by_second):
+                        reads_by_second[second] += 1
+            except Exception:
+                with lock:
+                    result.read_errors += 1
+            finally:
+                db.close()
+
+    def write_loop(seed_value: int) -> None:
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            items = [
+                OrderedItemIn(productId=pid, quantityInKg=round(rng.uniform(0.5, 3.0), 1))
+                for pid in rng.sample(product_ids, 3)
+            ]
+            db = write_factory()
+            try:
+                create_order(db, name="Bench", address="1 Benchmark Road", phone_number="0123456789", items=items)
+                with lock:
+                    result.writes += 1
+            except Exception:
+                with lock:
+                    result.write_errors += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    threads += [threading.Thread(target=write_loop, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    result.reads_per_second = [float(n) for n in reads_by_second]
+    return result
+
+
+def bench_profile(profile: bool, args) -> None:
+    url = f"sqlite:///{tempfile.mkdtemp()}/read_under_write.db"
+    writer, reader = make_engines(url, profile, args.readers)
+    data = seed(writer, SeedVolumes(products=args.products, orders=args.orders, seed=1), reset=True)
+    write_factory = sessionmaker(bind=writer, autoflush=False)
+    read_factory = sessionmaker(bind=reader, autoflush=False)
+
+    idle = run_phase(write_factory, read_factory, data.product_ids, args.seconds, args.readers, 0)
+    loaded = run_phase(write_factory, read_factory, data.product_ids, args.seconds, args.readers, args.writers)
+    idle_rate = statistics.mean(idle.reads_per_second)
+    loaded_rate = statistics.mean(loaded.reads_per_second)
+    name = "profile" if profile else "default"
+    print(f"{name:<8} idle    {idle_rate:8.0f} reads/s")
+    print(
+        f"{name:<8} loaded  {loaded_rate:8.0f} reads/s ({loaded_rate / idle_rate:.0%} of idle), "
+        f"min/max per second {min(loaded.reads_per_second):.0f}/{max(loaded.reads_per_second):.0f}, "
+        f"{loaded.writes / args.seconds:.0f} orders/s, errors read {loaded.read_errors} write {loaded.write_errors}"
+    )
+    writer.dispose()
+    reader.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--profile", choices=("on", "off", "both"), default="both")
+    args = parser.parse_args()
+
+    if args.profile in ("off", "both"):
+        bench_profile(False, args)
+    if args.profile in ("on", "both"):
+        bench_profile(True, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Cold-start cost of a worker: importing app.main, running the lifespan, and
+the first requests after it, with and without the startup prewarm.
+
+    python -m benchmarks.startup_bench [--runs 5] [--mode sync|async|both] [--uvicorn]
+
+Every run is a fresh interpreter against the same seeded SQLite file (like a
+newly scheduled instance), reporting medians in milliseconds:
+
+- import:  `import app.main`; must not touch the database or the filesystem
+- startup: the lifespan (upload directories, prewarm, background workers)
+- first:   the first GET /api/products and GET /api/orders/{id} after startup
+           (STARTUP_PREWARM_BASES is set to the test host, as in production)
+- ready:   process spawn to the first 200 from GET /api/products
+
+--uvicorn also times a real `uvicorn app.main:app` from spawn to that first
+200, polling the port.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from sqlalchemy import create_engine
+
+from benchmarks.seed import SeedVolumes, seed
+
+PHASES = ("import", "startup", "first_catalog", "first_order", "ready")
+
+
+def child() -> None:
+    """One cold start inside this interpreter; prints the timings as JSON."""
+    spawned = float(os.environ["STARTUP_BENCH_SPAWNED"])
+    started = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    before_startup = time.perf_counter()
+    client.__enter__()
+    started_up = time.perf_counter()
+    assert client.get("/api/products").status_code == 200
+    catalog = time.perf_counter()
+    ready = time.time()
+    assert client.get(f"/api/orders/{os.environ['STARTUP_BENCH_ORDER']}").status_code == 200
+    order = time.perf_counter()
+    client.__exit__(None, None, None)
+    print(json.dumps({
+        "import": imported - started,
+        "startup": started_up - before_startup,
+        "first_catalog": catalog - started_up,
+        "first_order": order - catalog,
+        "ready": ready - spawned,
+    }))
+
+
+def run_child(env: dict, cwd: str) -> dict:
+    env = dict(env, STARTUP_BENCH_SPAWNED=repr(time.time()), STARTUP_PREWARM_BASES="http://testserver")
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-m", "benchmarks.startup_bench", "--child"],
+        env=env, cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(env: dict, cwd: str, timeout: float = 30.0) -> float:
+    port = _free_port()
+    env = dict(env, STARTUP_PREWARM_BASES=f"http://127.0.0.1:{port}")
+    spawned = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - spawned < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/products", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - spawned
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("uvicorn did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=("sync", "async", "both"), default="both")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--uvicorn", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    workdir = tempfile.mkdtemp()
+    url = f"sqlite:///{workdir}/startup.db"
+    engine = create_engine(url)
+    data = seed(engine, SeedVolumes(products=args.products, orders=args.orders, seed=1), reset=True)
+    engine.dispose()
+
+    base_env = dict(
+        os.environ,
+        DATABASE_URL=url,
+        TELEGRAM_BOT_TOKEN="",
+        STARTUP_BENCH_ORDER=data.order_ids[0],
+        PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+    )
+    modes = ("sync", "async") if args.mode == "both" else (args.mode,)
+    print(f"{'':<16}" + "".join(f"{phase:>15}" for phase in PHASES))
+    for mode in modes:
+        for prewarm in ("0", "1"):
+            env = dict(base_env, DB_MODE=mode, STARTUP_PREWARM=prewarm)
+            # Run in the temporary directory, where the lifespan creates uploads/
+            runs = [run_child(env, workdir) for _ in range(args.runs)]
+            medians = [statistics.median(run[phase] for run in runs) * 1000 for phase in PHASES]
+            label = f"{mode} prewarm={prewarm}"
+            print(f"{label:<16}" + "".join(f"{value:15.1f}" for value in medians))
+            if args.uvicorn:
+                ready = statistics.median(run_uvicorn(env, workdir) for _ in range(args.runs)) * 1000
+                print(f"{'':<16}uvicorn spawn to first 200: {ready:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""initial schema
+
+Revision ID: cc1f62f8b445
+Revises:
+Create Date: 2026-10-17 00:42:46.052199
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc1f62f8b445'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The schema the app created with create_all before migrations existed.
+    # A database built that way already has these tables: they are adopted
+    # as they are, and later revisions bring them up to date.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'discounts' not in existing:
+        op.create_table('discounts',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'orders' not in existing:
+        op.create_table('orders',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('phone_number', sa.String(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.Column('status', sa.Enum('Pending', 'Paid', 'OutForDelivery', 'Delivered', name='orderstatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'products' not in existing:
+        op.create_table('products',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('image', sa.String(), nullable=True),
+        sa.Column('price_per_kg', sa.Float(), nullable=False),
+        sa.Column('in_stock', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('products', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_products_name'), ['name'], unique=False)
+
+    if 'ordered_items' not in existing:
+        op.create_table('ordered_items',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('order_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('quantity_in_kg', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('ordered_items')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_name'))
+
+    op.drop_table('products')
+    op.drop_table('orders')
+    op.drop_table('discounts')
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=True)
+    # ### end Alembic commands ###
@@ -0,0 +1,44 @@
+"""order event identity
+
+Revision ID: d72db0747c9f
+Revises: 35f4609adfc4
+Create Date: 2026-10-17 02:07:35.141028
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd72db0747c9f'
+down_revision: Union[str, Sequence[str], None] = '35f4609adfc4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ids come from the table's own sequence instead of the order_events cache
+    # version. The table only holds the replay buffer, so it is recreated
+    # rather than altered; clients resuming from an old id get a reset event.
+    op.drop_table('order_events')
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('event', sa.String(length=32), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_events')
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('event', sa.String(length=32), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
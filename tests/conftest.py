@@ -0,0 +1,52 @@
+"""
+The app reads its configuration when it is imported, so the environment is
+set here, before any test module imports it. Every module shares one
+file-backed SQLite database in a temporary directory.
+"""
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="fruit-store-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{WORKDIR}/tests.db",
+    DB_CREATE_ALL="1",
+    QUERY_BUDGET_MODE="enforce",
+    CACHE_VERSION_POLL_SECONDS="0",
+    # Configured notifier: orders also write to the outbox. Sends fail fast, off the request path.
+    TELEGRAM_BOT_TOKEN="test",
+    TELEGRAM_CHAT_ID="test",
+    TELEGRAM_API_BASE="http://127.0.0.1:9",
+)
+os.environ.setdefault("DB_MODE", "sync")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    # The lifespan creates the upload directories relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(WORKDIR)
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        os.chdir(cwd)
+
+
+def order_body(product_ids, quantity_in_kg=1, name="Test"):
+    items = [{"productId": product_id, "quantityInKg": quantity_in_kg} for product_id in product_ids]
+    return {"name": name, "address": "1 Test Street", "phoneNumber": "0123456789", "orderedItems": items}
+
+
+def create_product(client, name, price_per_kg=2.5, available_kg=None, **form):
+    form.setdefault("image", "https://example.com/fruit.jpg")
+    form.update(name=name, price_per_kg=str(price_per_kg))
+    if available_kg is not None:
+        form["available_kg"] = str(available_kg)
+    response = client.post("/api/products", data=form)
+    assert response.status_code == 201, response.text
+    return response.json()["data"]["id"]
@@ -0,0 +1,70 @@
+"""GET /api/products: one serialized snapshot per Host, a strong ETag and 304 on If-None-Match."""
+from app.utils.snapshot import Snapshot, SnapshotCache, etag_matches
+
+from conftest import create_product
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def test_snapshot_is_built_once_per_key_until_invalidated():
+    cache = SnapshotCache("test")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return b'{"n": %d}' % len(builds)
+
+    first = cache.get("a", build)
+    assert cache.get("a", build) is first
+    assert len(builds) == 1
+    cache.invalidate()
+    assert cache.get("a", build).etag != first.etag
+    assert len(builds) == 2
+
+
+def test_build_racing_an_invalidation_is_not_stored():
+    cache = SnapshotCache("test")
+    generation = cache.generation
+    cache.invalidate()
+    cache.store("a", b"stale", generation)
+    assert cache.lookup("a") is None
+
+
+def test_each_encoding_has_its_own_etag():
+    snapshot = Snapshot.of(b"[]" * 1000)
+    assert len({snapshot.etag, snapshot.etag_for("gzip"), snapshot.etag_for("br")}) == 3
+    assert etag_matches(f'"other", {snapshot.etag_for("br")}', snapshot.etag, snapshot.etag_for("br"))
+    assert etag_matches("*", snapshot.etag)
+    assert not etag_matches('"other"', snapshot.etag)
+
+
+def test_etag_and_not_modified(client):
+    create_product(client, "Snapshot kiwi")
+    response = client.get("/api/products", headers=IDENTITY)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    not_modified = client.get("/api/products", headers={**IDENTITY, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert client.get("/api/products", headers={**IDENTITY, "If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # A product write makes the old ETag stale
+    create_product(client, "Snapshot lime")
+    changed = client.get("/api/products", headers={**IDENTITY, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_image_urls_follow_the_host(client):
+    product_id = create_product(client, "Snapshot fig", image="/uploads/products/fig.jpg")
+    images = {}
+    for host in ("shop-a.example", "shop-b.example"):
+        response = client.get("/api/products", headers={**IDENTITY, "Host": host})
+        images[host] = next(p["image"] for p in response.json()["data"] if p["id"] == product_id)
+    assert images == {
+        "shop-a.example": "http://shop-a.example/uploads/products/fig.jpg",
+        "shop-b.example": "http://shop-b.example/uploads/products/fig.jpg",
+    }
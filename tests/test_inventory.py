@@ -0,0 +1,127 @@
+"""
+Stock reservation under concurrency: many threads place orders for the same
+products at once against the file-backed test database, half of them listing
+the products in reverse order to provoke lock-order deadlocks, and a share of
+the placed orders is deleted concurrently. Stock must never go negative, and
+what is left plus what the surviving orders reserve must equal the initial stock.
+"""
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.model import Order, OrderedItem, Product
+from app.schemas.order import OrderedItemIn
+from app.services.order_service import create_order, remove_order
+
+from conftest import create_product, order_body
+
+
+ORDERS = 120
+WORKERS = 16
+STOCK = 40.0
+NAME = "Stress"
+
+
+def place(product_ids, quantities) -> str:
+    items = [OrderedItemIn(productId=pid, quantityInKg=kg) for pid, kg in zip(product_ids, quantities)]
+    with SessionLocal() as db:
+        try:
+            create_order(db, name=NAME, address="1 Test Street", phone_number="0123456789", items=items)
+            return "placed"
+        except HTTPException as exc:
+            return "rejected" if exc.status_code == 409 else f"http {exc.status_code}"
+
+
+def remove(order_id: str) -> str:
+    with SessionLocal() as db:
+        remove_order(db, db.get(Order, order_id))
+        return "removed"
+
+
+def stock(product_id: str):
+    with SessionLocal() as db:
+        available = db.scalar(select(Product.available_kg).where(Product.id == product_id))
+        reserved = db.scalar(
+            select(func.coalesce(func.sum(OrderedItem.quantity_in_kg), 0.0))
+            .join(Order, Order.id == OrderedItem.order_id)
+            .where(OrderedItem.product_id == product_id, Order.name == NAME)
+        )
+    return available, reserved
+
+
+def test_concurrent_orders_never_oversell(client):
+    ids = [create_product(client, f"Stress melon {n}", available_kg=STOCK) for n in ("A", "B")]
+    rng = random.Random(7)
+    # Every third order takes a single product; the rest take both, in either order
+    plans = [(ids if n % 2 else ids[::-1]) if n % 3 else [ids[n % 2]] for n in range(ORDERS)]
+    quantities = [[round(rng.uniform(0.5, 3.0), 1) for _ in plan] for plan in plans]
+    start = threading.Barrier(WORKERS)
+
+    def run(n: int) -> str:
+        if n < WORKERS:
+            start.wait()
+        return place(plans[n], quantities[n])
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        outcomes = Counter(pool.map(run, range(ORDERS)))
+        with SessionLocal() as db:
+            placed = db.scalars(select(Order.id).where(Order.name == NAME)).all()
+        outcomes.update(pool.map(remove, placed[::3]))
+
+    # The demand is about three times the stock: some orders fit, the rest get 409
+    assert set(outcomes) == {"placed", "rejected", "removed"}, outcomes
+    assert outcomes["placed"] == len(placed)
+    for product_id in ids:
+        available, reserved = stock(product_id)
+        assert available >= 0
+        assert abs(available + reserved - STOCK) < 1e-6, (available, reserved)
+
+
+def test_orders_leave_the_catalog_snapshot_alone(client):
+    product_id = create_product(client, "Stock quince", available_kg=10)
+    etag = client.get("/api/products").headers["etag"]
+    assert client.post("/api/orders", json=order_body([product_id], quantity_in_kg=4)).status_code == 201
+    # The catalog carries no stock level, so it is still the same snapshot
+    catalog = client.get("/api/products")
+    assert catalog.headers["etag"] == etag
+    assert all("available_kg" not in product for product in catalog.json()["data"])
+    assert client.get("/api/products/stock").json()["data"][product_id] == 6
+
+
+def available(client, product_id):
+    return client.get("/api/products/stock").json()["data"].get(product_id)
+
+
+def test_short_stock_rejects_the_whole_order(client):
+    plenty = create_product(client, "Stock papaya", available_kg=10)
+    scarce = create_product(client, "Stock lychee", available_kg=1)
+    response = client.post("/api/orders", json=order_body([plenty, scarce], quantity_in_kg=2))
+    assert response.status_code == 409
+    assert "Stock lychee" in response.json()["detail"]
+    # Nothing was taken from the product that did have enough
+    assert available(client, plenty) == 10
+    assert available(client, scarce) == 1
+
+
+def test_deleting_an_order_returns_its_stock_unless_delivered(client):
+    tracked = create_product(client, "Stock guava", available_kg=10)
+    untracked = create_product(client, "Stock date")
+    order_ids = []
+    for _ in range(2):
+        response = client.post("/api/orders", json=order_body([tracked, untracked], quantity_in_kg=3))
+        assert response.status_code == 201, response.text
+        order_ids.append(response.json()["data"]["id"])
+    assert available(client, tracked) == 4
+    assert available(client, untracked) is None
+
+    assert client.delete(f"/api/orders/{order_ids[0]}").status_code == 200
+    assert available(client, tracked) == 7
+    # Delivered goods have left the shop
+    assert client.put(f"/api/orders/{order_ids[1]}", json={"status": "Delivered"}).status_code == 200
+    assert client.delete(f"/api/orders/{order_ids[1]}").status_code == 200
+    assert available(client, tracked) == 7
@@ -0,0 +1,59 @@
+"""Archival moves old Delivered orders with their items to the archive tables, in batches."""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from app.db.session import SessionLocal
+from app.model.order import Order
+from app.model.order_archive import ArchivedOrder, ArchivedOrderedItem
+from app.model.ordered_item import OrderedItem
+from app.services.order_archive import archive_orders
+
+from conftest import create_product, order_body
+
+
+def count(db, model, column, ids):
+    return db.scalar(select(func.count()).select_from(model).where(column.in_(ids)))
+
+
+def test_archive_moves_old_delivered_orders(client):
+    product_ids = [create_product(client, f"Archive pear {n}") for n in range(2)]
+    order_ids = []
+    for _ in range(4):
+        response = client.post("/api/orders", json=order_body(product_ids, name="Archive"))
+        assert response.status_code == 201, response.text
+        order_ids.append(response.json()["data"]["id"])
+    old_delivered, old_pending, recent_delivered = order_ids[:2], order_ids[2], order_ids[3]
+    for order_id in (*old_delivered, recent_delivered):
+        assert client.put(f"/api/orders/{order_id}", json={"status": "Delivered"}).status_code == 200
+    with SessionLocal() as db:
+        old = datetime.utcnow() - timedelta(days=200)
+        db.execute(update(Order).where(Order.id.in_([*old_delivered, old_pending])).values(created_at=old))
+        db.commit()
+
+        # One order per batch, stopped after the first batch
+        assert archive_orders(db, older_than_days=90, batch_size=1, max_batches=1) == 1
+        assert archive_orders(db, older_than_days=90, batch_size=1) == 1
+        assert archive_orders(db, older_than_days=90) == 0
+
+        assert count(db, Order, Order.id, order_ids) == 2
+        assert count(db, ArchivedOrder, ArchivedOrder.id, old_delivered) == 2
+        assert count(db, OrderedItem, OrderedItem.order_id, old_delivered) == 0
+        assert count(db, ArchivedOrderedItem, ArchivedOrderedItem.order_id, old_delivered) == 4
+        assert db.get(Order, old_pending) is not None
+        assert db.get(Order, recent_delivered) is not None
+
+    # Lookup by id falls back to the archive
+    detail = client.get(f"/api/orders/{old_delivered[0]}").json()["data"]
+    assert detail["status"] == "Delivered"
+    assert sorted(item["productId"] for item in detail["orderedItems"]) == sorted(product_ids)
+    # The hot list no longer has them; the export includes them unless asked not to
+    listed = client.get("/api/orders", params={"status": "Delivered", "limit": 200}).json()["data"]
+    assert listed["nextCursor"] is None
+    listed_ids = {order["id"] for order in listed["items"]}
+    assert recent_delivered in listed_ids and not listed_ids & set(old_delivered)
+    exported = [json.loads(line) for line in client.get("/api/orders/export").text.splitlines()]
+    assert set(old_delivered) <= {order["id"] for order in exported}
+    exported = [json.loads(line) for line in client.get("/api/orders/export?includeArchived=false").text.splitlines()]
+    assert not {order["id"] for order in exported} & set(old_delivered)
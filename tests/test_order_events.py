@@ -0,0 +1,124 @@
+"""
+The live order feed: events recorded with the order writes, fanned out to
+every subscriber, and resumed from Last-Event-ID or answered with a reset.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from app.db.session import SessionLocal
+from app.services import order_events as order_events_module
+from app.services.order_events import OrderEventBroker
+
+from conftest import create_product, order_body
+
+
+def frames(body: bytes):
+    """(id, event type, data) of every event in an SSE body."""
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def collect(broker, last_event_id=None, max_seconds=0.1) -> bytes:
+    async def read():
+        return b"".join([chunk async for chunk in broker.stream(last_event_id, max_seconds=max_seconds)])
+
+    return asyncio.run(read())
+
+
+def loaded(count):
+    broker = OrderEventBroker(buffer_size=3)
+    broker.load((event_id, "order.deleted", b'{"id": "%d"}' % event_id) for event_id in range(1, count + 1))
+    return broker
+
+
+def test_resume_from_last_event_id():
+    broker = loaded(5)
+    # Ring holds 3..5; after 3 comes 4 and 5
+    assert [event_id for event_id, _, _ in frames(collect(broker, "3"))] == ["4", "5"]
+    # Nothing after 2 has left the ring either
+    assert [event_id for event_id, _, _ in frames(collect(broker, "2"))] == ["3", "4", "5"]
+    # A new subscriber starts after the newest event
+    assert frames(collect(broker)) == []
+
+
+def test_unresumable_ids_get_a_reset():
+    broker = loaded(5)
+    # Evicted from the ring, from the future, and garbage
+    for last_event_id in ("1", "9", "abc"):
+        assert frames(collect(broker, last_event_id)) == [("5", "reset", {})]
+
+
+def test_every_subscriber_gets_a_live_event():
+    broker = loaded(0)
+
+    async def run():
+        streams = [asyncio.create_task(read()) for _ in range(50)]
+        while broker.subscribers < 50:
+            await asyncio.sleep(0.01)
+        # Published from another thread, like the reader thread
+        publisher = threading.Thread(target=broker.publish, args=([(1, "order.created", b'{"id": "a"}')],))
+        publisher.start()
+        publisher.join()
+        return await asyncio.gather(*streams)
+
+    async def read():
+        return b"".join([chunk async for chunk in broker.stream(max_seconds=0.3)])
+
+    bodies = asyncio.run(run())
+    assert all(frames(body) == [("1", "order.created", {"id": "a"})] for body in bodies)
+    assert broker.subscribers == 0
+
+
+def test_close_ends_open_streams():
+    broker = loaded(0)
+
+    async def run():
+        stream = asyncio.create_task(asyncio.wait_for(read(), 5))
+        while broker.subscribers < 1:
+            await asyncio.sleep(0.01)
+        broker.close()
+        return await stream
+
+    async def read():
+        return b"".join([chunk async for chunk in broker.stream(max_seconds=60)])
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 1
+
+
+def test_events_after_a_missing_id_wait_for_it(monkeypatch):
+    broker = loaded(2)
+    rows = [(event_id, "order.deleted", b"{}") for event_id in (3, 5)]
+    # Id 4 may still be committing: 5 is held back
+    assert broker._before_gap(rows) == rows[:1]
+    broker.publish(rows[:1])
+    assert broker._before_gap(rows[1:]) == []
+    # Once the gap is older than ORDER_EVENTS_GAP_SECONDS it is a rolled-back insert
+    monkeypatch.setattr(order_events_module, "ORDER_EVENTS_GAP_SECONDS", 0)
+    assert broker._before_gap(rows[1:]) == rows[1:]
+
+
+def test_order_writes_record_events(client):
+    broker = OrderEventBroker(session_factory=SessionLocal, writer_factory=SessionLocal)
+    broker.fetch()
+    product_id = create_product(client, "Event melon")
+    order_id = client.post("/api/orders", json=order_body([product_id], name="Events")).json()["data"]["id"]
+    assert client.put(f"/api/orders/{order_id}", json={"status": "Paid"}).status_code == 200
+    assert client.delete(f"/api/orders/{order_id}").status_code == 200
+    broker.fetch()
+
+    events = frames(collect(broker, str(broker._base)))
+    assert [event for _, event, _ in events] == ["order.created", "order.status_changed", "order.deleted"]
+    ids = [int(event_id) for event_id, _, _ in events]
+    assert ids == sorted(ids) and len(set(ids)) == 3
+    created, changed, deleted = (data for _, _, data in events)
+    assert created["id"] == order_id and created["status"] == "Pending"
+    assert changed["order"]["status"] == "Paid" and changed["previousStatus"] == "Pending"
+    assert deleted == {"id": order_id}
@@ -0,0 +1,82 @@
+"""ProxyHeaderMiddleware: forwarding headers only from trusted proxies, RFC 7239 Forwarded first."""
+import asyncio
+
+from app.utils.proxy import ProxyHeaderMiddleware, TrustedProxies, parse_forwarded
+
+
+def forward(headers, peer="10.0.0.2", trusted="10.0.0.0/8", scope_type="http"):
+    """Run one request through the middleware; returns the scope the app saw."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen.update(scope)
+
+    scope = {
+        "type": scope_type,
+        "scheme": "http" if scope_type == "http" else "ws",
+        "server": ("internal", 8000),
+        "client": (peer, 5000),
+        "headers": [(b"host", b"internal:8000")] + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    asyncio.run(ProxyHeaderMiddleware(app, trusted)(scope, None, None))
+    return seen
+
+
+def host_header(scope):
+    return [value for key, value in scope["headers"] if key == b"host"]
+
+
+def test_untrusted_peer_is_ignored():
+    scope = forward({"X-Forwarded-For": "1.2.3.4", "X-Forwarded-Proto": "https"}, peer="203.0.113.9")
+    assert scope["client"] == ("203.0.113.9", 5000)
+    assert scope["scheme"] == "http"
+    assert host_header(scope) == [b"internal:8000"]
+
+
+def test_x_forwarded_from_trusted_proxy():
+    headers = {"X-Forwarded-For": "1.2.3.4, 198.51.100.7, 10.0.0.5", "X-Forwarded-Proto": "https",
+               "X-Forwarded-Host": "shop.example"}
+    scope = forward(headers)
+    # The rightmost address that is not a trusted proxy; 1.2.3.4 could be forged by the client
+    assert scope["client"] == ("198.51.100.7", 5000)
+    assert scope["scheme"] == "https"
+    assert scope["server"] == ("shop.example", 443)
+    assert host_header(scope) == [b"shop.example"]
+
+
+def test_forwarded_wins_over_x_forwarded():
+    headers = {"Forwarded": 'for="[2001:db8::1]:4711";proto=https;host="api.example:8443", for=10.0.0.7',
+               "X-Forwarded-For": "9.9.9.9", "X-Forwarded-Host": "ignored.example"}
+    scope = forward(headers)
+    assert scope["client"] == ("2001:db8::1", 5000)
+    assert scope["scheme"] == "https"
+    assert scope["server"] == ("api.example", 8443)
+    assert host_header(scope) == [b"api.example:8443"]
+
+
+def test_trust_all_only_vouches_for_the_direct_peer():
+    scope = forward({"X-Forwarded-For": "6.6.6.6, 198.51.100.7"}, peer="203.0.113.9", trusted="*")
+    assert scope["client"] == ("198.51.100.7", 5000)
+
+
+def test_websocket_scheme():
+    scope = forward({"X-Forwarded-Proto": "https"}, scope_type="websocket")
+    assert scope["scheme"] == "wss"
+
+
+def test_trusted_proxies_cidrs():
+    trusted = TrustedProxies("127.0.0.1, 10.0.0.0/8, fd00::/8")
+    assert "10.1.2.3" in trusted
+    assert "fd00::1" in trusted
+    assert "11.0.0.1" not in trusted
+    assert "not-an-ip" not in trusted
+    assert None not in trusted
+
+
+def test_parse_forwarded():
+    assert parse_forwarded("for=1.2.3.4;proto=http, for=5.6.7.8") == [
+        {"for": "1.2.3.4", "proto": "http"},
+        {"for": "5.6.7.8"},
+    ]
+    # Quoted strings may hold separators and escapes
+    assert parse_forwarded('for="a,b";host="x\\"y", for=_hidden') == [{"for": "a,b", "host": 'x"y'}, {"for": "_hidden"}]
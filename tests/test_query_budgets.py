@@ -0,0 +1,122 @@
+"""
+Every route with a @query_budget, run with QUERY_BUDGET_MODE=enforce against
+a multi-product catalog and multi-item orders: a route whose statement count
+grows with the data (an N+1 query) fails here with QueryBudgetExceeded.
+
+The sync routes run in this process; the async ones (DB_MODE=async) run the
+same module in a subprocess, since the mode is fixed when app.main is imported.
+"""
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import ASYNC_DB, SessionLocal
+from app.model.order import Order
+from app.model.product import Product
+from app.services.order_archive import archive_orders
+from app.utils.deps import get_db
+from app.utils.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, query_budget
+
+from conftest import create_product, order_body
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTS = 25
+ITEMS_PER_ORDER = 5
+
+
+@pytest.fixture(scope="module")
+def product_ids(client):
+    # Every other product tracks stock
+    return [
+        create_product(client, f"Fruit {index}", available_kg=1000 if index % 2 else None) for index in range(PRODUCTS)
+    ]
+
+
+def place_order(client, product_ids, **headers):
+    response = client.post("/api/orders", json=order_body(product_ids[:ITEMS_PER_ORDER], name="Budget"), headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["data"]["id"]
+
+
+def test_product_routes(client, product_ids):
+    # After the writes above the catalog snapshot is rebuilt from every product
+    assert client.get("/api/products").status_code == 200
+    assert client.get("/api/products").status_code == 200
+    assert len(client.get("/api/products/stock").json()["data"]) >= PRODUCTS // 2
+    response = client.get("/api/products/search", params={"q": "fruit", "limit": PRODUCTS})
+    assert len(response.json()["data"]) == PRODUCTS
+    response = client.put(f"/api/products/{product_ids[-1]}", json={"price_per_kg": 3, "available_kg": 50})
+    assert response.status_code == 200, response.text
+    extra = client.post("/api/products", data={"name": "Spare", "price_per_kg": "1", "image": "https://example.com/s.jpg"})
+    assert client.delete(f"/api/products/{extra.json()['data']['id']}").status_code == 200
+
+
+def test_discount_routes(client):
+    assert client.post("/api/discount", json={"text": "10% off"}).status_code == 200
+    assert client.post("/api/discount", json={"text": "20% off"}).status_code == 200
+    assert client.get("/api/discount").status_code == 200
+
+
+def test_order_routes(client, product_ids):
+    order_ids = [place_order(client, product_ids) for _ in range(3)]
+    # Idempotent placement stores the response with the order; a replay reads it back
+    keyed = place_order(client, product_ids, **{"Idempotency-Key": "budget-1"})
+    assert place_order(client, product_ids, **{"Idempotency-Key": "budget-1"}) == keyed
+
+    assert client.get("/api/orders", params={"limit": 2}).status_code == 200
+    response = client.get(f"/api/orders/{order_ids[0]}")
+    assert len(response.json()["data"]["orderedItems"]) == ITEMS_PER_ORDER
+    assert client.put(f"/api/orders/{order_ids[0]}", json={"status": "Paid"}).status_code == 200
+    # Pending items go back on the shelf: stock, rollups and the items themselves
+    assert client.delete(f"/api/orders/{order_ids[1]}").status_code == 200
+    assert client.delete(f"/api/orders/{order_ids[0]}").status_code == 200
+
+
+def test_archived_order_detail(client, product_ids):
+    order_id = place_order(client, product_ids)
+    assert client.put(f"/api/orders/{order_id}", json={"status": "Delivered"}).status_code == 200
+    with SessionLocal() as db:
+        db.execute(update(Order).where(Order.id == order_id).values(created_at=datetime.utcnow() - timedelta(days=365)))
+        db.commit()
+        assert archive_orders(db, older_than_days=90) == 1
+    # Misses orders, then reads the archive
+    response = client.get(f"/api/orders/{order_id}")
+    assert response.status_code == 200, response.text
+    assert len(response.json()["data"]["orderedItems"]) == ITEMS_PER_ORDER
+
+
+def test_analytics_routes(client, product_ids):
+    place_order(client, product_ids)
+    for path in ("/api/analytics/daily", "/api/analytics/status", "/api/analytics/products"):
+        assert client.get(path).status_code == 200
+
+
+def test_budget_is_enforced():
+    probe = FastAPI()
+
+    @probe.get("/probe")
+    @query_budget(1)
+    def over_budget(db: Session = Depends(get_db)):
+        for _ in range(2):
+            db.scalars(select(Product.id)).all()
+        return {}
+
+    with pytest.raises(QueryBudgetExceeded):
+        TestClient(QueryBudgetMiddleware(probe, mode="enforce")).get("/probe")
+
+
+@pytest.mark.skipif(ASYNC_DB, reason="already running the async routes")
+def test_async_routes():
+    env = dict(os.environ, DB_MODE="async")
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", __file__],
+        env=env, cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
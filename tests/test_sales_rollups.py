@@ -0,0 +1,48 @@
+"""Sales rollups: the rebuild counts archived orders like live ones."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.db.session import SessionLocal
+from app.model.order import Order
+from app.model.sales_rollup import DailyProductSales, DailySales, DailyStatusSales
+from app.services.analytics_service import rebuild_rollups
+from app.services.order_archive import archive_orders
+
+from conftest import create_product, order_body
+
+
+ROLLUP_COLUMNS = {
+    "daily": (DailySales.day, DailySales.order_count, DailySales.revenue, DailySales.kg_sold),
+    "status": (DailyStatusSales.day, DailyStatusSales.status, DailyStatusSales.order_count, DailyStatusSales.revenue),
+    "product": (DailyProductSales.day, DailyProductSales.product_id, DailyProductSales.kg_sold, DailyProductSales.order_lines),
+}
+
+
+def rollups():
+    with SessionLocal() as db:
+        return {name: sorted(db.execute(select(*columns)).all()) for name, columns in ROLLUP_COLUMNS.items()}
+
+
+def test_rebuild_keeps_archived_orders(client):
+    product_ids = [create_product(client, f"Rollup plum {index}", price_per_kg=3) for index in range(2)]
+    order_ids = []
+    for quantity in (1, 2, 4):
+        response = client.post("/api/orders", json=order_body(product_ids, quantity_in_kg=quantity))
+        assert response.status_code == 201, response.text
+        order_ids.append(response.json()["data"]["id"])
+    for order_id in order_ids[:2]:
+        assert client.put(f"/api/orders/{order_id}", json={"status": "Delivered"}).status_code == 200
+    with SessionLocal() as db:
+        old = datetime.utcnow() - timedelta(days=400)
+        db.execute(update(Order).where(Order.id.in_(order_ids)).values(created_at=old))
+        db.commit()
+        # The incremental rollups counted the orders on the day they were placed
+        rebuild_rollups(db)
+    before = rollups()
+    assert any(row.day == old.date() and row.order_count == 3 for row in before["daily"])
+
+    with SessionLocal() as db:
+        assert archive_orders(db, older_than_days=90) == 2
+        rebuild_rollups(db)
+    assert rollups() == before
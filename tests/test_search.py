@@ -0,0 +1,81 @@
+"""The in-memory product search index: prefixes, typos (transpositions included), ranking and upkeep."""
+from app.services.search import ProductSearchIndex, edit_distance
+
+from conftest import create_product
+
+ROWS = [
+    ("apple", "Apple", True),
+    ("green-apple", "Green Apple", True),
+    ("pineapple", "Pineapple", False),
+    ("applesauce", "Applesauce", True),
+    ("banana", "Banana", True),
+    ("jalapeno", "Jalapeño", True),
+]
+
+
+def index(rows=ROWS):
+    built = ProductSearchIndex()
+    built.rebuild(rows, version=1)
+    return built
+
+
+def test_edit_distance():
+    assert edit_distance("apple", "apple", 2) == 0
+    assert edit_distance("appel", "apple", 2) == 1  # one transposition
+    assert edit_distance("aple", "apple", 2) == 1
+    assert edit_distance("banana", "bandana", 1) == 1
+    # Past the limit it only reports limit + 1
+    assert edit_distance("kiwi", "mango", 1) == 2
+
+
+def test_exact_before_prefix_before_typo():
+    products = index()
+    # Exact word first (shorter names first), then the prefix match
+    assert products.search("apple") == ["apple", "green-apple", "applesauce"]
+    assert products.search("appl") == ["apple", "applesauce", "green-apple"]
+    assert products.search("appel") == ["apple", "green-apple"]
+    assert products.search("bananna") == ["banana"]
+
+
+def test_every_word_must_match_and_accents_are_ignored():
+    products = index()
+    assert products.search("green appel") == ["green-apple"]
+    assert products.search("red apple") == []
+    assert products.search("JALAPENO") == ["jalapeno"]
+
+
+def test_in_stock_filter_and_limit():
+    products = index()
+    assert products.search("pineapple", in_stock=True) == []
+    assert products.search("pineapple", in_stock=False) == ["pineapple"]
+    assert products.search("apple", limit=1) == ["apple"]
+
+
+def test_incremental_updates_and_stale_versions():
+    products = index()
+    products.upsert("banana", "Plantain", True, version=3)
+    assert products.search("banana") == []
+    assert products.search("plantain") == ["banana"]
+    # A change older than the one already applied is ignored
+    products.upsert("banana", "Banana", True, version=2)
+    assert products.search("plantain") == ["banana"]
+    products.remove("apple", version=4)
+    assert products.search("apple") == ["green-apple", "applesauce"]
+    products.apply(5, [("kiwi", 5, "Kiwi", True), ("green-apple", 5, None, False)])
+    assert products.version == 5
+    assert products.search("kiwi") == ["kiwi"]
+    assert products.search("green") == []
+
+
+def test_search_route_follows_product_writes(client):
+    product_id = create_product(client, "Searchable cantaloupe")
+    found = client.get("/api/products/search", params={"q": "cantalopue"}).json()["data"]
+    assert [product["id"] for product in found] == [product_id]
+
+    assert client.put(f"/api/products/{product_id}", json={"name": "Searchable honeydew"}).status_code == 200
+    assert client.get("/api/products/search", params={"q": "cantaloupe"}).json()["data"] == []
+    found = client.get("/api/products/search", params={"q": "honeyd"}).json()["data"]
+    assert [product["id"] for product in found] == [product_id]
+
+    assert client.delete(f"/api/products/{product_id}").status_code == 200
+    assert client.get("/api/products/search", params={"q": "honeydew"}).json()["data"] == []
@@ -0,0 +1,70 @@
+"""
+Responses serialized in one pass from model_construct (no validation) must be
+the bytes the validating path produced, and the OpenAPI schema must still
+describe them.
+"""
+import json
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.db.session import SessionLocal
+from app.model.product import Product
+from app.routes.product import _absolute_image_url, _build_catalog_body
+from app.schemas.common import ApiResponse
+from app.schemas.order import OrderDetailOut, OrderOut, OrderPageOut
+from app.schemas.product import CatalogProductOut, ProductOut
+from app.utils.response import success_response
+
+from conftest import create_product, order_body
+
+BASE = "http://serialize.example"
+
+
+def validated(data_type, body: dict) -> dict:
+    # What FastAPI's response_model validation would have sent for the same payload
+    adapter = TypeAdapter(ApiResponse[data_type])
+    return json.loads(adapter.dump_json(adapter.validate_python(body), by_alias=True))
+
+
+def test_catalog_body_matches_the_validating_path(client):
+    create_product(client, "Serialize pear", image="/uploads/products/pear.jpg")
+    with SessionLocal() as db:
+        body = _build_catalog_body(db, BASE)
+        out = []
+        for product in db.query(Product).all():
+            item = CatalogProductOut.model_validate(product)
+            item.image = _absolute_image_url(BASE, item.image)
+            out.append(item)
+    expected = validated(List[CatalogProductOut], success_response("Products fetched successfully", out))
+    assert json.loads(body) == expected
+
+
+def test_responses_round_trip_through_their_response_model(client):
+    product_id = create_product(client, "Serialize plum", available_kg=5)
+    found = client.get("/api/products/search", params={"q": "serialize plum"}).json()
+    assert found == validated(List[ProductOut], found)
+
+    placed = client.post("/api/orders", json=order_body([product_id], name="Serialize"))
+    assert placed.headers["content-type"] == "application/json"
+    assert placed.json() == validated(OrderOut, placed.json())
+    order_id = placed.json()["data"]["id"]
+    detail = client.get(f"/api/orders/{order_id}").json()
+    assert detail == validated(OrderDetailOut, detail)
+    assert detail["data"]["orderedItems"][0]["productName"] == "Serialize plum"
+    page = client.get("/api/orders", params={"limit": 1}).json()
+    assert page == validated(OrderPageOut, page)
+    assert client.delete(f"/api/orders/{order_id}").status_code == 200
+
+
+def test_openapi_still_documents_the_envelope(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, method, model in (
+        ("/api/products", "get", "ApiResponse_List_CatalogProductOut__"),
+        ("/api/orders", "post", "ApiResponse_OrderOut_"),
+        ("/api/orders/{order_id}", "get", "ApiResponse_OrderDetailOut_"),
+    ):
+        responses = paths[path][method]["responses"]
+        success = next(response for code, response in responses.items() if code.startswith("2"))
+        schema = success["content"]["application/json"]["schema"]
+        assert schema["$ref"] == f"#/components/schemas/{model}"
@@ -0,0 +1,79 @@
+"""The file-backed SQLite profile: WAL, one writer connection, a read-only reader pool."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db import session as db_session
+from app.db import sqlite as sqlite_profile
+
+
+def pragma(session, name):
+    return session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_profile_is_active_for_the_test_database():
+    assert sqlite_profile.is_file_database(db_session.DATABASE_URL)
+    assert not sqlite_profile.is_file_database("sqlite://")
+    assert not sqlite_profile.is_file_database("sqlite:///:memory:")
+    assert not sqlite_profile.is_file_database("postgresql://localhost/shop")
+    assert db_session.SQLITE_PROFILE_ACTIVE
+    assert db_session.read_engine is not db_session.engine
+    assert db_session.engine.pool.size() == 1
+    assert db_session.read_engine.pool.size() == sqlite_profile.SQLITE_READ_POOL_SIZE
+
+
+def test_pragmas(client):
+    with db_session.SessionLocal() as db:
+        assert pragma(db, "journal_mode") == "wal"
+        assert pragma(db, "synchronous") == 1  # NORMAL
+        assert pragma(db, "busy_timeout") == sqlite_profile.SQLITE_BUSY_TIMEOUT_MS
+        assert pragma(db, "query_only") == 0
+    with db_session.ReadSessionLocal() as db:
+        assert pragma(db, "query_only") == 1
+        with pytest.raises(OperationalError):
+            db.execute(text("CREATE TABLE read_only_probe (id INTEGER)"))
+
+
+def test_readers_are_not_blocked_by_an_open_write(client):
+    with db_session.SessionLocal() as writer, db_session.ReadSessionLocal() as reader:
+        before = reader.execute(text("SELECT count(*) FROM products")).scalar()
+        reader.rollback()
+        # BEGIN IMMEDIATE: the writer holds the write lock until it commits
+        writer.execute(text(
+            "INSERT INTO products (id, name, price_per_kg, in_stock, created_at, updated_at) "
+            "VALUES ('wal-probe', 'WAL probe', 1, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ))
+        # Served from the last committed snapshot at once, without the uncommitted row
+        assert reader.execute(text("SELECT count(*) FROM products")).scalar() == before
+        writer.rollback()
+
+
+class FakeConnection:
+    class dialect:
+        is_async = False
+
+    def __init__(self, failures, message="database is locked"):
+        self.failures = failures
+        self.message = message
+        self.statements = []
+
+    def exec_driver_sql(self, statement):
+        self.statements.append(statement)
+        if len(self.statements) <= self.failures:
+            raise OperationalError(statement, {}, Exception(self.message))
+
+
+def test_begin_retries_while_busy(monkeypatch):
+    monkeypatch.setattr(sqlite_profile, "_sleep", lambda conn, seconds: None)
+    conn = FakeConnection(failures=2)
+    sqlite_profile._begin_listener("BEGIN IMMEDIATE")(conn)
+    assert conn.statements == ["BEGIN IMMEDIATE"] * 3
+
+    conn = FakeConnection(failures=sqlite_profile.SQLITE_BEGIN_RETRIES + 1)
+    with pytest.raises(OperationalError):
+        sqlite_profile._begin_listener("BEGIN IMMEDIATE")(conn)
+    # Anything but a busy database fails at once
+    conn = FakeConnection(failures=1, message="disk I/O error")
+    with pytest.raises(OperationalError):
+        sqlite_profile._begin_listener("BEGIN IMMEDIATE")(conn)
+    assert len(conn.statements) == 1